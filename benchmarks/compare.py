@@ -0,0 +1,53 @@
+"""Compares two benchmark result files and flags regressions.
+
+Exits with status 1 when any operation's median time or peak memory grew by
+more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+
+
+def _load(path: str) -> dict[tuple[str, str], dict]:
+    with open(path) as f:
+        report = json.load(f)
+    return {(result["size"], result["operation"]): result for result in report["results"]}
+
+
+def compare(baseline_path: str, current_path: str, threshold: float) -> list[str]:
+    """Prints a comparison table and returns the regressed operations."""
+    baseline, current = _load(baseline_path), _load(current_path)
+    regressions = []
+    print(f"{'size':>6}  {'operation':<42} {'base ms':>10} {'new ms':>10} {'time':>7} {'memory':>7}")
+    for key in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[key], current[key]
+        time_ratio = after["median_s"] / before["median_s"] if before["median_s"] else 1.0
+        memory_ratio = after["peak_kib"] / before["peak_kib"] if before["peak_kib"] else 1.0
+        flag = ""
+        if time_ratio > 1 + threshold or memory_ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(f"{key[0]} {key[1]}")
+        print(
+            f"{key[0]:>6}  {key[1]:<42} {before['median_s'] * 1000:>10.2f} "
+            f"{after['median_s'] * 1000:>10.2f} {time_ratio:>6.2f}x {memory_ratio:>6.2f}x{flag}"
+        )
+    for key in sorted(baseline.keys() ^ current.keys()):
+        print(f"{key[0]:>6}  {key[1]:<42} only in {'baseline' if key in baseline else 'current'}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline", help="Results JSON from the reference commit.")
+    parser.add_argument("current", help="Results JSON to check.")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Allowed relative slowdown (0.2 = 20%%)."
+    )
+    args = parser.parse_args()
+    if compare(args.baseline, args.current, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
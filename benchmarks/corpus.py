@@ -0,0 +1,94 @@
+"""Synthetic `category.json`-shaped corpora with skewed category sizes."""
+
+import argparse
+import json
+import random
+from typing import Iterator
+
+CATEGORIES = [
+    "general",
+    "life",
+    "success",
+    "motivational",
+    "fun",
+    "programming",
+    "dream",
+    "failure",
+    "gaming",
+    "birthday",
+    "humorous",
+    "travel",
+]
+
+_VOCABULARY = (
+    "life love dream success failure time world people heart mind work hope "
+    "courage change future never always today tomorrow happiness wisdom truth "
+    "journey light dark code bug game friend laugh smile learn grow believe "
+    "start finish simple hard easy great small step path road"
+).split()
+
+
+def parse_size(size: str) -> int:
+    """Parses sizes like `10k`, `1m` or `2500` into a number of quotes."""
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    size = size.strip().lower()
+    if size and size[-1] in multipliers:
+        return int(float(size[:-1]) * multipliers[size[-1]])
+    return int(size)
+
+
+def category_sizes(total: int, categories: int = len(CATEGORIES), skew: float = 1.2) -> list[int]:
+    """Splits `total` quotes across categories following a Zipf-like distribution."""
+    weights = [1 / (rank**skew) for rank in range(1, categories + 1)]
+    scale = total / sum(weights)
+    sizes = [int(weight * scale) for weight in weights]
+    sizes[0] += total - sum(sizes)
+    return sizes
+
+
+def iter_corpus(
+    total: int, skew: float = 1.2, seed: int = 0
+) -> Iterator[tuple[str, dict[str, str]]]:
+    """Yields (category, quote_entry) pairs, one category after another."""
+    rng = random.Random(seed)
+    authors = [f"Author {i}" for i in range(max(1, total // 50))]
+    for category, size in zip(CATEGORIES, category_sizes(total, skew=skew)):
+        for i in range(size):
+            words = rng.choices(_VOCABULARY, k=rng.randint(6, 18))
+            yield category, {
+                "quote": f"{' '.join(words).capitalize()} #{i}.",
+                "author": rng.choice(authors),
+            }
+
+
+def write_corpus(path: str, total: int, skew: float = 1.2, seed: int = 0) -> None:
+    """Streams a corpus to `path` in the `{category: [...]}` JSON layout."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        current = None
+        for category, quote_entry in iter_corpus(total, skew, seed):
+            if category != current:
+                if current is not None:
+                    f.write("],")
+                f.write(f"\n{json.dumps(category)}: [")
+                current = category
+            else:
+                f.write(",")
+            f.write(f"\n  {json.dumps(quote_entry, ensure_ascii=False)}")
+        if current is not None:
+            f.write("]")
+        f.write("\n}\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("size", help="Number of quotes, e.g. 10k, 1m or 10m.")
+    parser.add_argument("out", help="Path of the JSON file to write.")
+    parser.add_argument("--skew", type=float, default=1.2, help="Zipf exponent for sizes.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args()
+    write_corpus(args.out, parse_size(args.size), args.skew, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""Runs concurrent readers and writers against one database and reports latency.
+
+Workers pick reads (`generate` or `list`) and writes (`add`) at random
+according to `--write-ratio`, for `--duration` seconds or `--operations`
+operations each. The `library` target calls the storage layer in-process
+from threads or processes. The `cli` target runs the `quote` command as a
+fresh process for each operation, like cron jobs or shell scripts do.
+Processes that share a DuckDB file contend for its lock. Errors from that
+are counted as `lock_conflict`. Errors from mixing read-only and read-write
+connections in one process are counted as `connection_conflict`.
+
+Read and write latencies are reported as p50/p95/p99 together with
+throughput and errors by kind, as JSON.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, NamedTuple, Optional
+
+from benchmarks.corpus import iter_corpus, parse_size, write_corpus
+from benchmarks.run import _metadata
+
+DRIVERS = ("duckdb", "sqlite", "memory")
+READ_OPERATIONS = ("generate", "list")
+WRITE_CATEGORY = "loadtest"
+
+# DuckDB reports "Could not set lock on file" and write-write "Conflict"s;
+# SQLite reports "database is locked".
+_LOCK_ERROR = re.compile(r"lock|conflict", re.IGNORECASE)
+# DuckDB refuses a read-only and a read-write connection to one file in one process.
+_CONNECTION_CONFLICT = re.compile(r"different configuration", re.IGNORECASE)
+_EXCEPTION_LINE = re.compile(r"^([\w.]+(?:Error|Exception)): ", re.MULTILINE)
+
+
+class Sample(NamedTuple):
+    """One timed operation: its kind, name, latency and error kind (None if it worked)."""
+
+    kind: str
+    operation: str
+    seconds: float
+    error: Optional[str]
+
+
+class Workload(NamedTuple):
+    url: str
+    target: str
+    write_ratio: float
+    read_operations: tuple[str, ...]
+    category: Optional[str]
+    count: int
+    duration: float
+    operations: Optional[int]
+    seed: int
+
+
+def error_kind(text: str) -> str:
+    """Classifies an error message or traceback.
+
+    Returns `connection_conflict`, `lock_conflict` or else the exception name.
+    """
+    if _CONNECTION_CONFLICT.search(text):
+        return "connection_conflict"
+    if _LOCK_ERROR.search(text):
+        return "lock_conflict"
+    exceptions = _EXCEPTION_LINE.findall(text)
+    return exceptions[-1].rsplit(".", 1)[-1] if exceptions else "error"
+
+
+class _ErrorCapture(logging.Handler):
+    """Records what `error_logger` logs on each thread while an operation runs.
+
+    The library logs and swallows most errors, so the log is where failures show.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(logging.ERROR)
+        self.local = threading.local()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        errors = getattr(self.local, "errors", None)
+        if errors is not None:
+            text = record.getMessage()
+            if record.exc_info and record.exc_info[1] is not None:
+                error = record.exc_info[1]
+                text = f"{text}\n{type(error).__module__}.{type(error).__name__}: {error}"
+            errors.append(text)
+
+    def run(self, operation: Callable[[], Any]) -> Optional[str]:
+        """Runs `operation`; returns the kind of the first error it raised or logged."""
+        self.local.errors = []
+        try:
+            operation()
+        except Exception as e:
+            self.local.errors.append(f"{type(e).__module__}.{type(e).__name__}: {e}")
+        finally:
+            errors, self.local.errors = self.local.errors, None
+        return error_kind(errors[0]) if errors else None
+
+
+def _library_operations(workload: Workload, capture: _ErrorCapture) -> dict[str, Callable]:
+    from quote_manager_cli.storage import open_store
+
+    store = open_store(workload.url)
+    # Open the connection (or load the memory store) before anything is timed.
+    capture.run(store.count_quotes)
+    category, count = workload.category, workload.count
+    return {
+        "generate": lambda: store.generate_quotes(category, count),
+        "list": lambda: store.list_quotes(category, limit=count),
+        "add": lambda text: store.add_quote(WRITE_CATEGORY, text, "Load Test"),
+    }
+
+
+def _cli_operation(url: str, args: list[str]) -> Optional[str]:
+    """Runs `quote <args>` in a new process; returns the kind of error it hit, if any."""
+    with tempfile.TemporaryDirectory(prefix="quote-loadtest-") as log_dir:
+        env = {**os.environ, "DATABASE_URL": url, "QUOTE_LOG_DIR": log_dir}
+        env.pop("DATABASE_PATH", None)
+        env.pop("DATABASE_READ_PATH", None)
+        result = subprocess.run(
+            [sys.executable, "-m", "quote_manager_cli.cli", *args],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        # Commands log some failures without printing them, like the library.
+        error_log = os.path.join(log_dir, "quote_manager-error.log")
+        logged = ""
+        if os.path.exists(error_log):
+            with open(error_log, encoding="utf-8") as f:
+                logged = f.read()
+        printed = any(line.startswith("Error") for line in result.stdout.splitlines())
+        if result.returncode == 0 and not printed and not logged:
+            return None
+        return error_kind(logged + result.stderr + result.stdout)
+
+
+def run_worker(workload: Workload, worker: int) -> list[Sample]:
+    """Runs one worker's share of the workload and returns its samples."""
+    rng = random.Random(workload.seed * 1_000_003 + worker)
+    run_id = uuid.uuid4().hex[:8]
+    capture = _ErrorCapture()
+    if workload.target == "library":
+        logging.getLogger("error_logger").addHandler(capture)
+        operations = _library_operations(workload, capture)
+
+    samples: list[Sample] = []
+    deadline = time.perf_counter() + workload.duration
+    try:
+        while (
+            len(samples) < workload.operations
+            if workload.operations is not None
+            else time.perf_counter() < deadline
+        ):
+            if rng.random() < workload.write_ratio:
+                kind, name = "write", "add"
+                text = f"Load test quote {run_id}-{worker}-{len(samples)}"
+                args = ["add", "--category", WRITE_CATEGORY, "--text", text]
+            else:
+                kind, name = "read", rng.choice(workload.read_operations)
+                args = [name, "-n" if name == "generate" else "-l", str(workload.count)]
+                if workload.category:
+                    args += ["-c", workload.category]
+            start = time.perf_counter()
+            if workload.target == "cli":
+                error = _cli_operation(workload.url, args)
+            elif kind == "write":
+                error = capture.run(lambda: operations["add"](text))
+            else:
+                error = capture.run(operations[name])
+            samples.append(Sample(kind, name, time.perf_counter() - start, error))
+    finally:
+        if workload.target == "library":
+            logging.getLogger("error_logger").removeHandler(capture)
+    return samples
+
+
+def percentiles(seconds: list[float]) -> dict[str, Optional[float]]:
+    """Returns p50/p95/p99, mean and max latency in milliseconds."""
+    if not seconds:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None, "max_ms": None}
+    if len(seconds) == 1:
+        cuts = seconds * 99
+    else:
+        cuts = statistics.quantiles(seconds, n=100, method="inclusive")
+    return {
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+        "mean_ms": statistics.fmean(seconds) * 1000,
+        "max_ms": max(seconds) * 1000,
+    }
+
+
+def summarize(samples: list[Sample], elapsed: float) -> dict[str, Any]:
+    """Aggregates samples: counts, throughput, errors by kind and latency of successes."""
+    errors: dict[str, int] = {}
+    for sample in samples:
+        if sample.error is not None:
+            errors[sample.error] = errors.get(sample.error, 0) + 1
+    succeeded = [sample.seconds for sample in samples if sample.error is None]
+    return {
+        "operations": len(samples),
+        "succeeded": len(succeeded),
+        "errors": sum(errors.values()),
+        "error_kinds": dict(sorted(errors.items())),
+        "throughput_per_s": len(succeeded) / elapsed if elapsed > 0 else None,
+        **percentiles(succeeded),
+    }
+
+
+def prepare_database(driver: str, size: str, work_dir: str) -> str:
+    """Loads a generated corpus for `driver` into `work_dir` and returns its URL."""
+    from quote_manager_cli.database import dispose_engines, init_db
+    from quote_manager_cli.quote_manager import load_quote_records_to_db
+
+    total = parse_size(size)
+    print(f"[{driver}] loading {total} quotes...", file=sys.stderr)
+    if driver == "memory":
+        corpus_path = os.path.join(work_dir, f"loadtest-{size}.json")
+        write_corpus(corpus_path, total)
+        return f"memory:///{corpus_path}"
+    db_file = os.path.join(work_dir, f"loadtest-{size}.{driver}")
+    for path in (db_file, f"{db_file}.wal", f"{db_file}-wal", f"{db_file}-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    url = f"{driver}:///{db_file}"
+    load_quote_records_to_db(init_db(url), iter_corpus(total), mode="replace")
+    dispose_engines()
+    return url
+
+
+def run(workload: Workload, workers: int, concurrency: str) -> dict[str, Any]:
+    """Runs `workers` workers at once and summarizes their samples."""
+    # CLI workers only wait on child processes, so threads are enough.
+    executor_class = ProcessPoolExecutor if concurrency == "process" else ThreadPoolExecutor
+    if workload.target == "cli":
+        executor_class = ThreadPoolExecutor
+    start = time.perf_counter()
+    with executor_class(max_workers=workers) as executor:
+        futures = [executor.submit(run_worker, workload, worker) for worker in range(workers)]
+        samples = [sample for future in futures for sample in future.result()]
+    elapsed = time.perf_counter() - start
+
+    operations = sorted({sample.operation for sample in samples})
+    return {
+        "elapsed_s": elapsed,
+        "total": summarize(samples, elapsed),
+        "read": summarize([sample for sample in samples if sample.kind == "read"], elapsed),
+        "write": summarize([sample for sample in samples if sample.kind == "write"], elapsed),
+        "operations": {
+            name: summarize([sample for sample in samples if sample.operation == name], elapsed)
+            for name in operations
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="Database URL to load test. Defaults to a generated one.")
+    parser.add_argument("--driver", choices=DRIVERS, default="duckdb", help="Backend to generate.")
+    parser.add_argument("--size", default="10k", help="Quotes in the generated database.")
+    parser.add_argument("--target", choices=("library", "cli"), default="library")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent workers.")
+    parser.add_argument(
+        "--concurrency",
+        choices=("thread", "process"),
+        default="thread",
+        help="Run library workers as threads or processes. CLI workers are always processes.",
+    )
+    parser.add_argument(
+        "--write-ratio", type=float, default=0.1, help="Share of operations that add a quote."
+    )
+    parser.add_argument(
+        "--reads",
+        default=",".join(READ_OPERATIONS),
+        help="Comma-separated read operations to pick from.",
+    )
+    parser.add_argument("-c", "--category", help="Category to read. Defaults to all quotes.")
+    parser.add_argument("--count", type=int, default=1, help="Quotes per generate or list.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per worker.")
+    parser.add_argument(
+        "--operations", type=int, help="Operations per worker, overrides --duration."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the operation mix.")
+    parser.add_argument("--work-dir", help="Directory for the generated database (kept).")
+    parser.add_argument("--out", help="Write JSON results here instead of stdout.")
+    args = parser.parse_args()
+
+    reads = tuple(name for name in args.reads.split(",") if name)
+    if not 0 <= args.write_ratio <= 1 or not set(reads) <= set(READ_OPERATIONS) or not reads:
+        parser.error(f"--write-ratio must be in [0, 1] and --reads a subset of {READ_OPERATIONS}")
+
+    with tempfile.TemporaryDirectory(prefix="quote-loadtest-") as tmp_dir:
+        work_dir = args.work_dir or tmp_dir
+        os.makedirs(work_dir, exist_ok=True)
+        url = args.url or prepare_database(args.driver, args.size, work_dir)
+        workload = Workload(
+            url,
+            args.target,
+            args.write_ratio,
+            reads,
+            args.category,
+            args.count,
+            args.duration,
+            args.operations,
+            args.seed,
+        )
+        print(f"Running {args.workers} {args.target} workers against {url}...", file=sys.stderr)
+        results = run(workload, args.workers, args.concurrency)
+
+    config = {
+        **workload._asdict(),
+        "read_operations": list(reads),
+        "workers": args.workers,
+        "concurrency": "process" if args.target == "cli" else args.concurrency,
+    }
+    report = json.dumps({"meta": _metadata(), "config": config, "results": results}, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Times the quote_manager and database hot paths over synthetic corpora.
+
+Each operation is run once under tracemalloc to record its peak Python memory
+and then `--repeat` times untraced for timing. Results are written as JSON so
+two runs can be compared with `python -m benchmarks.compare`.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from importlib import metadata
+from typing import Any, Callable
+
+from benchmarks.corpus import CATEGORIES, parse_size, write_corpus
+from quote_manager_cli.database import dispose_engines, get_db_conn, init_db
+from quote_manager_cli.json_stream import iter_category_json
+from quote_manager_cli.quote_manager import (
+    generate_random_quote,
+    generate_random_quotes,
+    iter_quotes,
+    list_quotes,
+    load_quote_records_to_db,
+    quote_columns,
+)
+
+Operation = Callable[[], Any]
+
+
+def _measure(operation: Operation, repeat: int) -> dict[str, float]:
+    tracemalloc.start()
+    operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - start)
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "max_s": max(timings),
+        "repeat": repeat,
+        "peak_kib": peak / 1024,
+    }
+
+
+def _operations(url: str, db_file: str, corpus_path: str) -> dict[str, tuple[Operation, bool]]:
+    """Returns the benchmarked operations, flagged True when they rewrite the corpus."""
+    largest, smallest = CATEGORIES[0], CATEGORIES[-1]
+
+    def conn() -> Any:
+        return get_db_conn(url, db_file)
+
+    def load_fresh() -> int:
+        fresh_file = f"{db_file}.fresh"
+        fresh_url = f"duckdb:///{fresh_file}"
+        try:
+            return load_quote_records_to_db(init_db(fresh_url), iter_category_json(corpus_path))
+        finally:
+            dispose_engines()
+            for path in (fresh_file, f"{fresh_file}.wal"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    appended = iter(range(1_000_000_000))
+
+    def append_batch() -> int:
+        # New quotes every run, so each append adds and indexes 100 rows.
+        batch = next(appended)
+        records = [(smallest, {"quote": f"Appended {batch}-{i}"}) for i in range(100)]
+        return load_quote_records_to_db(init_db(url), records)
+
+    return {
+        "init_db": (lambda: init_db(url).close(), False),
+        "load_quotes_to_db.fresh": (load_fresh, True),
+        "load_quotes_to_db.reimport": (
+            lambda: load_quote_records_to_db(
+                init_db(url), iter_category_json(corpus_path), mode="replace"
+            ),
+            True,
+        ),
+        "load_quotes_to_db.append_100": (append_batch, False),
+        "list_quotes.largest_category": (lambda: list_quotes(conn(), largest, limit=5), False),
+        "list_quotes.smallest_category": (lambda: list_quotes(conn(), smallest, limit=5), False),
+        "list_quotes.after_id": (
+            lambda: list_quotes(conn(), largest, limit=5, after_id=10_000_000), False
+        ),
+        "list_quotes.largest_category_all": (
+            lambda: list_quotes(conn(), largest),
+            False,
+        ),
+        "quote_columns.largest_category": (lambda: quote_columns(conn(), largest), False),
+        "iter_quotes.largest_category": (
+            lambda: sum(1 for _ in iter_quotes(conn(), largest)),
+            False,
+        ),
+        "generate_random_quote.largest_category": (
+            lambda: generate_random_quote(conn(), largest),
+            False,
+        ),
+        "generate_random_quote.all": (lambda: generate_random_quote(conn()), False),
+        "generate_random_quotes.count_10": (
+            lambda: generate_random_quotes(conn(), largest, 10),
+            False,
+        ),
+        "generate_random_quotes.seeded": (
+            lambda: generate_random_quotes(conn(), largest, 1, seed=1),
+            False,
+        ),
+        "generate_random_quotes.weighted": (
+            lambda: generate_random_quotes(conn(), largest, 1, "weighted"),
+            False,
+        ),
+        "generate_random_quotes.shuffle": (
+            lambda: generate_random_quotes(conn(), largest, 1, "shuffle", session="bench"),
+            False,
+        ),
+    }
+
+
+def _metadata() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    versions = {}
+    for package in ("sqlalchemy", "duckdb", "duckdb-engine"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "packages": versions,
+    }
+
+
+def run(sizes: list[str], repeat: int, load_repeat: int, only: list[str], work_dir: str) -> dict:
+    results = []
+    for size in sizes:
+        total = parse_size(size)
+        corpus_path = os.path.join(work_dir, f"corpus-{size}.json")
+        if not os.path.exists(corpus_path):
+            print(f"Generating {total} quotes...", file=sys.stderr)
+            write_corpus(corpus_path, total)
+
+        db_file = os.path.join(work_dir, f"bench-{size}.db")
+        url = f"duckdb:///{db_file}"
+        load_quote_records_to_db(init_db(url), iter_category_json(corpus_path), mode="replace")
+
+        for name, (operation, rewrites) in _operations(url, db_file, corpus_path).items():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            print(f"[{size}] {name}...", file=sys.stderr)
+            measured = _measure(operation, load_repeat if rewrites else repeat)
+            results.append({"size": size, "quotes": total, "operation": name, **measured})
+        dispose_engines()
+    return {"meta": _metadata(), "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10k", help="Comma-separated sizes, e.g. 10k,1m,10m.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per operation.")
+    parser.add_argument("--load-repeat", type=int, default=1, help="Timed runs of full loads.")
+    parser.add_argument("--only", default="", help="Comma-separated operation name prefixes.")
+    parser.add_argument("--work-dir", help="Directory for corpora and databases (kept).")
+    parser.add_argument("--out", help="Write JSON results here instead of stdout.")
+    args = parser.parse_args()
+
+    sizes = [size for size in args.sizes.split(",") if size]
+    only = [name for name in args.only.split(",") if name]
+    if args.work_dir:
+        os.makedirs(args.work_dir, exist_ok=True)
+        report = run(sizes, args.repeat, args.load_repeat, only, args.work_dir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="quote-bench-") as work_dir:
+            report = run(sizes, args.repeat, args.load_repeat, only, work_dir)
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Measures what category and author keys cost in storage and save in filters.
+
+For each driver a generated corpus is loaded with the current schema, then:
+
+* storage: the quotes table is copied into fresh databases with category and
+  author as strings (the layout before keys), as keys with the `categories`
+  and `authors` dictionaries, and as both (the current layout), and the size
+  of each file is reported. Indexes are not copied.
+* filters: counting and fetching the ids of the largest and the smallest
+  category are timed when matching the category string and its key, on one
+  open session.
+* migration: `migrate_database` is timed on the strings-only copy.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any
+
+from sqlalchemy import func, select
+
+from benchmarks.corpus import CATEGORIES, iter_corpus, parse_size
+from benchmarks.run import _measure, _metadata
+from quote_manager_cli.database import (
+    Quote,
+    category_filter,
+    dispose_engines,
+    get_db_conn,
+    get_engine,
+    init_db,
+    migrate_database,
+)
+from quote_manager_cli.quote_manager import load_quote_records_to_db
+
+DRIVERS = ("duckdb", "sqlite")
+
+_COLUMNS = ["id", "text", "content_hash", "created_at", "weight"]
+LAYOUTS = {
+    "strings": ["author", "category"],
+    "keys": ["author_id", "category_id"],
+    "strings+keys": ["author", "category", "author_id", "category_id"],
+}
+
+
+def _copy_layout(url: str, path: str, columns: list[str], dictionaries: bool) -> int:
+    """Copies quotes with `columns` into a new database at `path`; returns its size."""
+    escaped_path = path.replace("'", "''")
+    with get_engine(url).connect() as connection:
+        connection.exec_driver_sql(f"ATTACH '{escaped_path}' AS layout")
+        connection.exec_driver_sql(
+            f"CREATE TABLE layout.quotes AS SELECT {', '.join(columns)} FROM quotes"
+        )
+        if dictionaries:
+            for table in ("categories", "authors"):
+                connection.exec_driver_sql(f"CREATE TABLE layout.{table} AS SELECT * FROM {table}")
+        connection.commit()
+        connection.exec_driver_sql("DETACH layout")
+        connection.commit()
+    return os.path.getsize(path)
+
+
+def _filter_operations(db: Any) -> dict[str, Any]:
+    """Returns the filter queries, each matching a category by string or by key."""
+    operations = {}
+    for label, category in (("largest", CATEGORIES[0]), ("smallest", CATEGORIES[-1])):
+        for match, where in (
+            ("string", Quote.category == category),
+            ("key", category_filter(db, category)),
+        ):
+            count = select(func.count()).select_from(Quote).where(where)
+            ids = select(Quote.id).where(where).order_by(Quote.id)
+            operations[f"count.{label}.{match}"] = lambda query=count: db.execute(query).all()
+            operations[f"ids.{label}.{match}"] = lambda query=ids: db.execute(query).all()
+    return operations
+
+
+def run_driver(driver: str, total: int, repeat: int, work_dir: str) -> list[dict[str, Any]]:
+    db_file = os.path.join(work_dir, f"schema-{total}.{driver}")
+    url = f"{driver}:///{db_file}"
+    results: list[dict[str, Any]] = []
+
+    def record(operation: str, **values: Any) -> None:
+        results.append({"driver": driver, "quotes": total, "operation": operation, **values})
+
+    print(f"[{driver}] loading {total} quotes...", file=sys.stderr)
+    load_quote_records_to_db(init_db(url), iter_corpus(total), mode="replace")
+
+    for layout, key_columns in LAYOUTS.items():
+        path = os.path.join(work_dir, f"layout-{layout}-{total}.{driver}")
+        if os.path.exists(path):
+            os.remove(path)
+        size = _copy_layout(url, path, _COLUMNS + key_columns, layout != "strings")
+        record(f"storage.{layout}", bytes=size)
+
+    db = get_db_conn(url, db_file)
+    try:
+        for name, operation in _filter_operations(db).items():
+            print(f"[{driver}] {name}...", file=sys.stderr)
+            record(f"filter.{name}", **_measure(operation, repeat))
+    finally:
+        db.close()
+
+    legacy_url = f"{driver}:///{os.path.join(work_dir, f'layout-strings-{total}.{driver}')}"
+    start = time.perf_counter()
+    migration = migrate_database(legacy_url)
+    record("migrate", seconds=time.perf_counter() - start, keyed=migration.keyed)
+    dispose_engines()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", default="100k", help="Number of quotes, e.g. 100k or 1m.")
+    parser.add_argument("--drivers", default=",".join(DRIVERS), help="Comma-separated drivers.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per filter.")
+    parser.add_argument("--work-dir", help="Directory for the databases (kept).")
+    parser.add_argument("--out", help="Write JSON results here instead of stdout.")
+    args = parser.parse_args()
+
+    total = parse_size(args.size)
+    drivers = [driver for driver in args.drivers.split(",") if driver]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = args.work_dir or tmp_dir
+        os.makedirs(work_dir, exist_ok=True)
+        results = []
+        for driver in drivers:
+            results.extend(run_driver(driver, total, args.repeat, work_dir))
+    report = json.dumps({"meta": _metadata(), "results": results}, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
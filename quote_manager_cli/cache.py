@@ -0,0 +1,135 @@
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Optional
+
+from sqlalchemy import select
+
+from .database import Quote, category_filter
+from .metrics import metrics
+from .selection import QuotePopulation
+
+
+# Seconds cached ids are served before they are reloaded, so quotes written
+# by other processes show up.
+DEFAULT_TTL = 5.0
+
+
+def _cache_key(db: Any, category: Optional[str]) -> tuple[str, Optional[str]]:
+    return str(db.get_bind().url), category.lower() if category else None
+
+
+class QuoteCache:
+    """Keeps sorted arrays of quote ids per category, evicting the least recently used.
+
+    Entries are keyed by database URL and category; the `None` category holds
+    the ids of every quote. Arrays hold plain integers, so a category of
+    millions of quotes costs 8 bytes per quote rather than an ORM object each.
+    Weighted and shuffled draws keep their `QuotePopulation`s here too, under
+    the same keys, limits and expiry.
+    Writes through this process invalidate entries at once; an entry older
+    than `ttl` seconds is reloaded, which bounds how long writes made by other
+    processes go unseen. A `ttl` of None keeps entries until invalidated.
+    """
+
+    def __init__(self, max_categories: int = 64, ttl: Optional[float] = DEFAULT_TTL):
+        self.max_categories = max_categories
+        self.ttl = ttl
+        self._ids: OrderedDict[tuple[str, Optional[str]], tuple[float, array]] = OrderedDict()
+        self._populations: OrderedDict[tuple[str, Optional[str]], tuple[float, QuotePopulation]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, entries: OrderedDict, key: tuple[str, Optional[str]], now: float) -> Any:
+        with self._lock:
+            entry = entries.get(key)
+            if entry is not None and (self.ttl is None or now - entry[0] < self.ttl):
+                self.hits += 1
+                entries.move_to_end(key)
+                return entry[1]
+            self.misses += 1
+        return None
+
+    def _put(
+        self, entries: OrderedDict, key: tuple[str, Optional[str]], now: float, value: Any
+    ) -> None:
+        with self._lock:
+            entries[key] = (now, value)
+            entries.move_to_end(key)
+            while len(entries) > self.max_categories:
+                entries.popitem(last=False)
+                self.evictions += 1
+
+    def ids(self, db: Any, category: Optional[str] = None) -> array:
+        """Returns the sorted quote ids of `category`, loading them on a miss."""
+        key = _cache_key(db, category)
+        now = time.monotonic()
+        ids = self._get(self._ids, key, now)
+        if ids is not None:
+            return ids
+
+        query: Any = select(Quote.id).order_by(Quote.id)
+        if key[1] is not None:
+            query = query.where(category_filter(db, key[1]))
+        with metrics.timer("cache.load"):
+            ids = array("q", db.execute(query).scalars())
+        metrics.incr("db.rows_fetched", len(ids))
+        self._put(self._ids, key, now, ids)
+        return ids
+
+    def population(self, db: Any, category: Optional[str] = None) -> QuotePopulation:
+        """Returns the ids and weights of `category` in id order, loading them on a miss.
+
+        The alias table for weighted draws is built on first use and kept
+        with the population until it expires.
+        """
+        key = _cache_key(db, category)
+        now = time.monotonic()
+        population = self._get(self._populations, key, now)
+        if population is not None:
+            return population
+
+        query: Any = select(Quote.id, Quote.weight).order_by(Quote.id)
+        if key[1] is not None:
+            query = query.where(category_filter(db, key[1]))
+        ids, weights = array("q"), array("d")
+        with metrics.timer("selection.load"):
+            for quote_id, weight in db.execute(query):
+                ids.append(quote_id)
+                weights.append(1.0 if weight is None else weight)
+        metrics.incr("db.rows_fetched", len(ids))
+        population = QuotePopulation(ids, weights)
+        self._put(self._populations, key, now, population)
+        return population
+
+    def invalidate(self, category: Optional[str] = None) -> None:
+        """Drops cached ids and populations for `category` (and all quotes), or everything.
+
+        Entries of every database are dropped, since writers do not say which
+        database they wrote to.
+        """
+        with self._lock:
+            for entries in (self._ids, self._populations):
+                if category is None:
+                    entries.clear()
+                else:
+                    stale = (category.lower(), None)
+                    for key in [key for key in entries if key[1] in stale]:
+                        del entries[key]
+
+    def stats(self) -> dict[str, int]:
+        """Returns hit, miss and eviction counters and the cached sizes."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "categories": len(self._ids),
+                "ids": sum(len(ids) for _, ids in self._ids.values()),
+                "populations": len(self._populations),
+            }
@@ -1,22 +1,64 @@
 import os
-from typing import Optional
+import sys
+from typing import TYPE_CHECKING, Iterable, Optional, Sequence, TextIO
 
 import click
 
-from .database import get_db_conn, init_db
 from .logger_config import error_logger, info_logger
-from .quote_manager import (
-    add_quote,
-    generate_random_quote,
-    list_quotes,
-    load_quotes_from_json,
-    load_quotes_to_db,
-)
+from .metrics import PROFILE_ENV, PROFILE_FORMATS, metrics
+from .shuffle import SHUFFLE_STATE_ENV, SHUFFLE_STATE_FILE
+from .snapshot import SNAPSHOT_ENV, SNAPSHOT_FILE
+from .startup import STARTUP_PROFILE_ENV, ImportProfiler
+
+if TYPE_CHECKING:
+    from .database import QuoteRow
+    from .dedupe import Deduper
+    from .snapshot import QuoteSnapshot, SnapshotQuote
+    from .storage import QuoteStore
+
+# Commands import the database layer themselves, so `quote --help` and
+# argument errors never pay for SQLAlchemy and DuckDB.
+_startup_profiler = ImportProfiler().install() if os.getenv(STARTUP_PROFILE_ENV) else None
 
 
 @click.group()
-def cli() -> None:
-    pass
+@click.option(
+    "--startup-profile",
+    is_flag=True,
+    envvar=STARTUP_PROFILE_ENV,
+    help="Print an import-time breakdown to stderr when the command finishes.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    envvar=PROFILE_ENV,
+    help="Print a per-phase timing breakdown to stderr when the command finishes.",
+)
+@click.option(
+    "--profile-format",
+    type=click.Choice(PROFILE_FORMATS),
+    default="text",
+    help="Format of the --profile output.",
+)
+@click.pass_context
+def cli(
+    ctx: click.Context,
+    startup_profile: bool = False,
+    profile: bool = False,
+    profile_format: str = "text",
+) -> None:
+    if startup_profile:
+        profiler = _startup_profiler or ImportProfiler().install()
+        ctx.call_on_close(lambda: profiler.report(sys.stderr))
+    if profile:
+        metrics.enable()
+        metrics.start("command")
+
+        def report() -> None:
+            metrics.stop("command")
+            click.echo(metrics.render(profile_format), err=True)
+
+        ctx.call_on_close(report)
 
 
 @cli.command()
@@ -24,10 +66,85 @@ def cli() -> None:
     "-f",
     "--file",
     default="category.json",
-    help="Path to the JSON file containing quotes.",
+    help="JSON or JSON Lines file with quotes, or a directory or glob of them.",
+)
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["auto", "json", "jsonl", "parquet"]),
+    default="auto",
+    help="Input format. 'auto' picks JSON Lines for .jsonl/.ndjson files and "
+    "Parquet for .parquet files.",
+)
+@click.option(
+    "--mode",
+    type=click.Choice(["append", "upsert", "replace"]),
+    default="replace",
+    help="append: add new quotes. upsert: also drop quotes missing from the "
+    "imported categories. replace: make the database match the file.",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    help="Processes used to parse shard files. Defaults to the number of CPUs.",
+)
+@click.option(
+    "--dedupe",
+    type=click.Choice(["exact", "near"]),
+    help="exact: merge quotes with the same text up to case, punctuation and emoji. "
+    "near: also merge near-duplicates found by MinHash.",
+)
+@click.option(
+    "--near-threshold",
+    default=0.8,
+    type=click.FloatRange(min=0, max=1, min_open=True),
+    help="Shingle similarity at which --dedupe near merges two quotes.",
+)
+@click.option("--dedupe-report", help="Write every merged quote to this JSON Lines file.")
+@click.option(
+    "--publish",
+    help="After importing, copy the database here for readers (see DATABASE_READ_PATH).",
 )
-def init(file: str) -> None:
+def init(
+    file: str,
+    file_format: str = "auto",
+    mode: str = "replace",
+    workers: Optional[int] = None,
+    dedupe: Optional[str] = None,
+    near_threshold: float = 0.8,
+    dedupe_report: Optional[str] = None,
+    publish: Optional[str] = None,
+) -> None:
     """Initialize the database with quotes from a JSON file."""
+    from itertools import chain
+
+    from .dedupe import Deduper
+    from .json_stream import iter_quote_file
+    from .shard_import import expand_shards, is_shard_pattern
+    from .storage import SQLStore
+
+    deduper = None
+    if dedupe or dedupe_report:
+        deduper = Deduper(dedupe == "near", near_threshold, dedupe_report)
+
+    store = _open_store()
+    if store is None:
+        return
+    if not isinstance(store, SQLStore) and (deduper or publish or is_shard_pattern(file)):
+        click.echo("Error: dedupe, --publish and shard imports need a database file.")
+        return
+
+    if is_shard_pattern(file):
+        shards = expand_shards(file)
+        if not shards:
+            click.echo(f"Error: no quote files found in {file}.")
+            error_logger.error(f"Error: no quote files found in {file}")
+            return
+        if _init_from_shards(shards, file_format, mode, workers, deduper) and publish:
+            _publish(publish)
+        return
+
     if not os.path.exists(file):
         click.echo(
             f"Error: {file} does not exist.\
@@ -37,49 +154,302 @@ def init(file: str) -> None:
         return
 
     try:
-        data = load_quotes_from_json(file)
-        if not data:
+        records = iter_quote_file(file, file_format)
+        try:
+            first_record = next(records)
+        except (StopIteration, ValueError, UnicodeDecodeError) as e:
+            error_logger.error(f"Error reading JSON file {file}: {e}", exc_info=True)
             click.echo(f"Error: {file} is empty or is not a valid JSON file.")
             return
 
         click.echo(f"Initializing database with quotes from {file}...")
-        init_conn = init_db()
-        count = load_quotes_to_db(init_conn, data)
+        records = chain([first_record], records)
+        count = store.load_quotes(records, mode=mode, dedupe=deduper)
         click.echo(f"{count} quotes added")
+        _echo_dedupe(deduper)
+        if publish:
+            _publish(publish)
     except Exception as e:
         error_logger.error(f"Error initializing database: {e}", exc_info=True)
         click.echo("Error: Database initialization failed")
 
 
+def _open_store() -> Optional["QuoteStore"]:
+    """Opens the store DATABASE_URL selects, reporting an unusable URL."""
+    from .storage import open_store
+
+    try:
+        return open_store()
+    except ValueError as e:
+        click.echo(f"Error: {e}")
+        return None
+
+
+def _uses_database(command: str) -> bool:
+    """Reports whether DATABASE_URL selects a database file, which `command` needs.
+
+    Only list, generate, add and init work through `QuoteStore`; the other
+    commands query the database directly.
+    """
+    from .storage import SQLStore
+
+    store = _open_store()
+    if store is None:
+        return False
+    if not isinstance(store, SQLStore):
+        click.echo(
+            f"Error: {command} needs a DuckDB or SQLite database file, "
+            "but DATABASE_URL selects the memory store."
+        )
+        return False
+    return True
+
+
+def _open_snapshot(path: str) -> Optional["QuoteSnapshot"]:
+    """Maps the snapshot at `path`, reporting a missing or invalid file."""
+    from .snapshot import QuoteSnapshot
+
+    try:
+        return QuoteSnapshot(path)
+    except (OSError, ValueError) as e:
+        error_logger.error(f"Error opening snapshot {path}: {e}")
+        click.echo(f"Error: cannot read snapshot {path}. Run `quote snapshot build`.")
+        return None
+
+
+def _shuffled_quotes(
+    store: "QuoteStore | QuoteSnapshot",
+    category: Optional[str],
+    count: int,
+    session: str,
+    seed: Optional[int],
+) -> Sequence["QuoteRow | SnapshotQuote"]:
+    """Continues the session's shuffle bag, kept in the QUOTE_SHUFFLE_STATE file."""
+    from .shuffle import ShuffleState
+
+    state = ShuffleState(os.getenv(SHUFFLE_STATE_ENV, SHUFFLE_STATE_FILE))
+    positions = state.draw(session, category, store.count_quotes(category), count, seed)
+    quotes = [quote for position in positions for quote in store.list_quotes(category, 1, position)]
+    state.save()
+    return quotes
+
+
+_snapshot_option = click.option(
+    "--snapshot",
+    envvar=SNAPSHOT_ENV,
+    help="Read quotes from this snapshot file instead of the database.",
+)
+
+
+def _echo_dedupe(deduper: Optional["Deduper"]) -> None:
+    """Prints how many duplicates an import merged, with a few examples."""
+    if deduper is None:
+        return
+    click.echo(f"Merged {deduper.exact_merged} exact and {deduper.near_merged} near duplicates")
+    for merge in deduper.examples:
+        click.echo(f"  {merge.kind}: {merge.merged[0]!r} -> {merge.kept[0]!r}")
+    if deduper.report_path:
+        click.echo(f"Merge report written to {deduper.report_path}")
+
+
+def _init_from_shards(
+    shards: Sequence[str],
+    file_format: str,
+    mode: str,
+    workers: Optional[int],
+    deduper: Optional["Deduper"] = None,
+) -> bool:
+    """Imports shard files in parallel, reporting progress per shard.
+
+    Returns whether the import ran.
+    """
+    from .database import init_db
+    from .shard_import import ShardResult, import_shards
+
+    def progress(done: int, total: int, shard: ShardResult) -> None:
+        if shard.error is not None:
+            click.echo(f"[{done}/{total}] {shard.path}: skipped ({shard.error})")
+        else:
+            click.echo(f"[{done}/{total}] {shard.path}: {len(shard.rows)} quotes")
+
+    click.echo(f"Initializing database with quotes from {len(shards)} files...")
+    try:
+        result = import_shards(
+            init_db(), shards, mode, workers, file_format, progress=progress, dedupe=deduper
+        )
+        imported = result.shards - len(result.failed)
+        click.echo(f"{result.added} quotes added from {imported} of {result.shards} files")
+        _echo_dedupe(deduper)
+        if result.failed:
+            click.echo(f"Skipped {len(result.failed)} of {result.shards} files; see the error log.")
+            if mode != "append":
+                click.echo(f"Existing quotes were kept instead of running a {mode} merge.")
+        return True
+    except Exception as e:
+        error_logger.error(f"Error initializing database: {e}", exc_info=True)
+        click.echo("Error: Database initialization failed")
+        return False
+
+
+def _publish(dest: str) -> None:
+    """Publishes the database to `dest` for read-only commands."""
+    from .database import publish_database
+
+    try:
+        publish_database(dest)
+        click.echo(f"Published database to {dest}")
+    except Exception as e:
+        error_logger.error(f"Error publishing database: {e}", exc_info=True)
+        click.echo(f"Error: could not publish the database to {dest}")
+
+
+@cli.command()
+def migrate() -> None:
+    """Upgrade an existing database to the current schema in place."""
+    from .database import DATABASE_FILE, migrate_database
+
+    if not _uses_database("migrate"):
+        return
+    if not os.path.exists(DATABASE_FILE):
+        click.echo("Error: Database file does not exist. Run `quote init`.")
+        return
+    try:
+        result = migrate_database()
+        click.echo(
+            f"Keyed {result.keyed} quotes to {result.categories} categories "
+            f"and {result.authors} authors"
+        )
+    except Exception as e:
+        error_logger.error(f"Error migrating database: {e}", exc_info=True)
+        click.echo("Error: Database migration failed")
+
+
 @cli.command()
 @click.option("--category", help="Category of the quote.")
 @click.option("--text", help="Text of the quote.")
 @click.option("--author", help="Author of the quote.")
-def add(category: str, text: str, author: Optional[str] = None) -> None:
+@click.option(
+    "--from",
+    "source",
+    type=click.File("r", encoding="utf-8"),
+    help="Add every quote in a JSON Lines file, or '-' for stdin.",
+)
+@click.option(
+    "--batch-size",
+    default=1000,
+    type=click.IntRange(min=1),
+    help="Quotes committed per transaction with --from.",
+)
+def add(
+    category: str,
+    text: str,
+    author: Optional[str] = None,
+    source: Optional[TextIO] = None,
+    batch_size: int = 1000,
+) -> None:
     """Add a new quote to the database."""
+    store = _open_store()
+    if store is None:
+        return
+    if source is not None:
+        _add_from(store, source, batch_size)
+        return
+
+    from .quote_manager import QUOTE_ADDED, QUOTE_DUPLICATE
+
     click.echo(f"Adding new quote: {text} - {category}")
     try:
-        add_quote(get_db_conn(), category, text, author)
-        click.echo("Quote added successfully.")
+        status = store.add_quote(category, text, author)
+    except FileNotFoundError as e:
+        click.echo(f"Error: {e}")
+        sys.exit(1)
     except Exception as e:
         error_logger.error(f"Error adding quote: {e}", exc_info=True)
+        status = None
+    if status == QUOTE_ADDED:
+        click.echo("Quote added successfully.")
+    elif status == QUOTE_DUPLICATE:
+        click.echo("Quote is already stored; nothing added.")
+        sys.exit(2)
+    else:
         click.echo("Error adding quote.")
+        sys.exit(1)
+
+
+def _add_from(store: "QuoteStore", source: TextIO, batch_size: int, max_errors: int = 20) -> None:
+    """Adds the quotes of a JSON Lines stream and reports rejected lines."""
+    click.echo(f"Adding quotes from {source.name}...")
+    try:
+        result = store.add_quotes(source, batch_size)
+    except FileNotFoundError as e:
+        click.echo(f"Error: {e}")
+        return
+    except Exception as e:
+        error_logger.error(f"Error adding quotes: {e}", exc_info=True)
+        click.echo("Error adding quotes.")
+        return
+
+    for line, message in result.errors[:max_errors]:
+        click.echo(f"Line {line}: {message}")
+    if len(result.errors) > max_errors:
+        click.echo(f"... and {len(result.errors) - max_errors} more rejected lines")
+    click.echo(
+        f"{result.added} quotes added, {len(result.errors)} rejected "
+        f"in {result.elapsed:.2f}s ({result.rate:.0f} quotes/sec)"
+    )
 
 
 @cli.command()
 @click.option("-c", "--category", help="Category of the quotes.")
-def list(category: Optional[str] = None) -> None:
+@click.option(
+    "-l",
+    "--limit",
+    default=5,
+    type=click.IntRange(min=1),
+    help="Number of quotes to show per page.",
+)
+@click.option("-p", "--page", type=click.IntRange(min=1), help="Page number to show.")
+@click.option("--after-id", type=int, help="Show quotes after this quote id.")
+@click.option("--all", "show_all", is_flag=True, help="Stream every matching quote.")
+@_snapshot_option
+def list(
+    category: Optional[str] = None,
+    limit: int = 5,
+    page: Optional[int] = None,
+    after_id: Optional[int] = None,
+    show_all: bool = False,
+    snapshot: Optional[str] = None,
+) -> None:
     """List quotes from the database."""
+    store = _open_snapshot(snapshot) if snapshot else _open_store()
+    if store is None:
+        return
     click.echo(f"Listing quotes for category: {category}")
     try:
-        quotes = list_quotes(get_db_conn(), category)
-        if len(quotes) == 0:
+        quotes: Iterable["QuoteRow | SnapshotQuote"]
+        if show_all:
+            quotes = store.iter_quotes(category, after_id)
+            start = 0
+        else:
+            start = (page - 1) * limit if page else 0
+            quotes = store.list_quotes(category, limit, start, after_id)
+
+        listed = 0
+        last_id = None
+        for quote in quotes:
+            listed += 1
+            click.echo(f"{start + listed}. {quote.text} - {quote.author}")
+            last_id = quote.id
+
+        if listed == 0:
             click.echo(f"No quotes found in {category}")
             info_logger.info(f"No quotes found in {category}")
             return
-        for i, quote in enumerate(quotes[:5]):
-            click.echo(f"{i+1}. {quote.text} - {quote.author}")
-        info_logger.info(f"Listed 5 quotes in {category}")
+        if not show_all and listed == limit:
+            click.echo(f"More quotes may follow: use --after-id {last_id}")
+        info_logger.info(f"Listed {listed} quotes in {category}")
+    except FileNotFoundError as e:
+        click.echo(f"Error: {e}")
     except Exception as e:
         error_logger.error(f"Error listing quotes: {e}", exc_info=True)
         click.echo("Error listing quotes.")
@@ -87,21 +457,210 @@ def list(category: Optional[str] = None) -> None:
 
 @cli.command()
 @click.option("-c", "--category", help="Category of the quote.")
-def generate(category: Optional[str] = None) -> None:
+@click.option(
+    "-n",
+    "--count",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of distinct random quotes to generate.",
+)
+@click.option("--weighted", is_flag=True, help="Pick quotes in proportion to their weight.")
+@click.option(
+    "--shuffle",
+    is_flag=True,
+    help="Pick every quote once before repeating any, continuing --session across runs.",
+)
+@click.option("--session", default="default", help="Shuffle session to continue.")
+@click.option("--seed", type=int, help="Seed for a reproducible pick.")
+@_snapshot_option
+def generate(
+    category: Optional[str] = None,
+    count: int = 1,
+    weighted: bool = False,
+    shuffle: bool = False,
+    session: str = "default",
+    seed: Optional[int] = None,
+    snapshot: Optional[str] = None,
+) -> None:
     """Generate a random quote from the database."""
+    if weighted and shuffle:
+        click.echo("Error: --weighted and --shuffle cannot be combined.")
+        return
+    store = _open_snapshot(snapshot) if snapshot else _open_store()
+    if store is None:
+        return
     click.echo(f"Generating quote for category: {category}")
     try:
-        quote = generate_random_quote(get_db_conn(), category)
-        if quote:
-            click.echo(f"Quote: {quote.text} - {quote.author}")
-            info_logger.info(f"Generated quote: {quote.text} - {quote.author}")
+        if shuffle:
+            quotes = _shuffled_quotes(store, category, count, session, seed)
+        else:
+            mode = "weighted" if weighted else "uniform"
+            quotes = store.generate_quotes(category, count, mode, seed=seed)
+        if quotes:
+            for quote in quotes:
+                click.echo(f"Quote: {quote.text} - {quote.author}")
+                info_logger.info(f"Generated quote: {quote.text} - {quote.author}")
         else:
             click.echo("No quotes found.")
             info_logger.info("No quotes found.")
+    except FileNotFoundError as e:
+        click.echo(f"Error: {e}")
     except Exception as e:
         error_logger.error(f"Error generating quote: {e}", exc_info=True)
         click.echo("Error generating quote.")
 
 
+@cli.command()
+@click.argument("terms", nargs=-1, required=True)
+@click.option("-a", "--author", help="Only show quotes by this author.")
+@click.option("-c", "--category", help="Only show quotes in this category.")
+@click.option(
+    "-l",
+    "--limit",
+    default=10,
+    type=click.IntRange(min=1),
+    help="Number of results to show per page.",
+)
+@click.option("-p", "--page", default=1, type=click.IntRange(min=1), help="Page number to show.")
+def search(
+    terms: tuple[str, ...],
+    author: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = 10,
+    page: int = 1,
+) -> None:
+    """Search quotes by keywords, best matches first."""
+    from .database import get_read_conn
+    from .search import search_quotes
+
+    if not _uses_database("search"):
+        return
+    query = " ".join(terms)
+    click.echo(f"Searching quotes for: {query}")
+    try:
+        start = (page - 1) * limit
+        results = search_quotes(get_read_conn(), query, author, category, limit, start)
+        if not results:
+            click.echo("No matching quotes found.")
+            return
+        for i, (quote, score) in enumerate(results, start=start + 1):
+            click.echo(f"{i}. {quote.text} - {quote.author} ({score:.2f})")
+        info_logger.info(f"Found {len(results)} quotes for: {query}")
+    except Exception as e:
+        error_logger.error(f"Error searching quotes: {e}", exc_info=True)
+        click.echo("Error searching quotes.")
+
+
+@cli.command()
+@click.option("-c", "--category", help="Only show this category.")
+@click.option(
+    "--top-authors",
+    default=0,
+    type=click.IntRange(min=0),
+    help="Also show the N authors with the most quotes.",
+)
+def stats(category: Optional[str] = None, top_authors: int = 0) -> None:
+    """Show how many quotes each category holds."""
+    from .database import get_read_conn
+    from .stats import quote_stats
+
+    if not _uses_database("stats"):
+        return
+    try:
+        result = quote_stats(get_read_conn(), category, top_authors)
+        if not result.categories:
+            click.echo(f"No quotes found in {category}" if category else "No quotes found.")
+            return
+        click.echo(f"{'Category':<24} {'Quotes':>8} {'Authors':>8}  Last added")
+        for stat in result.categories:
+            last = f"{stat.last_created_at:%Y-%m-%d %H:%M}" if stat.last_created_at else "-"
+            click.echo(f"{stat.category:<24} {stat.quotes:>8} {stat.authors:>8}  {last}")
+        click.echo(f"Total: {result.total} quotes in {len(result.categories)} categories")
+        if result.top_authors:
+            click.echo(f"Top {len(result.top_authors)} authors:")
+            for i, author in enumerate(result.top_authors, start=1):
+                click.echo(f"{i}. {author.author} ({author.quotes})")
+    except Exception as e:
+        error_logger.error(f"Error reading stats: {e}", exc_info=True)
+        click.echo("Error reading stats.")
+
+
+@cli.command()
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["parquet", "arrow", "csv", "jsonl"]),
+    default="parquet",
+    help="Output format.",
+)
+@click.option("-c", "--category", help="Only export quotes in this category.")
+@click.option("-o", "--out", help="Output file. Defaults to quotes.<format>.")
+def export(
+    file_format: str = "parquet", category: Optional[str] = None, out: Optional[str] = None
+) -> None:
+    """Export quotes to a Parquet, Arrow, CSV or JSON Lines file."""
+    from .database import get_read_conn
+    from .export import export_quotes
+
+    if not _uses_database("export"):
+        return
+    out = out or f"quotes.{file_format}"
+    click.echo(f"Exporting quotes for category: {category}")
+    try:
+        count = export_quotes(get_read_conn(), out, file_format, category)
+        click.echo(f"Exported {count} quotes to {out}")
+    except RuntimeError as e:
+        click.echo(f"Error: {e}")
+    except Exception as e:
+        error_logger.error(f"Error exporting quotes: {e}", exc_info=True)
+        click.echo("Error exporting quotes.")
+
+
+@cli.group()
+def snapshot() -> None:
+    """Build snapshot files that list and generate can read without the database."""
+
+
+@snapshot.command("build")
+@click.option("-o", "--out", default=SNAPSHOT_FILE, help="Snapshot file to write.")
+def build_snapshot(out: str = SNAPSHOT_FILE) -> None:
+    """Write every quote in the database to a snapshot file."""
+    from .database import get_read_conn
+    from .snapshot import build_snapshot as build
+
+    if not _uses_database("snapshot build"):
+        return
+    click.echo(f"Building snapshot {out}...")
+    try:
+        info = build(get_read_conn(), out)
+        click.echo(
+            f"Wrote {info.quotes} quotes in {info.categories} categories "
+            f"to {out} ({info.bytes} bytes)"
+        )
+    except Exception as e:
+        error_logger.error(f"Error building snapshot: {e}", exc_info=True)
+        click.echo("Error building snapshot.")
+
+
+@cli.command()
+@click.option("--host", default="127.0.0.1", help="Address to listen on.")
+@click.option("--port", default=8765, type=int, help="Port to listen on.")
+@click.option("--socket", "socket_path", help="Listen on this Unix socket instead of TCP.")
+def serve(host: str, port: int, socket_path: Optional[str] = None) -> None:
+    """Serve generate, list and add as a local JSON/HTTP API."""
+    import asyncio
+
+    from .server import serve as run_server
+
+    if not _uses_database("serve"):
+        return
+    where = socket_path or f"http://{host}:{port}"
+    click.echo(f"Serving quotes on {where} (Ctrl+C to stop)")
+    try:
+        asyncio.run(run_server(host, port, socket_path))
+    except KeyboardInterrupt:
+        click.echo("Server stopped.")
+
+
 if __name__ == "__main__":
     cli()
@@ -1,86 +1,803 @@
+import hashlib
+import json
+import math
 import os
+import shutil
+import sqlite3
 import sys
+import tempfile
+import threading
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Any, Type
+from typing import Any, Iterator, NamedTuple, Optional, Type
 
 from dotenv import load_dotenv
-from sqlalchemy import Column, DateTime, Integer, Sequence, String, create_engine, inspect
-from sqlalchemy.engine import Engine
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    ForeignKeyConstraint,
+    Index,
+    Integer,
+    MetaData,
+    Sequence,
+    String,
+    Table,
+    column,
+    create_engine,
+    event,
+    exists,
+    false,
+    func,
+    insert,
+    inspect,
+    literal,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.engine import URL, Engine, make_url
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 
 from .logger_config import error_logger, info_logger
+from .metrics import metrics
 
 load_dotenv()
 
 # Fetch database path from environment variable, with a default fallback
 DATABASE_FILE = os.getenv("DATABASE_PATH", "default.db")
-DATABASE_URL = f"duckdb:///{DATABASE_FILE}"
+# DATABASE_URL selects the storage backend instead (see storage.py), e.g.
+# sqlite:///quotes.db or memory://; its file then takes precedence.
+DATABASE_URL = os.getenv("DATABASE_URL") or f"duckdb:///{DATABASE_FILE}"
+_database_url = make_url(DATABASE_URL)
+if _database_url.get_backend_name() in ("duckdb", "sqlite"):
+    DATABASE_FILE = _database_url.database or DATABASE_FILE
+# Read commands may use a published copy so they never wait on an import.
+DATABASE_READ_FILE = os.getenv("DATABASE_READ_PATH", DATABASE_FILE)
+DATABASE_READ_URL = DATABASE_URL
+if _database_url.get_backend_name() in ("duckdb", "sqlite"):
+    DATABASE_READ_URL = _database_url.set(database=DATABASE_READ_FILE).render_as_string(
+        hide_password=False
+    )
 
 Base: Type[Any] = declarative_base()
 
 
+def quote_content_hash(text: Any, author: Any, category: Any) -> str:
+    """Returns the hash that identifies a quote by its text, author and category."""
+    content = "\x1f".join("" if value is None else str(value) for value in (text, author, category))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _default_content_hash(context: Any) -> str:
+    params = context.get_current_parameters()
+    return quote_content_hash(params.get("text"), params.get("author"), params.get("category"))
+
+
+_DEFAULT_WEIGHT = text("1.0")
+
+
+def _not_duckdb(
+    ddl: Any,
+    target: Any,
+    bind: Any,
+    tables: Any = None,
+    state: Any = None,
+    *,
+    dialect: Any,
+    **kwargs: Any,
+) -> bool:
+    """DDL condition for indexes that would only slow DuckDB's column scans down."""
+    return dialect.name != "duckdb"
+
+
 class Quote(Base):
     __tablename__ = "quotes"
+    # Never reuse ids of deleted quotes; the search index and cursors key on them.
+    # DuckDB backs foreign keys with an index, so the key columns only get
+    # their constraints and index elsewhere.
+    __table_args__ = (
+        ForeignKeyConstraint(["category_id"], ["categories.id"]).ddl_if(callable_=_not_duckdb),
+        ForeignKeyConstraint(["author_id"], ["authors.id"]).ddl_if(callable_=_not_duckdb),
+        Index("ix_quotes_category_id", "category_id").ddl_if(callable_=_not_duckdb),
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, Sequence("id"), primary_key=True)
     text = Column(String, index=True)
     author = Column(String(100))
     category = Column(String(100))
+    content_hash = Column(String(64), unique=True, default=_default_content_hash)
     created_at = Column(DateTime, default=datetime.now)
+    # Relative chance of being picked by weighted draws.
+    weight = Column(Float, default=1.0, server_default=_DEFAULT_WEIGHT)
+    # Dictionary keys of `category` and `author`; filters compare these instead.
+    # They add to the strings rather than replace them: content hashes, stats,
+    # dedupe and every read path use the strings, so only filters are faster.
+    category_id = Column(Integer)
+    author_id = Column(Integer)
+
+
+class Category(Base):
+    """A category name, lower-cased, that quotes refer to by `category_id`."""
+
+    __tablename__ = "categories"
+
+    id = Column(Integer, Sequence("category_id"), primary_key=True)
+    name = Column(String(100), nullable=False, unique=True)
+
+
+class Author(Base):
+    """An author that quotes refer to by `author_id`.
+
+    Spellings that differ only in case share one entry: `name_key` is the
+    lower-cased name and `name` one of the spellings as stored.
+    """
+
+    __tablename__ = "authors"
+
+    id = Column(Integer, Sequence("author_id"), primary_key=True)
+    name = Column(String(100), nullable=False)
+    name_key = Column(String(100), nullable=False, unique=True)
+
+
+class QuoteRow(NamedTuple):
+    """A read-only quote as returned by the read paths.
+
+    Plain tuples skip the ORM's identity map and attribute instrumentation,
+    which otherwise dominate the cost of reading many quotes.
+    """
+
+    id: int
+    text: Optional[str]
+    author: Optional[str]
+    category: Optional[str]
+    created_at: Optional[datetime] = None
+
+
+QUOTE_ROW_COLUMNS = (Quote.id, Quote.text, Quote.author, Quote.category, Quote.created_at)
+
+
+class SearchDoc(Base):
+    """A quote that is part of the full-text index, with its length in terms."""
+
+    __tablename__ = "search_docs"
+
+    quote_id = Column(Integer, primary_key=True, autoincrement=False)
+    length = Column(Integer)
+
+
+class SearchTerm(Base):
+    """An inverted index posting: how often `term` occurs in a quote."""
+
+    __tablename__ = "search_terms"
+
+    term = Column(String(100), primary_key=True)
+    quote_id = Column(Integer, primary_key=True, autoincrement=False)
+    tf = Column(Integer)
+
+
+class QuoteStat(Base):
+    """Precomputed quote count and newest quote per category and author.
+
+    Kept up to date by the write paths, so statistics never scan `quotes`.
+    Quotes without an author are counted under "Unknown".
+    """
+
+    __tablename__ = "quote_stats"
+
+    category = Column(String(100), primary_key=True)
+    author = Column(String(100), primary_key=True)
+    quotes = Column(Integer, nullable=False)
+    last_created_at = Column(DateTime)
+
+
+# Stats of single adds, appended rather than added to the shared `quote_stats`
+# row: on DuckDB concurrent updates of one row conflict, and appends never
+# do. Reads add them in, and imports fold them into `quote_stats`.
+pending_quote_stats = Table(
+    "quote_stats_pending",
+    Base.metadata,
+    Column("category", String(100)),
+    Column("author", String(100)),
+    Column("quotes", Integer, nullable=False),
+    Column("last_created_at", DateTime),
+)
+
+
+# Statement, commit and hydration metrics. The listeners only do work once
+# `metrics.enable()` has been called.
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(*args: Any) -> None:
+    metrics.incr("db.statements")
+    metrics.start("db.execute")
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_statement(*args: Any) -> None:
+    metrics.stop("db.execute")
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_statement(*args: Any) -> None:
+    metrics.discard("db.execute")
+
+
+@event.listens_for(Session, "before_commit")
+def _start_commit(session: Session) -> None:
+    metrics.start("session.commit")
+
+
+@event.listens_for(Session, "after_commit")
+def _stop_commit(session: Session) -> None:
+    metrics.stop("session.commit")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_commit(session: Session) -> None:
+    metrics.discard("session.commit")
+
+
+@event.listens_for(Quote, "load")
+def _count_loaded_quote(*args: Any) -> None:
+    metrics.incr("orm.quotes_loaded")
+
+
+# Imports are staged here before being merged into `quotes` in one transaction.
+quote_staging = Table(
+    "quotes_staging",
+    MetaData(),
+    Column("text", String),
+    Column("author", String(100)),
+    Column("category", String(100)),
+    Column("content_hash", String(64)),
+    Column("text_hash", String(64)),
+    Column("created_at", DateTime),
+    Column("weight", Float),
+    Column("position", Integer),
+    prefixes=["TEMPORARY"],
+)
+
+
+# Content hashes computed for stored quotes, applied to `quotes` in one update.
+quote_hashes = Table(
+    "quotes_hashes",
+    MetaData(),
+    Column("id", Integer),
+    Column("content_hash", String(64)),
+    prefixes=["TEMPORARY"],
+)
+
+
+# Whether each engine's quotes table has the key columns. Databases created
+# before them keep matching on strings until `quote migrate` adds them.
+_keyed_engines: "weakref.WeakKeyDictionary[Any, bool]" = weakref.WeakKeyDictionary()
+
+
+def has_quote_keys(db: Session) -> bool:
+    """Returns whether the quotes table has the category and author key columns."""
+    bind = db.get_bind()
+    keyed = _keyed_engines.get(bind)
+    if keyed is None:
+        columns = db.execute(text("SELECT * FROM quotes LIMIT 0")).keys()
+        keyed = _keyed_engines[bind] = "category_id" in columns
+    return keyed
+
+
+# Whether each engine's database has the pending stats table. Databases
+# created before it update `quote_stats` directly until `quote init` adds it.
+_pending_stats_engines: "weakref.WeakKeyDictionary[Any, bool]" = weakref.WeakKeyDictionary()
+
+
+def has_pending_stats(db: Session) -> bool:
+    """Returns whether the database has the pending stats table."""
+    bind = db.get_bind()
+    pending = _pending_stats_engines.get(bind)
+    if pending is None:
+        pending = _pending_stats_engines[bind] = inspect(db.connection()).has_table(
+            pending_quote_stats.name
+        )
+    return pending
+
+
+def category_filter(db: Session, category: str) -> Any:
+    """Returns the condition matching the quotes of `category`, in any case.
+
+    With key columns the category's id is looked up in `categories` first
+    and quotes are matched on that integer, instead of comparing the category
+    string of every row. The id is bound as a constant rather than a
+    subquery, so DuckDB can push the filter down into the scan.
+    """
+    if has_quote_keys(db):
+        category_id = db.scalar(select(Category.id).where(Category.name == func.lower(category)))
+        return Quote.category_id == category_id if category_id is not None else false()
+    return Quote.category == category.lower()
+
+
+def add_quote_keys(db: Session, source: Any) -> None:
+    """Adds the categories and authors of `source` that have no key yet.
+
+    `source` is a subquery with `category` and `author` columns. Keys are
+    added set-based in the caller's transaction, so imports never look them
+    up row by row.
+    """
+    name = func.lower(source.c.category)
+    new_categories = (
+        select(name)
+        .where(source.c.category.is_not(None), ~exists().where(Category.name == name))
+        .group_by(name)
+    )
+    db.execute(insert(Category).from_select(["name"], new_categories))
+    name_key = func.lower(source.c.author)
+    new_authors = (
+        select(func.min(source.c.author), name_key)
+        .where(source.c.author.is_not(None), ~exists().where(Author.name_key == name_key))
+        .group_by(name_key)
+    )
+    db.execute(insert(Author).from_select(["name", "name_key"], new_authors))
+
+
+def keyed_quotes(source: Any) -> Any:
+    """Selects the rows of `source` with the category_id and author_id they map to."""
+    return (
+        select(source, Category.id.label("category_id"), Author.id.label("author_id"))
+        .outerjoin(Category, Category.name == func.lower(source.c.category))
+        .outerjoin(Author, Author.name_key == func.lower(source.c.author))
+    )
+
+
+def backfill_quote_keys(db: Session) -> int:
+    """Keys the quotes stored without category and author ids; returns how many.
+
+    Runs in the caller's transaction.
+    """
+    quotes = Quote.__table__
+    missing = (quotes.c.category_id.is_(None) & quotes.c.category.is_not(None)) | (
+        quotes.c.author_id.is_(None) & quotes.c.author.is_not(None)
+    )
+    keyless = select(quotes.c.category, quotes.c.author).where(missing).subquery()
+    count = db.execute(select(func.count()).select_from(keyless)).scalar() or 0
+    if count:
+        add_quote_keys(db, keyless)
+        db.execute(
+            update(quotes)
+            .values(category_id=Category.id)
+            .where(quotes.c.category_id.is_(None), Category.name == func.lower(quotes.c.category))
+        )
+        db.execute(
+            update(quotes)
+            .values(author_id=Author.id)
+            .where(quotes.c.author_id.is_(None), Author.name_key == func.lower(quotes.c.author))
+        )
+    return count
+
 
+def backfill_content_hashes(db: Session) -> int:
+    """Hashes the quotes stored without a content hash; returns how many.
 
-def get_engine(url: str = DATABASE_URL) -> Engine:
-    """Creates and returns a new database engine."""
+    The hashes are the ones `quote_content_hash` gives new quotes, staged in
+    bulk and applied with one update in the caller's transaction. Stored
+    duplicates cannot share a hash under the unique index, so each copy
+    after the first has its id mixed into its hash instead of being deleted.
+    """
+    quotes = Quote.__table__
+    rows = db.execute(
+        select(quotes.c.id, quotes.c.text, quotes.c.author, quotes.c.category)
+        .where(quotes.c.content_hash.is_(None))
+        .order_by(quotes.c.id)
+    ).all()
+    if not rows:
+        return 0
+    hashed = select(quotes.c.content_hash).where(quotes.c.content_hash.is_not(None))
+    taken = set(db.execute(hashed).scalars())
+    hashes = []
+    for quote_id, quote_text, author, category in rows:
+        content_hash = quote_content_hash(quote_text, author, category)
+        if content_hash in taken:
+            content_hash = hashlib.sha256(f"{content_hash}\x1f{quote_id}".encode()).hexdigest()
+        taken.add(content_hash)
+        hashes.append({"id": quote_id, "content_hash": content_hash})
+    quote_hashes.create(db.connection())
     try:
+        bulk_insert(db, quote_hashes, hashes)
+        db.execute(
+            update(quotes)
+            .values(content_hash=quote_hashes.c.content_hash)
+            .where(quotes.c.id == quote_hashes.c.id)
+        )
+    finally:
+        quote_hashes.drop(db.connection())
+    return len(hashes)
+
+
+@event.listens_for(Session, "before_flush")
+def _key_new_quotes(session: Session, *args: Any) -> None:
+    """Gives quotes added through the ORM their category and author ids."""
+    quotes = [obj for obj in session.new if isinstance(obj, Quote) and obj.category_id is None]
+    if not quotes or not has_quote_keys(session):
+        return
+    keys: dict[tuple[Any, Any], tuple[Any, Any]] = {}
+    for quote in quotes:
+        pair = (quote.category, quote.author)
+        if pair not in keys:
+            source = select(
+                literal(quote.category, String).label("category"),
+                literal(quote.author, String).label("author"),
+            ).subquery()
+            add_quote_keys(session, source)
+            keyed = keyed_quotes(source).subquery()
+            keys[pair] = session.execute(select(keyed.c.category_id, keyed.c.author_id)).one()
+        quote.category_id, quote.author_id = keys[pair]
+
+
+# Engines and session factories are shared per database URL and access mode
+# for the whole process.
+_engines: dict[tuple[str, bool], Engine] = {}
+_session_factories: dict[Engine, sessionmaker] = {}
+_registry_lock = threading.RLock()
+# Signalled when a connection is returned or an engine is registered.
+_registry_changed = threading.Condition(_registry_lock)
+# URLs whose read-only engine is being replaced by a read-write one.
+_engines_opening: set[str] = set()
+ENGINE_SWAP_TIMEOUT = 30.0
+# Set once the read-write engine that replaces a retired read-only one is open.
+_retired_dialects: "weakref.WeakKeyDictionary[Any, threading.Event]" = weakref.WeakKeyDictionary()
+# DBAPI connections open per read-only DuckDB engine, by its dialect.
+_read_only_connections: "weakref.WeakKeyDictionary[Any, set[Any]]" = weakref.WeakKeyDictionary()
+_pool_stats = {
+    "engines_created": 0,
+    "engine_cache_hits": 0,
+    "connections_opened": 0,
+    "connection_checkouts": 0,
+    "sessions_created": 0,
+}
+
+
+def _count(stat: str) -> None:
+    _pool_stats[stat] += 1
+
+
+def _is_memory_url(url: URL) -> bool:
+    return url.database in (None, "", ":memory:")
+
+
+def _enable_query_only(dbapi_connection: Any, connection_record: Any) -> None:
+    dbapi_connection.execute("PRAGMA query_only = ON")
+
+
+def _enable_wal(dbapi_connection: Any, connection_record: Any) -> None:
+    # Readers then never block the writer, and commits skip a sync per transaction.
+    dbapi_connection.execute("PRAGMA journal_mode = WAL")
+    dbapi_connection.execute("PRAGMA synchronous = NORMAL")
+
+
+def _disable_progress_bar(dbapi_connection: Any, connection_record: Any) -> None:
+    # Long set-based statements would otherwise draw a progress bar on stderr.
+    dbapi_connection.execute("SET enable_progress_bar = false")
+
+
+def _add_math_functions(dbapi_connection: Any, connection_record: Any) -> None:
+    # Weighted draws use ln(), which SQLite only has when built with its math functions.
+    try:
+        dbapi_connection.execute("SELECT ln(1)")
+    except sqlite3.OperationalError:
+        dbapi_connection.create_function("ln", 1, math.log, deterministic=True)
+
+
+def _create_engine(url: URL, read_only: bool) -> Engine:
+    if not read_only:
         engine = create_engine(url)
+        if url.get_backend_name() == "sqlite":
+            event.listen(engine, "connect", _add_math_functions)
+            if not _is_memory_url(url):
+                event.listen(engine, "connect", _enable_wal)
+        if url.get_backend_name() == "duckdb":
+            event.listen(engine, "connect", _disable_progress_bar)
+        return engine
+    if url.get_backend_name() == "duckdb":
+        engine = create_engine(url, connect_args={"read_only": True})
+        event.listen(engine, "do_connect", _connect_read_only)
+        event.listen(engine, "close", _forget_read_only)
+        event.listen(engine, "close_detached", _forget_read_only)
+        event.listen(engine, "connect", _disable_progress_bar)
+        return engine
+    engine = create_engine(url)
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine, "connect", _add_math_functions)
+        event.listen(engine, "connect", _enable_query_only)
+    return engine
+
+
+def _notify_checkin(dbapi_connection: Any, connection_record: Any) -> None:
+    with _registry_changed:
+        _registry_changed.notify_all()
+
+
+def _connect_read_only(
+    dialect: Any, connection_record: Any, cargs: Any, cparams: dict[str, Any]
+) -> Any:
+    # Opened under the registry lock, so an engine swap sees every read-only connection.
+    with _registry_changed:
+        swapped = _retired_dialects.get(dialect)
+        if swapped is None:
+            connection = dialect.connect(*cargs, **cparams)
+            _read_only_connections.setdefault(dialect, set()).add(connection)
+            return connection
+    # Sessions made before a swap can still connect through the retired engine;
+    # once the writer is open they open the file the way it does, which DuckDB allows.
+    swapped.wait()
+    if dialect not in _retired_dialects:
+        # The swap was given up and the engine is read-only again.
+        return _connect_read_only(dialect, connection_record, cargs, cparams)
+    cparams["read_only"] = False
+    return None
+
+
+def _forget_read_only(dbapi_connection: Any, *args: Any) -> None:
+    with _registry_changed:
+        for connections in _read_only_connections.values():
+            connections.discard(dbapi_connection)
+        _registry_changed.notify_all()
+
+
+def _retire_read_only_engine(key: str, url: URL) -> threading.Event:
+    """Drops the read-only engine for `key` so a read-write one can be opened.
+
+    Only idle connections are closed. DuckDB cannot open the read-write
+    engine while read-only connections are open, so for DuckDB this waits,
+    up to ENGINE_SWAP_TIMEOUT seconds, for the sessions using them to give
+    them back, and puts the engine back if they are not. Connections the
+    retired engine opens meanwhile wait for the returned event, set once
+    the read-write engine is open, and are then read-write.
+    """
+    stale = _engines.pop((key, True))
+    _session_factories.pop(stale, None)
+    swapped = _retired_dialects[stale.dialect] = threading.Event()
+    pool = stale.pool
+    stale.dispose()
+    if url.get_backend_name() == "duckdb":
+
+        def all_closed() -> bool:
+            # Connections given back since the dispose above went back to the old pool.
+            pool.dispose()
+            return not _read_only_connections.get(stale.dialect)
+
+        if not _registry_changed.wait_for(all_closed, ENGINE_SWAP_TIMEOUT):
+            del _retired_dialects[stale.dialect]
+            _engines[(key, True)] = stale
+            swapped.set()
+            raise RuntimeError(f"Read-only connections to {url} are still in use")
+    return swapped
+
+
+def get_engine(url: str | URL = DATABASE_URL, read_only: bool = False) -> Engine:
+    """Returns the shared engine for `url`, creating it on first use.
+
+    In-memory databases are never shared, so each call gets a fresh database.
+    A `read_only` engine opens DuckDB files in read-only mode, which any
+    number of processes can do at once. DuckDB refuses to open one file with
+    both modes in a process, so once a read-write engine exists it serves
+    the reads too, and a read-write request retires the read-only engine
+    (see `_retire_read_only_engine`); reads that arrive meanwhile wait for
+    the read-write engine.
+    """
+    try:
+        parsed_url = make_url(url)
+        key = parsed_url.render_as_string(hide_password=False)
+        with _registry_changed:
+            _registry_changed.wait_for(lambda: key not in _engines_opening)
+            engine = _engines.get((key, False))
+            if engine is None and read_only:
+                engine = _engines.get((key, True))
+            if engine is not None:
+                _count("engine_cache_hits")
+                return engine
+            _engines_opening.add(key)
+            swapped = None
+            try:
+                if not read_only and (key, True) in _engines:
+                    swapped = _retire_read_only_engine(key, parsed_url)
+                with metrics.timer("engine.create"):
+                    engine = _create_engine(parsed_url, read_only)
+                event.listen(engine, "connect", lambda *args: _count("connections_opened"))
+                event.listen(engine, "checkout", lambda *args: _count("connection_checkouts"))
+                event.listen(engine, "checkin", _notify_checkin)
+                _count("engines_created")
+                if not _is_memory_url(parsed_url):
+                    _engines[(key, read_only)] = engine
+            finally:
+                _engines_opening.discard(key)
+                _registry_changed.notify_all()
+                if swapped is not None:
+                    swapped.set()
         return engine
     except Exception as e:
         error_logger.error(f"Error creating engine: {e}", exc_info=True)
         raise e
 
 
+def dispose_engines() -> None:
+    """Closes every pooled connection and empties the engine registry."""
+    with _registry_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _session_factories.clear()
+
+
+def engine_stats() -> dict[str, int]:
+    """Returns engine and connection reuse counters for this process."""
+    with _registry_lock:
+        return {**_pool_stats, "engines_cached": len(_engines)}
+
+
 def create_session(engine: Engine) -> Session:
     """Creates and returns a new database session."""
     try:
-        SessionLocal = sessionmaker(bind=engine)
+        with metrics.timer("session.open"):
+            with _registry_lock:
+                SessionLocal = _session_factories.get(engine)
+                if SessionLocal is None:
+                    SessionLocal = sessionmaker(bind=engine)
+                    if engine in _engines.values():
+                        _session_factories[engine] = SessionLocal
+                _count("sessions_created")
+            session = SessionLocal()
         info_logger.info(f"Connection to {DATABASE_FILE} database established")
-        return SessionLocal()
+        return session
     except Exception as e:
         error_logger.error(f"Error creating session: {e}", exc_info=True)
         raise e
 
 
+@contextmanager
+def quote_session(url: str | URL = DATABASE_URL) -> Iterator[Session]:
+    """Provides a session on the shared engine for `url`.
+
+    The transaction is rolled back if the block raises, and the session's
+    connection is returned to the pool on exit.
+    """
+    session = create_session(get_engine(url))
+    try:
+        yield session
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
 def drop_existing_table(engine: Engine) -> None:
     """Drops the existing quotes table."""
     try:
-        Base.metadata.drop_all(tables=[Quote.__table__], bind=engine)
+        Quote.__table__.drop(bind=engine)
         info_logger.info("Existing table dropped.")
     except Exception as e:
         error_logger.error(f"Error dropping table: {e}", exc_info=True)
         raise e
 
 
+def _add_missing_columns(engine: Engine, missing_columns: set[str]) -> bool:
+    """Adds missing quote columns in place; returns whether `content_hash` was one.
+
+    Stored quotes are never dropped for a schema change. Columns start out
+    empty unless they have a server default; key columns are filled by
+    `backfill_quote_keys` and content hashes by `backfill_content_hashes`,
+    which must run before the hashes' unique index is added. The foreign key
+    constraints themselves are only declared on tables created from scratch.
+    """
+    with engine.begin() as connection:
+        for name in sorted(missing_columns):
+            quote_column = Quote.__table__.c[name]
+            definition = quote_column.type.compile(engine.dialect)
+            if quote_column.server_default is not None:
+                definition += f" DEFAULT {quote_column.server_default.arg.text}"
+            connection.execute(text(f"ALTER TABLE quotes ADD COLUMN {name} {definition}"))
+            for index in Quote.__table__.indexes:
+                if quote_column in index.columns.values():
+                    index.create(connection)
+            info_logger.info(f"Added column {name} to the quotes table.")
+    return "content_hash" in missing_columns
+
+
 def init_db(db_url: str = DATABASE_URL) -> Session:
-    """Sets up the quotes database and connects to it"""
+    """Sets up the quotes database and connects to it.
+
+    An existing quotes table is kept so imports can merge into it. Columns
+    added since it was created are added in place, and quotes stored without
+    content hashes or category and author keys get them. Category statistics
+    are computed from the stored quotes whenever they are created, and the
+    pending stats of single adds are folded in otherwise.
+    """
+    return _setup_database(db_url)[0]
+
+
+class KeyMigration(NamedTuple):
+    """What `migrate_database` did: quotes given keys, and the dictionary sizes."""
+
+    keyed: int
+    categories: int
+    authors: int
+
+
+def migrate_database(db_url: str = DATABASE_URL) -> KeyMigration:
+    """Upgrades an existing database to the current schema without importing.
+
+    Adds the columns and tables introduced since the database was created
+    (see `init_db`), and hashes and keys every stored quote, in place.
+    """
+    info_logger.info("Migrating database...")
+    db, keyed = _setup_database(db_url)
+    try:
+        categories = db.execute(select(func.count()).select_from(Category)).scalar() or 0
+        authors = db.execute(select(func.count()).select_from(Author)).scalar() or 0
+        info_logger.info(f"Migrated database: {categories} categories, {authors} authors.")
+        return KeyMigration(keyed, categories, authors)
+    finally:
+        db.close()
+
+
+def _setup_database(db_url: str) -> tuple[Session, int]:
+    """Does the work of `init_db`; also returns how many quotes were given keys."""
     info_logger.info("Setting up database...")
     try:
         engine = get_engine(db_url)
         inspector = inspect(engine)
-        if "quotes" in inspector.get_table_names():
-            drop_existing_table(engine)
+        tables = inspector.get_table_names()
+        rebuild_stats = "quote_stats" not in tables or "quotes" not in tables
+        # Imports only index what they add, so quotes stored before the search
+        # tables existed are indexed once here.
+        build_index = "search_docs" not in tables and "quotes" in tables
+        hash_index = False
+        if "quotes" in tables:
+            with engine.connect() as connection:
+                existing_columns = set(
+                    connection.execute(text("SELECT * FROM quotes LIMIT 0")).keys()
+                )
+            missing_columns = set(Quote.__table__.columns.keys()) - existing_columns
+            if missing_columns:
+                hash_index = _add_missing_columns(engine, missing_columns)
 
         Base.metadata.create_all(engine)
+        _keyed_engines[engine] = True
+        _pending_stats_engines[engine] = True
         info_logger.info("Database setup complete.")
 
         conn = create_session(engine)
-        return conn
+        hashed = backfill_content_hashes(conn)
+        if hashed:
+            info_logger.info(f"Added content hashes to {hashed} quotes.")
+        if hash_index:
+            # DuckDB cannot index a table with uncommitted updates.
+            conn.commit()
+            conn.execute(
+                text("CREATE UNIQUE INDEX uq_quotes_content_hash ON quotes (content_hash)")
+            )
+        keyed = backfill_quote_keys(conn)
+        if keyed:
+            info_logger.info(f"Added category and author keys to {keyed} quotes.")
+        from .stats import compact_quote_stats, refresh_quote_stats
+
+        if rebuild_stats:
+            refresh_quote_stats(conn)
+        else:
+            compact_quote_stats(conn)
+        if build_index:
+            from .search import sync_search_index
+
+            sync_search_index(conn)
+        conn.commit()
+        return conn, keyed
     except Exception as e:
         error_logger.error(f"Error setting up database: {e}", exc_info=True)
         raise e
 
 
-def get_db_conn(url: str = DATABASE_URL, db_file: str = DATABASE_FILE) -> Session:
+def get_db_conn(
+    url: str = DATABASE_URL, db_file: str = DATABASE_FILE, read_only: bool = False
+) -> Session:
     """Create connection to an existing database"""
     try:
         if not os.path.exists(db_file):
@@ -93,11 +810,77 @@ def get_db_conn(url: str = DATABASE_URL, db_file: str = DATABASE_FILE) -> Sessio
                      Run `quote init`. Exiting program."
             )
         else:
-            engine = get_engine(url)
+            engine = get_engine(url, read_only)
             conn = create_session(engine)
             info_logger.info("Connected to Database")
             return conn
     except Exception as e:
         error_logger.error(f"Error connecting to database: {e}", exc_info=True)
         raise e
-    
+
+
+def get_read_conn(url: str = DATABASE_READ_URL, db_file: str = DATABASE_READ_FILE) -> Session:
+    """Connects read-only to the database readers use (DATABASE_READ_PATH if set)."""
+    return get_db_conn(url, db_file, read_only=True)
+
+
+def publish_database(dest: str, url: str = DATABASE_URL, db_file: str = DATABASE_FILE) -> None:
+    """Copies the database to `dest` for readers, replacing it atomically.
+
+    The write-ahead log is checkpointed first so the copy is complete on its
+    own. Readers that already have `dest` open keep the previous copy until
+    they reconnect.
+    """
+    if os.path.abspath(dest) == os.path.abspath(db_file):
+        raise ValueError("Cannot publish the database onto itself")
+    info_logger.info(f"Publishing {db_file} to {dest}...")
+    tmp_dest = f"{dest}.tmp"
+    try:
+        engine = get_engine(url)
+        with engine.begin() as connection:
+            if engine.dialect.name == "duckdb":
+                connection.exec_driver_sql("CHECKPOINT")
+            elif engine.dialect.name == "sqlite":
+                connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        shutil.copyfile(db_file, tmp_dest)
+        os.replace(tmp_dest, dest)
+        info_logger.info(f"Published {db_file} to {dest}.")
+    except Exception as e:
+        error_logger.error(f"Error publishing database: {e}", exc_info=True)
+        if os.path.exists(tmp_dest):
+            os.remove(tmp_dest)
+        raise e
+
+
+def bulk_insert(db: Session, table: Table, rows: list[dict[str, Any]]) -> None:
+    """Inserts a batch of rows in bulk within the session's transaction.
+
+    On DuckDB the batch is spooled to a JSON file and loaded with `read_json`,
+    which avoids DuckDB's slow per-row parameter binding. Other databases use
+    a plain executemany insert. Rows must supply every column that has a
+    Python-side default, since those are not evaluated per row on the DuckDB
+    path.
+    """
+    if not rows:
+        return
+    dialect = db.get_bind().dialect
+    if dialect.name != "duckdb":
+        db.execute(insert(table), rows)
+        return
+
+    columns = [name for name in rows[0]]
+    fd, path = tempfile.mkstemp(prefix="quotes-", suffix=".json")
+    try:
+        with metrics.timer("db.bulk_spool"), os.fdopen(fd, "w", encoding="utf-8") as f:
+            # One dumps call over the whole batch keeps serialization in C.
+            f.write(json.dumps(rows, ensure_ascii=False, default=str))
+        spec = ", ".join(f"{name}: '{table.c[name].type.compile(dialect)}'" for name in columns)
+        escaped_path = path.replace("'", "''")
+        source = text(f"read_json('{escaped_path}', format='array', columns={{{spec}}})")
+        db.execute(
+            insert(table).from_select(
+                columns, select(*[column(name) for name in columns]).select_from(source)
+            )
+        )
+    finally:
+        os.remove(path)
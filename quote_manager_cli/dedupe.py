@@ -0,0 +1,492 @@
+import hashlib
+import json
+import re
+import struct
+import unicodedata
+import zlib
+from typing import Any, Iterator, NamedTuple, Optional
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    delete,
+    exists,
+    func,
+    select,
+    true,
+)
+
+from .database import Quote, _not_duckdb, bulk_insert, quote_staging
+from .logger_config import info_logger
+from .metrics import metrics
+
+DEDUPE_MODES = ("exact", "near")
+
+SHINGLE_SIZE = 5
+SIGNATURE_SIZE = 32
+BAND_ROWS = 4
+BANDS = SIGNATURE_SIZE // BAND_ROWS
+
+_NOT_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+_EMPTY_BIN = 1 << 32
+_BAND = struct.Struct(f"<{BAND_ROWS}Q")
+_CHUNK = 5_000
+
+# MinHash band hashes of staged rows, only filled for near-duplicate detection.
+quote_bands = Table(
+    "quotes_staging_bands",
+    MetaData(),
+    Column("position", Integer),
+    *[Column(f"band_{band}", BigInteger) for band in range(BANDS)],
+    prefixes=["TEMPORARY"],
+)
+
+# Normalized hashes and MinHash bands of stored quotes, by quote id. Dedupe
+# imports sign the stored quotes they have not seen yet, so each quote is
+# signed once; quote ids are never reused, so a signature never goes stale.
+quote_signatures = Table(
+    "quote_signatures",
+    MetaData(),
+    Column("quote_id", Integer),
+    Column("text_hash", String(64)),
+    *[Column(f"band_{band}", BigInteger) for band in range(BANDS)],
+    *[
+        Index(f"ix_quote_signatures_{column}", column).ddl_if(callable_=_not_duckdb)
+        for column in ["quote_id", "text_hash", *[f"band_{band}" for band in range(BANDS)]]
+    ],
+)
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Folds case, Unicode forms, punctuation, emoji and spacing out of a quote.
+
+    Text that is nothing but punctuation or emoji is only stripped, so such
+    quotes don't all collapse into one empty key.
+    """
+    if not text:
+        return ""
+    folded = unicodedata.normalize("NFKC", text).casefold().replace("_", " ")
+    normalized = _SPACES.sub(" ", _NOT_WORD.sub("", folded)).strip()
+    return normalized or text.strip()
+
+
+def normalized_hash(text: Optional[str]) -> str:
+    """Returns the hash exact dedupe compares: that of the normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def shingles(normalized: str, size: int = SHINGLE_SIZE) -> set[str]:
+    """Returns the character `size`-grams of normalized text."""
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i : i + size] for i in range(len(normalized) - size + 1)}
+
+
+def jaccard(a: set[str], b: set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def minhash_signature(normalized: str, size: int = SHINGLE_SIZE) -> list[int]:
+    """Returns a one-permutation MinHash signature of normalized text.
+
+    Each byte shingle is hashed once and kept only if it is the minimum of its
+    bin, so the cost is linear in the length of the text rather than in
+    shingles times permutations. Empty bins borrow from the next filled bin.
+    """
+    data = normalized.encode("utf-8")
+    crc32 = zlib.crc32
+    bins = [_EMPTY_BIN] * SIGNATURE_SIZE
+    for value in {crc32(data[i : i + size]) for i in range(max(len(data) - size, 0) + 1)}:
+        index = value % SIGNATURE_SIZE
+        value //= SIGNATURE_SIZE
+        if value < bins[index]:
+            bins[index] = value
+    filled = [i for i, value in enumerate(bins) if value != _EMPTY_BIN]
+    if len(filled) < SIGNATURE_SIZE:
+        for i in range(SIGNATURE_SIZE):
+            if bins[i] == _EMPTY_BIN:
+                source = min(filled, key=lambda j: (j - i) % SIGNATURE_SIZE)
+                bins[i] = bins[source] + ((source - i) % SIGNATURE_SIZE) * _EMPTY_BIN
+    return bins
+
+
+def band_hashes(signature: list[int]) -> list[int]:
+    """Splits a signature into BANDS bands and hashes each one.
+
+    Two quotes whose shingle sets have Jaccard similarity s share at least
+    one band with probability 1 - (1 - s**BAND_ROWS)**BANDS: about 98% at
+    0.8 and 40% at 0.5. Candidates are verified afterwards. The hashes are
+    the same in every process, since stored quotes keep theirs.
+    """
+    hashes = []
+    for band in range(BANDS):
+        values = _BAND.pack(*signature[band * BAND_ROWS : (band + 1) * BAND_ROWS])
+        digest = hashlib.blake2b(values, digest_size=8).digest()
+        hashes.append(int.from_bytes(digest, "little", signed=True))
+    return hashes
+
+
+def _kept_stored(mode: str) -> Any:
+    """Returns the condition on quotes that a merge in `mode` keeps, None if none are.
+
+    Mirrors `quote_manager._merge_staged_quotes`: `upsert` removes the stored
+    quotes of the imported categories that are not staged again, and
+    `replace` every stored quote that is not.
+    """
+    if mode == "replace":
+        return None
+    if mode == "upsert":
+        staged = quote_staging.c
+        return Quote.category.not_in(select(staged.category).distinct()) | exists().where(
+            staged.content_hash == Quote.content_hash
+        )
+    return true()
+
+
+class MergedQuote(NamedTuple):
+    """A staged quote dropped as a duplicate of the quote that was kept."""
+
+    kind: str
+    similarity: float
+    kept: tuple[str, Optional[str], str]
+    merged: tuple[str, Optional[str], str]
+
+    def to_json(self) -> str:
+        keys = ("quote", "author", "category")
+        return json.dumps(
+            {
+                "kind": self.kind,
+                "similarity": round(self.similarity, 4),
+                "kept": dict(zip(keys, self.kept)),
+                "merged": dict(zip(keys, self.merged)),
+            },
+            ensure_ascii=False,
+        )
+
+
+class Deduper:
+    """Drops duplicate quotes from an import before it is merged.
+
+    `prepare` is called on each batch before it is staged and `apply` once
+    everything is staged. Exact dedupe keeps the first of the staged quotes
+    with the same normalized text, across categories and authors. `near`
+    additionally drops quotes whose shingles have Jaccard similarity of at
+    least `threshold` with an earlier one, finding candidates by MinHash LSH
+    in SQL so only candidate pairs are compared in Python. A near-duplicate
+    joins the group of the earliest quote it is similar to, and is compared
+    with that quote itself, so groups never chain through quotes that are
+    only similar to each other.
+
+    The stored quotes the merge keeps are matched too, through the
+    signatures in `quote_signatures`, and win over the imported quotes. A
+    staged row that is stored as it is never matches a stored quote, so a
+    reimport leaves it to the merge.
+
+    Counts and the first `examples` merges are kept on the instance; every
+    merge is written as a JSON line to `report_path` when it is given.
+    """
+
+    def __init__(
+        self,
+        near: bool = False,
+        threshold: float = 0.8,
+        report_path: Optional[str] = None,
+        examples: int = 5,
+    ):
+        if not 0 < threshold <= 1:
+            raise ValueError("The near-duplicate threshold must be in (0, 1]")
+        self.near = near
+        self.threshold = threshold
+        self.report_path = report_path
+        self.max_examples = examples
+        self.exact_merged = 0
+        self.near_merged = 0
+        self.examples: list[MergedQuote] = []
+        self._report: Any = None
+        self._staged_bands = False
+
+    @property
+    def merged(self) -> int:
+        return self.exact_merged + self.near_merged
+
+    def _signature(self, text: Optional[str]) -> dict[str, Any]:
+        """Returns the normalized hash of a quote and, for near dedupe, its band hashes."""
+        normalized = normalize_text(text)
+        signature: dict[str, Any] = {
+            "text_hash": hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        }
+        if self.near:
+            hashes = band_hashes(minhash_signature(normalized))
+            signature.update((f"band_{band}", value) for band, value in enumerate(hashes))
+        return signature
+
+    def prepare(self, db: Any, batch: list[dict[str, Any]]) -> None:
+        """Adds the normalized hash to a batch of staging rows, and stages its bands."""
+        bands = []
+        with metrics.timer("dedupe.hash"):
+            for row in batch:
+                band_row = self._signature(row["text"])
+                row["text_hash"] = band_row.pop("text_hash")
+                if self.near:
+                    band_row["position"] = row["position"]
+                    bands.append(band_row)
+        if bands:
+            if not self._staged_bands:
+                quote_bands.create(db.connection())
+                self._staged_bands = True
+            bulk_insert(db, quote_bands, bands)
+
+    def apply(self, db: Any, mode: str = "append") -> None:
+        """Removes the duplicates from the staging table and records them.
+
+        `mode` is the import mode the staged rows are merged with, which
+        decides the stored quotes they are matched against.
+        """
+        kept_stored = _kept_stored(mode)
+        try:
+            if self.report_path:
+                self._report = open(self.report_path, "w", encoding="utf-8")
+            if kept_stored is not None:
+                with metrics.timer("dedupe.sign"):
+                    self._sign_stored(db)
+            with metrics.timer("dedupe.exact"):
+                self._drop_exact(db)
+                if kept_stored is not None:
+                    self._drop_stored_exact(db, kept_stored)
+            if self.near:
+                with metrics.timer("dedupe.near"):
+                    self._drop_near(db, kept_stored)
+        finally:
+            if self._report is not None:
+                self._report.close()
+                self._report = None
+            if self._staged_bands:
+                quote_bands.drop(db.connection())
+                self._staged_bands = False
+        info_logger.info(
+            f"Dedupe merged {self.exact_merged} exact and {self.near_merged} near duplicates."
+        )
+
+    def _record(self, merge: MergedQuote) -> None:
+        if merge.kind == "exact":
+            self.exact_merged += 1
+        else:
+            self.near_merged += 1
+        if len(self.examples) < self.max_examples:
+            self.examples.append(merge)
+        if self._report is not None:
+            self._report.write(merge.to_json() + "\n")
+
+    def _drop_exact(self, db: Any) -> None:
+        staged = quote_staging.c
+        first = (
+            select(staged.text_hash, func.min(staged.position).label("position"))
+            .where(staged.text_hash.is_not(None))
+            .group_by(staged.text_hash)
+            .having(func.count() > 1)
+            .subquery()
+        )
+        kept = quote_staging.alias("kept")
+        duplicates = (
+            select(
+                kept.c.text,
+                kept.c.author,
+                kept.c.category,
+                staged.text,
+                staged.author,
+                staged.category,
+            )
+            .join(first, staged.text_hash == first.c.text_hash)
+            .join(kept, kept.c.position == first.c.position)
+            .where(staged.position != first.c.position)
+            .order_by(staged.position)
+        )
+        for row in db.execute(duplicates.execution_options(yield_per=_CHUNK)):
+            self._record(MergedQuote("exact", 1.0, tuple(row[:3]), tuple(row[3:])))
+        if self.exact_merged:
+            keep = select(func.min(staged.position)).group_by(staged.text_hash)
+            db.execute(
+                delete(quote_staging).where(
+                    staged.text_hash.is_not(None), staged.position.not_in(keep)
+                )
+            )
+
+    def _sign_stored(self, db: Any) -> None:
+        """Signs the stored quotes that have no signature yet, and forgets deleted ones."""
+        signed = quote_signatures.c
+        quote_signatures.create(db.connection(), checkfirst=True)
+        db.execute(delete(quote_signatures).where(~exists().where(Quote.id == signed.quote_id)))
+        if self.near:
+            # Signed by exact dedupe, which leaves the bands out.
+            db.execute(delete(quote_signatures).where(signed.band_0.is_(None)))
+        unsigned = ~exists().where(signed.quote_id == Quote.id)
+        query: Any = select(Quote.id, Quote.text).where(unsigned).order_by(Quote.id).limit(_CHUNK)
+        last_id = 0
+        while True:
+            chunk = db.execute(query.where(Quote.id > last_id)).all()
+            if not chunk:
+                return
+            bulk_insert(
+                db,
+                quote_signatures,
+                [{"quote_id": quote_id, **self._signature(text)} for quote_id, text in chunk],
+            )
+            last_id = chunk[-1][0]
+
+    def _delete_staged(self, db: Any, positions: list[int]) -> None:
+        for start in range(0, len(positions), _CHUNK):
+            chunk = positions[start : start + _CHUNK]
+            db.execute(delete(quote_staging).where(quote_staging.c.position.in_(chunk)))
+
+    def _drop_stored_exact(self, db: Any, kept_stored: Any) -> None:
+        """Drops staged rows whose normalized text matches a stored quote's."""
+        row = quote_staging.alias("row")
+        same = Quote.__table__.alias("same")
+        signed = quote_signatures.c
+        matches = (
+            select(
+                row.c.position,
+                Quote.text,
+                Quote.author,
+                Quote.category,
+                row.c.text,
+                row.c.author,
+                row.c.category,
+            )
+            .select_from(row)
+            .join(quote_signatures, signed.text_hash == row.c.text_hash)
+            .join(Quote, Quote.id == signed.quote_id)
+            .where(kept_stored, ~exists().where(same.c.content_hash == row.c.content_hash))
+            .order_by(row.c.position, Quote.id)
+        )
+        dropped: list[int] = []
+        for position, *match in db.execute(matches.execution_options(yield_per=_CHUNK)):
+            if dropped and dropped[-1] == position:
+                continue
+            dropped.append(position)
+            self._record(MergedQuote("exact", 1.0, tuple(match[:3]), tuple(match[3:])))
+        self._delete_staged(db, dropped)
+
+    def _candidate_pairs(self, db: Any) -> Iterator[tuple[int, int]]:
+        """Yields (first position, later position) for rows sharing a band."""
+        bands = quote_bands.c
+        for band in range(BANDS):
+            column = bands[f"band_{band}"]
+            first = (
+                select(column.label("hash"), func.min(bands.position).label("position"))
+                .group_by(column)
+                .having(func.count() > 1)
+                .subquery()
+            )
+            pairs = (
+                select(first.c.position, bands.position)
+                .join(first, column == first.c.hash)
+                .where(bands.position != first.c.position)
+            )
+            yield from db.execute(pairs.execution_options(yield_per=_CHUNK))
+
+    def _stored_candidate_pairs(self, db: Any, kept_stored: Any) -> Iterator[tuple[int, int]]:
+        """Yields (quote id, position) for staged rows sharing a band with a kept stored quote.
+
+        Per band only the first stored quote in the band is paired with a row,
+        so common bands cannot multiply the pairs.
+        """
+        bands = quote_bands.c
+        row = quote_staging.alias("row")
+        same = Quote.__table__.alias("same")
+        signed = quote_signatures.c
+        for band in range(BANDS):
+            pairs = (
+                select(func.min(signed.quote_id), bands.position)
+                .select_from(quote_bands)
+                .join(quote_signatures, signed[f"band_{band}"] == bands[f"band_{band}"])
+                .join(Quote, Quote.id == signed.quote_id)
+                .join(row, row.c.position == bands.position)
+                .where(kept_stored, ~exists().where(same.c.content_hash == row.c.content_hash))
+                .group_by(bands.position)
+            )
+            yield from db.execute(pairs.execution_options(yield_per=_CHUNK))
+
+    def _staged_rows(self, db: Any, positions: list[int]) -> dict[int, tuple]:
+        staged = quote_staging.c
+        rows = {}
+        for start in range(0, len(positions), _CHUNK):
+            chunk = positions[start : start + _CHUNK]
+            query = select(staged.position, staged.text, staged.author, staged.category)
+            for position, *row in db.execute(query.where(staged.position.in_(chunk))):
+                rows[position] = tuple(row)
+        return rows
+
+    def _stored_rows(self, db: Any, quote_ids: list[int]) -> dict[int, tuple]:
+        rows: dict[int, tuple] = {}
+        for start in range(0, len(quote_ids), _CHUNK):
+            chunk = quote_ids[start : start + _CHUNK]
+            query: Any = select(Quote.id, Quote.text, Quote.author, Quote.category)
+            for quote_id, *row in db.execute(query.where(Quote.id.in_(chunk))):
+                rows[quote_id] = tuple(row)
+        return rows
+
+    def _drop_near(self, db: Any, kept_stored: Any) -> None:
+        bands = quote_bands.c
+        db.execute(
+            delete(quote_bands).where(~exists().where(quote_staging.c.position == bands.position))
+        )
+        pairs = {tuple(pair) for pair in self._candidate_pairs(db)}
+        stored_pairs: set[tuple[int, int]] = set()
+        if kept_stored is not None:
+            stored_pairs = {
+                (quote_id, position)
+                for quote_id, position in self._stored_candidate_pairs(db, kept_stored)
+            }
+        if not pairs and not stored_pairs:
+            return
+        positions = sorted({p for pair in pairs for p in pair} | {p for _, p in stored_pairs})
+        rows = self._staged_rows(db, positions)
+        stored = self._stored_rows(db, sorted({quote_id for quote_id, _ in stored_pairs}))
+        shingled = {p: shingles(normalize_text(row[0])) for p, row in rows.items()}
+        stored_shingled = {i: shingles(normalize_text(row[0])) for i, row in stored.items()}
+
+        # (similarity, kept row) of every dropped position. Stored quotes win first.
+        merged: dict[int, tuple[float, tuple]] = {}
+        for quote_id, position in sorted(stored_pairs):
+            score = jaccard(stored_shingled[quote_id], shingled[position])
+            if score >= self.threshold and score > merged.get(position, (0.0,))[0]:
+                merged[position] = (score, stored[quote_id])
+
+        # The rest join the group of the most similar earlier kept row they
+        # reach through a candidate, verified against that row itself.
+        earlier: dict[int, list[int]] = {}
+        for first, later in pairs:
+            earlier.setdefault(later, []).append(first)
+        group: dict[int, int] = {}
+        for position in positions:
+            if position in merged:
+                continue
+            kept = set()
+            for p in earlier.get(position, ()):
+                if p in group:
+                    kept.add(group[p])
+                elif p not in merged:
+                    kept.add(p)
+            best: Optional[tuple[float, int]] = None
+            for candidate in sorted(kept):
+                score = jaccard(shingled[candidate], shingled[position])
+                if score >= self.threshold and (best is None or score > best[0]):
+                    best = (score, candidate)
+            if best is not None:
+                group[position] = best[1]
+                merged[position] = (best[0], rows[best[1]])
+
+        dropped = sorted(merged)
+        for position in dropped:
+            score, kept_row = merged[position]
+            self._record(MergedQuote("near", score, kept_row, rows[position]))
+        self._delete_staged(db, dropped)
@@ -0,0 +1,161 @@
+import csv
+import json
+import os
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import select
+
+from .database import Quote, category_filter
+from .logger_config import error_logger, info_logger
+from .metrics import metrics
+
+EXPORT_FORMATS = ("parquet", "arrow", "csv", "jsonl")
+EXPORT_COLUMNS = ("id", "quote", "author", "category", "created_at", "weight")
+
+# Formats DuckDB's COPY writes natively, with their COPY options.
+_COPY_OPTIONS = {
+    "parquet": "FORMAT parquet",
+    "csv": "FORMAT csv, HEADER true",
+    "jsonl": "FORMAT json",
+}
+
+
+def _export_query(db: Any, category: Optional[str] = None) -> Any:
+    query: Any = select(
+        Quote.id,
+        Quote.text.label("quote"),
+        Quote.author,
+        Quote.category,
+        Quote.created_at,
+        Quote.weight,
+    ).order_by(Quote.id)
+    if category:
+        query = query.where(category_filter(db, category))
+    return query
+
+
+def _require_pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError(
+            "Arrow export needs the optional pyarrow package: pip install pyarrow"
+        ) from None
+    return pyarrow
+
+
+def _write_arrow_batches(batches: Any, schema: Any, out: str) -> int:
+    pyarrow = _require_pyarrow()
+    count = 0
+    with pyarrow.OSFile(out, "wb") as sink, pyarrow.ipc.new_file(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            count += batch.num_rows
+    return count
+
+
+def _export_duckdb(db: Any, query: Any, out: str, file_format: str, batch_size: int) -> int:
+    """Lets DuckDB write the file itself, so rows never become Python objects."""
+    sql = str(query.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+    if file_format == "arrow":
+        _require_pyarrow()
+        cursor = db.connection().connection.dbapi_connection.execute(sql)
+        to_reader = getattr(cursor, "to_arrow_reader", None) or cursor.fetch_record_batch
+        reader = to_reader(batch_size)
+        return _write_arrow_batches(reader, reader.schema, out)
+
+    escaped_path = out.replace("'", "''")
+    copy = f"COPY ({sql}) TO '{escaped_path}' ({_COPY_OPTIONS[file_format]})"
+    return db.connection().exec_driver_sql(copy).scalar() or 0
+
+
+def _iter_partitions(db: Any, query: Any, batch_size: int) -> Iterator[Any]:
+    yield from db.execute(query.execution_options(yield_per=batch_size)).partitions()
+
+
+def _export_streaming(db: Any, query: Any, out: str, file_format: str, batch_size: int) -> int:
+    """Writes the export from fetched row batches, for databases without COPY."""
+    count = 0
+    if file_format == "csv":
+        with open(out, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_COLUMNS)
+            for rows in _iter_partitions(db, query, batch_size):
+                writer.writerows(rows)
+                count += len(rows)
+        return count
+    if file_format == "jsonl":
+        with open(out, "w", encoding="utf-8") as f:
+            for rows in _iter_partitions(db, query, batch_size):
+                for row in rows:
+                    entry = dict(zip(EXPORT_COLUMNS, row))
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                count += len(rows)
+        return count
+
+    pyarrow = _require_pyarrow()
+    schema = pyarrow.schema(
+        [
+            ("id", pyarrow.int64()),
+            ("quote", pyarrow.string()),
+            ("author", pyarrow.string()),
+            ("category", pyarrow.string()),
+            ("created_at", pyarrow.timestamp("us")),
+            ("weight", pyarrow.float64()),
+        ]
+    )
+    batches = (
+        pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(values, type=field.type) for values, field in zip(zip(*rows), schema)],
+            schema=schema,
+        )
+        for rows in _iter_partitions(db, query, batch_size)
+    )
+    if file_format == "arrow":
+        return _write_arrow_batches(batches, schema, out)
+    with pyarrow.parquet.ParquetWriter(out, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            count += batch.num_rows
+    return count
+
+
+def export_quotes(
+    db: Any,
+    out: str,
+    file_format: str = "parquet",
+    category: Optional[str] = None,
+    batch_size: int = 100_000,
+) -> int:
+    """Writes every quote, or those of `category`, to `out` and returns the row count.
+
+    Columns are id, quote, author, category, created_at and weight, in id
+    order, so jsonl and Parquet exports can be imported again with `quote
+    init`. On DuckDB the file is written by DuckDB's COPY (or as Arrow record
+    batches), which keeps memory bounded however large the table is. Other
+    databases are streamed in batches. Arrow output, and Parquet outside
+    DuckDB, need pyarrow.
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+    info_logger.info(f"Exporting quotes to {out} ({file_format})...")
+    query = _export_query(db, category)
+    tmp_out = f"{out}.tmp"
+    try:
+        with metrics.timer("export.write"):
+            if db.get_bind().dialect.name == "duckdb":
+                count = _export_duckdb(db, query, tmp_out, file_format, batch_size)
+            else:
+                count = _export_streaming(db, query, tmp_out, file_format, batch_size)
+        os.replace(tmp_out, out)
+        info_logger.info(f"Exported {count} quotes to {out}.")
+        return count
+    except Exception as e:
+        error_logger.error(f"Error exporting quotes: {e}", exc_info=True)
+        if os.path.exists(tmp_out):
+            os.remove(tmp_out)
+        raise
+    finally:
+        db.close()
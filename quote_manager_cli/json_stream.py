@@ -0,0 +1,197 @@
+import json
+from typing import Any, Iterator, Optional, TextIO
+
+QuoteRecord = tuple[str, dict[str, Any]]
+
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+# The most text a single JSON value may span before it is rejected as malformed.
+MAX_RECORD_SIZE = 16 * 1024 * 1024
+# A token cut off by the end of the buffer (a number, literal or \u escape)
+# fails or ends within this many characters of it.
+_TOKEN_TAIL = 16
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+
+
+class _JSONStream:
+    """Reads JSON values one at a time from a file without loading it whole.
+
+    A value that does not decode is only read further while it may just be
+    cut off at the end of the buffer, and never past `max_record_size`, so a
+    malformed or truncated file fails without being read into memory.
+    """
+
+    def __init__(
+        self, f: TextIO, chunk_size: int = 64 * 1024, max_record_size: int = MAX_RECORD_SIZE
+    ):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.max_record_size = max_record_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        # Bytes of the file that were dropped from the front of the buffer.
+        self.consumed_bytes = 0
+
+    def _fill(self) -> bool:
+        """Appends the next chunk to the unread part of the buffer."""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.consumed_bytes += len(self.buffer[: self.pos].encode("utf-8"))
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def byte_offset(self, pos: int) -> int:
+        """Returns the offset in the file of buffer position `pos`, in bytes."""
+        return self.consumed_bytes + len(self.buffer[:pos].encode("utf-8"))
+
+    def _error(self, message: str, pos: Optional[int] = None) -> json.JSONDecodeError:
+        pos = self.pos if pos is None else pos
+        return json.JSONDecodeError(f"{message} at byte {self.byte_offset(pos)}", self.buffer, pos)
+
+    def _may_be_truncated(self, error: json.JSONDecodeError) -> bool:
+        """Tells whether reading on could fix `error`: the value ran off the buffer."""
+        if len(self.buffer) - self.pos >= self.max_record_size:
+            return False
+        return error.pos >= len(self.buffer) - _TOKEN_TAIL or error.msg.startswith(
+            "Unterminated string"
+        )
+
+    def peek(self) -> str:
+        """Returns the next non-whitespace character, or "" at end of file."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        """Consumes `char` or raises if the next token is something else."""
+        if self.peek() != char:
+            raise self._error(f"Expecting '{char}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decodes the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self._may_be_truncated(e) and self._fill():
+                    continue
+                raise self._error(e.msg, e.pos) from None
+            # A value that ends next to the end of the buffer may be truncated.
+            if end >= len(self.buffer) - _TOKEN_TAIL and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_category_json(file_path: str, chunk_size: int = 64 * 1024) -> Iterator[QuoteRecord]:
+    """Streams (category, quote_entry) pairs from a `{category: [...]}` JSON file."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        stream = _JSONStream(f, chunk_size)
+        stream.expect("{")
+        if stream.peek() == "}":
+            stream.pos += 1
+        else:
+            while True:
+                category = stream.value()
+                if not isinstance(category, str):
+                    raise stream._error("Expecting category name")
+                stream.expect(":")
+                stream.expect("[")
+                if stream.peek() == "]":
+                    stream.pos += 1
+                else:
+                    while True:
+                        quote_entry = stream.value()
+                        if not isinstance(quote_entry, dict):
+                            raise stream._error("Expecting quote object")
+                        yield category, quote_entry
+                        if stream.peek() != ",":
+                            stream.expect("]")
+                            break
+                        stream.pos += 1
+                if stream.peek() != ",":
+                    stream.expect("}")
+                    break
+                stream.pos += 1
+        if stream.peek():
+            raise stream._error("Extra data")
+
+
+def iter_json_lines(file_path: str) -> Iterator[QuoteRecord]:
+    """Streams (category, quote_entry) pairs from a JSON Lines file.
+
+    Each line holds one object with `category`, `quote` and `author` keys.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            quote_entry = json.loads(line)
+            if not isinstance(quote_entry, dict) or not quote_entry.get("category"):
+                raise ValueError(f"Line {line_number}: expected an object with a category")
+            yield quote_entry["category"], quote_entry
+
+
+def iter_parquet(file_path: str, batch_size: int = 10_000) -> Iterator[QuoteRecord]:
+    """Streams (category, quote_entry) pairs from a Parquet file.
+
+    The file needs `category` and `quote` (or `text`) columns; `author` and
+    `weight` are optional. Parquet exports of the quotes table can be read
+    back as they are.
+    """
+    import duckdb
+
+    connection = duckdb.connect()
+    try:
+        source = connection.read_parquet(file_path)
+        columns = set(source.columns)
+        text_column = "quote" if "quote" in columns else "text"
+        if text_column not in columns or "category" not in columns:
+            raise ValueError(f"{file_path}: expected 'category' and 'quote' or 'text' columns")
+        author_column = '"author"' if "author" in columns else "NULL"
+        weight_column = '"weight"' if "weight" in columns else "NULL"
+        cursor = source.query(
+            "source",
+            f'SELECT "{text_column}", {author_column}, "category", {weight_column} FROM source',
+        )
+        row_number = 0
+        while rows := cursor.fetchmany(batch_size):
+            for text, author, category, weight in rows:
+                row_number += 1
+                if not category:
+                    raise ValueError(f"Row {row_number}: expected a category")
+                quote_entry = {"quote": text, "author": author}
+                if weight is not None:
+                    quote_entry["weight"] = weight
+                yield category, quote_entry
+    finally:
+        connection.close()
+
+
+def iter_quote_file(file_path: str, file_format: str = "auto") -> Iterator[QuoteRecord]:
+    """Streams quote records from a JSON, JSON Lines or Parquet file."""
+    if file_format == "auto":
+        name = file_path.lower()
+        if name.endswith(JSON_LINES_EXTENSIONS):
+            file_format = "jsonl"
+        elif name.endswith(PARQUET_EXTENSIONS):
+            file_format = "parquet"
+        else:
+            file_format = "json"
+    if file_format == "jsonl":
+        return iter_json_lines(file_path)
+    if file_format == "parquet":
+        return iter_parquet(file_path)
+    return iter_category_json(file_path)
@@ -1,35 +1,217 @@
+import atexit
+import json
 import logging
 import os
+import queue
+import warnings
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
 
+from .metrics import metrics
 
-def setup_loggers():
-    log_directory = "./var/log"
-    os.makedirs(log_directory, exist_ok=True)
+LOG_DIR_ENV = "QUOTE_LOG_DIR"
+LOG_LEVEL_ENV = "QUOTE_LOG_LEVEL"
+LOG_ASYNC_ENV = "QUOTE_LOG_ASYNC"
+LOG_FORMAT_ENV = "QUOTE_LOG_FORMAT"
+LOG_MAX_BYTES_ENV = "QUOTE_LOG_MAX_BYTES"
+LOG_BACKUP_COUNT_ENV = "QUOTE_LOG_BACKUP_COUNT"
+
+DEFAULT_LOG_DIR = "./var/log"
+DEFAULT_LEVEL = "INFO"
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+_listeners: list[QueueListener] = []
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes", "on")
+
+
+def _ignore_env(name: str, value: str, expected: str, default: object) -> None:
+    # Logging is set up on import, so a bad value must not stop every command.
+    warnings.warn(
+        f"Ignoring {name}={value!r}: expected {expected}; using {default}.",
+        RuntimeWarning,
+        stacklevel=4,
+    )
+
+
+def _env_int(name: str, default: int) -> int:
+    """Reads a non-negative integer setting, warning and using `default` if it is invalid."""
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        _ignore_env(name, value, "a non-negative integer", default)
+        return default
+    return number
+
+
+def _env_level(name: str, default: str) -> str:
+    """Reads a logging level name, warning and using `default` if it is unknown."""
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    if not isinstance(logging.getLevelName(value.upper()), int):
+        _ignore_env(name, value, "a level such as DEBUG, INFO or WARNING", default)
+        return default
+    return value
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _LazyRotatingFileHandler(RotatingFileHandler):
+    """A size-rotated file handler that opens its file on the first record.
+
+    The file size is tracked in memory rather than by seeking the stream, so
+    writes can be left in the stream's buffer. With `flush_each_record` off,
+    records are only flushed when `flush()` is called, which lets the queue
+    listener write a burst of records in one go.
+    """
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int, flush_each_record: bool):
+        super().__init__(
+            filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+        self.flush_each_record = flush_each_record
+        self._size = 0
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        stream = super()._open()
+        self._size = stream.tell()
+        return stream
+
+    def emit(self, record: logging.LogRecord) -> None:
+        metrics.start("log.write")
+        try:
+            message = self.format(record) + self.terminator
+            size = len(message.encode("utf-8"))
+            if self.stream is None:
+                self.stream = self._open()
+            if self.maxBytes > 0 and self._size and self._size + size > self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(message)
+            self._size += size
+            if self.flush_each_record:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+        finally:
+            metrics.stop("log.write")
+
+
+class _BatchingQueueListener(QueueListener):
+    """Flushes its handlers whenever the queue runs empty."""
+
+    queue: queue.SimpleQueue
+
+    def handle(self, record: logging.LogRecord) -> None:
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
+
+def _stop_listeners() -> None:
+    while _listeners:
+        listener = _listeners.pop()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def _reset_logger(logger: logging.Logger) -> None:
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def setup_loggers(
+    log_directory: Optional[str] = None,
+    level: Optional[str] = None,
+    async_mode: Optional[bool] = None,
+    json_format: Optional[bool] = None,
+    max_bytes: Optional[int] = None,
+    backup_count: Optional[int] = None,
+):
+    """Configures the info and error loggers, replacing any earlier setup.
+
+    Unset arguments fall back to the QUOTE_LOG_* environment variables;
+    invalid sizes, counts and level names there are ignored with a
+    RuntimeWarning and the defaults used instead. In
+    async mode records are handed to a background thread through a queue, so
+    disk writes stay off the calling thread and are flushed in batches.
+    """
+    if log_directory is None:
+        log_directory = os.getenv(LOG_DIR_ENV, DEFAULT_LOG_DIR)
+    if level is None:
+        level = _env_level(LOG_LEVEL_ENV, DEFAULT_LEVEL)
+    if async_mode is None:
+        async_mode = _env_flag(LOG_ASYNC_ENV)
+    if json_format is None:
+        json_format = os.getenv(LOG_FORMAT_ENV, "text").lower() == "json"
+    if max_bytes is None:
+        max_bytes = _env_int(LOG_MAX_BYTES_ENV, DEFAULT_MAX_BYTES)
+    if backup_count is None:
+        backup_count = _env_int(LOG_BACKUP_COUNT_ENV, DEFAULT_BACKUP_COUNT)
 
     log_file = os.path.join(log_directory, "quote_manager.log")
     error_log_file = os.path.join(log_directory, "quote_manager-error.log")
 
-    formatter = logging.Formatter("%(asctime)s - %(message)s")
-
-    # Setup info logger
-    info_logger = logging.getLogger("info_logger")
-    info_logger.setLevel(logging.INFO)
-    if not info_logger.handlers:
-        info_handler = logging.FileHandler(log_file)
-        info_handler.setLevel(logging.INFO)
-        info_handler.setFormatter(formatter)
-        info_logger.addHandler(info_handler)
-
-    # Setup error logger
-    error_logger = logging.getLogger("error_logger")
-    error_logger.setLevel(logging.ERROR)
-    if not error_logger.handlers:
-        error_handler = logging.FileHandler(error_log_file)
-        error_handler.setLevel(logging.ERROR)
-        error_handler.setFormatter(formatter)
-        error_logger.addHandler(error_handler)
+    if json_format:
+        formatter: logging.Formatter = JSONFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s - %(message)s")
+
+    _stop_listeners()
+    loggers = []
+    for name, path, logger_level in (
+        ("info_logger", log_file, level.upper()),
+        ("error_logger", error_log_file, logging.ERROR),
+    ):
+        logger = logging.getLogger(name)
+        _reset_logger(logger)
+        logger.setLevel(logger_level)
 
+        handler = _LazyRotatingFileHandler(path, max_bytes, backup_count, not async_mode)
+        handler.setLevel(logger_level)
+        handler.setFormatter(formatter)
+        if async_mode:
+            records: queue.SimpleQueue = queue.SimpleQueue()
+            logger.addHandler(QueueHandler(records))
+            listener = _BatchingQueueListener(records, handler, respect_handler_level=True)
+            listener.start()
+            _listeners.append(listener)
+        else:
+            logger.addHandler(handler)
+        loggers.append(logger)
+
+    info_logger, error_logger = loggers
     return info_logger, error_logger
 
 
+atexit.register(_stop_listeners)
+
 info_logger, error_logger = setup_loggers()
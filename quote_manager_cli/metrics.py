@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+PROFILE_ENV = "QUOTE_PROFILE"
+PROFILE_FORMATS = ("text", "json", "prometheus")
+
+
+class Metrics:
+    """Collects per-phase timers and counters for the hot paths.
+
+    Timers nest per thread: time spent in an inner phase (a DuckDB statement
+    inside an ORM query, say) is subtracted from the outer phase's self time,
+    so the self times add up to the total. Recording is off until `enable()`
+    is called, and then costs a `perf_counter` call per phase boundary.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # name -> [calls, total seconds, self seconds, max seconds]
+        self._timers: dict[str, list[float]] = {}
+        self._counters: dict[str, int] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+        self._local.stack = []
+
+    def _stack(self) -> list[list[Any]]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def start(self, name: str) -> None:
+        """Opens a phase on the current thread; close it with `stop(name)`."""
+        if self.enabled:
+            self._stack().append([name, time.perf_counter(), 0.0])
+
+    def stop(self, name: str) -> None:
+        """Closes the innermost open phase called `name` and records it."""
+        if not self.enabled:
+            return
+        stack = self._stack()
+        for index in range(len(stack) - 1, -1, -1):
+            if stack[index][0] == name:
+                break
+        else:
+            return
+        _, started, child_time = stack[index]
+        del stack[index:]
+        elapsed = time.perf_counter() - started
+        if stack:
+            stack[-1][2] += elapsed
+        self._record(name, elapsed, elapsed - child_time)
+
+    def discard(self, name: str) -> None:
+        """Drops an open phase without recording it, e.g. after an error."""
+        stack = self._stack()
+        for index in range(len(stack) - 1, -1, -1):
+            if stack[index][0] == name:
+                del stack[index]
+                return
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Records a phase timed by the caller, outside the nesting."""
+        if self.enabled:
+            self._record(name, seconds, seconds)
+
+    def _record(self, name: str, elapsed: float, self_time: float) -> None:
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                self._timers[name] = [1, elapsed, self_time, elapsed]
+            else:
+                timer[0] += 1
+                timer[1] += elapsed
+                timer[2] += self_time
+                timer[3] = max(timer[3], elapsed)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Times the block as phase `name`."""
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def incr(self, name: str, value: int = 1) -> None:
+        if self.enabled:
+            with self._lock:
+                self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns the timers (in seconds) and counters recorded so far."""
+        with self._lock:
+            timers = {
+                name: {"calls": int(calls), "total_s": total, "self_s": self_time, "max_s": peak}
+                for name, (calls, total, self_time, peak) in sorted(self._timers.items())
+            }
+            counters = dict(sorted(self._counters.items()))
+        return {"timers": timers, "counters": counters}
+
+    def render(self, output_format: str = "text") -> str:
+        """Renders the snapshot as a text table, JSON or Prometheus exposition text."""
+        data = self.snapshot()
+        if output_format == "json":
+            return json.dumps(data, indent=2)
+        if output_format == "prometheus":
+            return _render_prometheus(data)
+        return _render_text(data)
+
+
+def _render_text(data: dict[str, Any]) -> str:
+    lines = [f"{'phase':<24} {'calls':>7} {'total ms':>10} {'self ms':>10} {'max ms':>9}"]
+    timers = sorted(data["timers"].items(), key=lambda item: item[1]["self_s"], reverse=True)
+    for name, timer in timers:
+        lines.append(
+            f"{name:<24} {timer['calls']:>7} {timer['total_s'] * 1000:>10.2f} "
+            f"{timer['self_s'] * 1000:>10.2f} {timer['max_s'] * 1000:>9.2f}"
+        )
+    for name, value in data["counters"].items():
+        lines.append(f"{name:<24} {value:>7}")
+    return "\n".join(lines)
+
+
+def _metric_name(name: str) -> str:
+    return "quote_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def _render_prometheus(data: dict[str, Any]) -> str:
+    lines = []
+    for metric, field in (
+        ("quote_phase_calls_total", "calls"),
+        ("quote_phase_seconds_total", "total_s"),
+        ("quote_phase_self_seconds_total", "self_s"),
+    ):
+        lines.append(f"# TYPE {metric} counter")
+        for name, timer in data["timers"].items():
+            lines.append(f'{metric}{{phase="{name}"}} {timer[field]}')
+    for name, value in data["counters"].items():
+        metric = _metric_name(name) + "_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
@@ -1,9 +1,89 @@
 import json
 import random
-from typing import Any, Optional
+import time
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, NamedTuple, Optional, cast
 
-from .database import Quote
+from sqlalchemy import bindparam, exists, func, insert, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from .cache import DEFAULT_TTL, QuoteCache
+from .database import (
+    QUOTE_ROW_COLUMNS,
+    Quote,
+    QuoteRow,
+    add_quote_keys,
+    bulk_insert,
+    category_filter,
+    has_quote_keys,
+    keyed_quotes,
+    quote_content_hash,
+    quote_staging,
+)
+from .json_stream import QuoteRecord
 from .logger_config import error_logger, info_logger
+from .metrics import metrics
+from .search import index_staged_quotes, reindex_quote, unindex_quotes
+from .selection import QuoteSelector
+from .stats import (
+    apply_quote_stat_deltas,
+    compact_quote_stats,
+    quote_stat_deltas,
+    record_quote_added,
+    refresh_quote_stats,
+)
+
+if TYPE_CHECKING:
+    from .dedupe import Deduper
+
+_quote_cache: Optional[QuoteCache] = None
+_quote_selector: Optional[QuoteSelector] = None
+
+
+def enable_quote_cache(max_categories: int = 64, ttl: Optional[float] = DEFAULT_TTL) -> QuoteCache:
+    """Turns on the per-category id cache used by the read helpers, see `QuoteCache`."""
+    global _quote_cache
+    if (
+        _quote_cache is None
+        or _quote_cache.max_categories != max_categories
+        or _quote_cache.ttl != ttl
+    ):
+        _quote_cache = QuoteCache(max_categories, ttl)
+    return _quote_cache
+
+
+def disable_quote_cache() -> None:
+    """Turns off the id cache."""
+    global _quote_cache
+    _quote_cache = None
+
+
+def quote_cache_stats() -> dict[str, int]:
+    """Returns the id cache's counters, or an empty dict when it is disabled."""
+    return _quote_cache.stats() if _quote_cache is not None else {}
+
+
+def quote_selector() -> QuoteSelector:
+    """Returns the process-wide selector behind weighted and shuffled draws.
+
+    While the id cache is enabled the selector keeps its populations in it.
+    """
+    global _quote_selector
+    if _quote_selector is None:
+        _quote_selector = QuoteSelector(cache=_quote_cache)
+    elif _quote_cache is not None:
+        _quote_selector.cache = _quote_cache
+    return _quote_selector
+
+
+def _invalidate_cache(category: Optional[str] = None) -> None:
+    if _quote_cache is not None:
+        _quote_cache.invalidate(category)
+    if _quote_selector is not None:
+        _quote_selector.invalidate(category)
 
 
 def load_quotes_from_json(file_path: str) -> dict[str, tuple]:
@@ -23,83 +103,606 @@ def load_quotes_from_json(file_path: str) -> dict[str, tuple]:
     return {}
 
 
-def load_quotes_to_db(db: Any, data: dict[str, tuple]) -> int:
-    """Loads quotes into the database."""
-    info_logger.info("Loading quotes into the database...")
+def _iter_records(data: dict[str, tuple]) -> Iterator[QuoteRecord]:
+    """Flattens category-keyed quote data into (category, quote_entry) pairs."""
+    for category, quotes in data.items():
+        for quote_entry in quotes:
+            yield category, quote_entry
+
+
+IMPORT_MODES = ("append", "upsert", "replace")
+
+
+def quote_rows(records: Iterable[QuoteRecord]) -> Iterator[dict[str, Any]]:
+    """Turns (category, quote_entry) pairs into staging rows in input order.
+
+    An entry's optional `weight` sets its chance in weighted draws (default 1).
+    """
+    for position, (category, quote_entry) in enumerate(records):
+        text = quote_entry.get("quote")
+        author = quote_entry.get("author")
+        category = category.lower()
+        weight = quote_entry.get("weight")
+        yield {
+            "text": text,
+            "author": author,
+            "category": category,
+            "content_hash": quote_content_hash(text, author, category),
+            "weight": 1.0 if weight is None else float(weight),
+            "position": position,
+        }
+
+
+def _batched(rows: Iterable[dict[str, Any]], batch_size: int) -> Iterator[list[dict[str, Any]]]:
+    """Groups rows into lists of at most `batch_size` items."""
+    iterator = iter(rows)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def _merge_staged_quotes(db: Any, mode: str) -> tuple[int, int]:
+    """Merges the staging table into quotes and returns (added, removed) counts.
+
+    Rows whose content hash is already stored are left untouched. `upsert`
+    also removes rows of the imported categories that the import no longer
+    contains, and `replace` does the same across every category. New
+    categories and authors get their keys first. Category stats are updated
+    with the added rows, taking in the pending stats of single adds, and
+    recomputed for the categories that lost rows.
+    Removed rows also leave the search index.
+    """
+    staged = quote_staging.c
+    is_staged = exists().where(staged.content_hash == Quote.content_hash)
+    removed = 0
+    shrunk: list[str] = []
+    if mode in ("upsert", "replace"):
+        stale = ~is_staged
+        if mode == "upsert":
+            stale = stale & Quote.category.in_(select(staged.category).distinct())
+        removed = db.query(func.count(Quote.id)).filter(stale).scalar() or 0
+        if removed:
+            shrunk = list(db.scalars(select(Quote.category).where(stale).distinct()))
+            unindex_quotes(db, select(Quote.id).where(stale))
+            db.query(Quote).filter(stale).delete(synchronize_session=False)
+
+    new_rows = (
+        select(
+            staged.text,
+            staged.author,
+            staged.category,
+            staged.content_hash,
+            func.min(staged.created_at).label("created_at"),
+            func.max(staged.weight).label("weight"),
+            func.min(staged.position).label("position"),
+        )
+        .where(~exists().where(Quote.content_hash == staged.content_hash))
+        .group_by(staged.text, staged.author, staged.category, staged.content_hash)
+        .subquery()
+    )
+    added = db.execute(select(func.count()).select_from(new_rows)).scalar() or 0
+    if added:
+        apply_quote_stat_deltas(db, quote_stat_deltas(new_rows))
+        compact_quote_stats(db)
+        columns = ["text", "author", "category", "content_hash", "created_at", "weight"]
+        rows = new_rows
+        if has_quote_keys(db):
+            add_quote_keys(db, quote_staging)
+            rows = keyed_quotes(new_rows).subquery()
+            columns += ["category_id", "author_id"]
+        # Ordered in a subquery, so ids are assigned in input order.
+        ordered = select(*[rows.c[name] for name in columns]).order_by(rows.c.position).subquery()
+        db.execute(insert(Quote).from_select(columns, select(ordered)))
+    if shrunk:
+        refresh_quote_stats(db, shrunk)
+    return added, removed
+
+
+def load_quote_rows_to_db(
+    db: Any,
+    rows: Iterable[dict[str, Any]],
+    batch_size: int = 10_000,
+    mode: str | Callable[[], str] = "append",
+    dedupe: Optional["Deduper"] = None,
+    raise_errors: bool = False,
+) -> int:
+    """Loads normalized staging rows into the database.
+
+    Rows are dicts as built by `quote_rows`. They are consumed `batch_size` at
+    a time into a staging table and then merged into quotes according to
+    `mode` (see IMPORT_MODES), all in one transaction, so readers never see a
+    partially imported table. `mode` may also be a callable, which is asked
+    for the mode once every row is staged. A `dedupe` stage, when given, drops
+    duplicate rows from the staging table before the merge. Returns the number
+    of quotes added, or for `replace` the number of quotes the table now holds.
+    A failed import is rolled back and logged, and counts as 0 quotes unless
+    `raise_errors` is set, in which case the error is raised after the rollback.
+    """
+    mode_name = mode if isinstance(mode, str) else "deferred"
+    info_logger.info(f"Loading quotes into the database ({mode_name})...")
+    if not callable(mode) and mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode: {mode}")
     count = 0
+    start = time.perf_counter()
     try:
-        for category, quotes in data.items():
-            for quote_entry in quotes:
-                new_quote = Quote(
-                    text=quote_entry.get("quote"),
-                    author=quote_entry.get("author"),
-                    category=category.lower(),
-                )
-                db.add(new_quote)
-                count += 1
+        with metrics.timer("import.stage"):
+            quote_staging.create(db.connection(), checkfirst=True)
+            for batch in _batched(rows, batch_size):
+                created_at = datetime.now()
+                for row in batch:
+                    row["created_at"] = created_at
+                if dedupe is not None:
+                    dedupe.prepare(db, batch)
+                bulk_insert(db, quote_staging, batch)
+        if callable(mode):
+            mode = mode()
+            if mode not in IMPORT_MODES:
+                raise ValueError(f"Unknown import mode: {mode}")
+        if dedupe is not None:
+            with metrics.timer("import.dedupe"):
+                dedupe.apply(db, mode)
+        with metrics.timer("import.merge"):
+            count, removed = _merge_staged_quotes(db, mode)
+            if mode == "replace":
+                count = db.execute(
+                    select(func.count(func.distinct(quote_staging.c.content_hash)))
+                ).scalar()
+        with metrics.timer("import.index"):
+            index_staged_quotes(db, quote_staging)
+        quote_staging.drop(db.connection())
         db.commit()
-        info_logger.info(f"{count} Quotes saved to db.")
+        _invalidate_cache()
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed if elapsed > 0 else float(count)
+        info_logger.info(
+            f"{count} Quotes saved and {removed} removed in {elapsed:.2f}s ({rate:.0f} rows/sec)."
+        )
     except Exception as e:
         db.rollback()
+        count = 0
         error_logger.error(f"Error importing quotes from JSON: {e}", exc_info=True)
+        if raise_errors:
+            raise
     finally:
         db.close()
     return count
 
 
-def add_quote(db: Any, category: str, text: str, author: Optional[str] = None) -> None:
-    """Adds a new quote to the database."""
+def load_quote_records_to_db(
+    db: Any,
+    records: Iterable[QuoteRecord],
+    batch_size: int = 10_000,
+    mode: str = "append",
+    dedupe: Optional["Deduper"] = None,
+) -> int:
+    """Loads a stream of (category, quote_entry) pairs into the database."""
+    return load_quote_rows_to_db(db, quote_rows(records), batch_size, mode, dedupe)
+
+
+def load_quotes_to_db(
+    db: Any,
+    data: dict[str, tuple],
+    batch_size: int = 10_000,
+    mode: str = "append",
+    dedupe: Optional["Deduper"] = None,
+) -> int:
+    """Loads quotes into the database."""
+    return load_quote_records_to_db(db, _iter_records(data), batch_size, mode, dedupe)
+
+
+# What `add_quote` did with a quote.
+QUOTE_ADDED = "added"
+QUOTE_DUPLICATE = "duplicate"
+QUOTE_FAILED = "failed"
+# Tries `add_quote` gives a quote that keeps losing write races.
+ADD_ATTEMPTS = 5
+
+
+def add_quote(db: Any, category: str, text: str, author: Optional[str] = None) -> str:
+    """Adds a new quote to the database.
+
+    Returns QUOTE_ADDED, QUOTE_DUPLICATE when the quote is already stored, or
+    QUOTE_FAILED when the insert fails; failures are logged and rolled back.
+    An add that loses a write race to a concurrent one, say over a new
+    category's key, is retried on top of the other's rows.
+    """
     info_logger.info(f"Adding quote: {text} - {category}...")
 
     try:
-        category = category.lower()  
-        if author is not None:
-            new_quote = Quote(text=text, author=author, category=category)
-        else:
-            new_quote = Quote(text=text, author="Unknown", category=category)
-        db.add(new_quote)
-        db.commit()
-        info_logger.info("Quote added.")
+        category = category.lower()
+        if author is None:
+            author = "Unknown"
+        for attempt in range(1, ADD_ATTEMPTS):
+            try:
+                return _insert_quote(db, category, text, author)
+            except (IntegrityError, OperationalError) as e:
+                db.rollback()
+                info_logger.info(f"Retrying quote add after a write conflict: {e}")
+                time.sleep(random.uniform(0, 0.01 * attempt))
+        return _insert_quote(db, category, text, author)
     except Exception as e:
         db.rollback()
         error_logger.error(f"Error adding quote: {e}", exc_info=True)
+        return QUOTE_FAILED
     finally:
         db.close()
 
 
-def list_quotes(db: Any, category: Optional[str] = None) -> list[Quote]:
-    """Lists quotes from the database."""
+def _insert_quote(db: Any, category: str, text: str, author: str) -> str:
+    """Does one attempt of `add_quote`, committing the quote unless it is stored."""
+    content_hash = quote_content_hash(text, author, category)
+    if db.scalar(select(exists().where(Quote.content_hash == content_hash))):
+        error_logger.error(f"Error adding quote: {text!r} is already stored")
+        return QUOTE_DUPLICATE
+    created_at = datetime.now()
+    new_quote = Quote(text=text, author=author, category=category, created_at=created_at)
+    db.add(new_quote)
+    db.flush()
+    reindex_quote(db, cast(int, new_quote.id), text)
+    record_quote_added(db, category, author, created_at)
+    db.commit()
+    _invalidate_cache(category)
+    info_logger.info("Quote added.")
+    return QUOTE_ADDED
+
+
+class AddQuotesResult(NamedTuple):
+    """Totals of a batch add: quotes added and the lines that were rejected."""
+
+    added: int
+    errors: list[tuple[int, str]]
+    elapsed: float
+
+    @property
+    def rate(self) -> float:
+        return self.added / self.elapsed if self.elapsed > 0 else float(self.added)
+
+
+def quote_entry_row(entry: Any) -> dict[str, Any]:
+    """Validates one quote entry and returns it as a row of the quotes table.
+
+    Entries are objects with `category` and `quote` (or `text`) strings and
+    optional `author` and `weight`. Raises ValueError describing the problem.
+    """
+    if isinstance(entry, str):
+        try:
+            entry = json.loads(entry)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e.msg}") from None
+    if not isinstance(entry, dict):
+        raise ValueError("expected a JSON object")
+    text = entry.get("quote", entry.get("text"))
+    category = entry.get("category")
+    author = entry.get("author")
+    weight = entry.get("weight", 1.0)
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("missing quote text")
+    if not isinstance(category, str) or not category.strip():
+        raise ValueError("missing category")
+    if author is None:
+        author = "Unknown"
+    elif not isinstance(author, str):
+        raise ValueError("author must be a string")
+    if len(category) > 100 or len(author) > 100:
+        raise ValueError("category and author are limited to 100 characters")
+    if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not weight >= 0:
+        raise ValueError("weight must be a non-negative number")
+    category = category.lower()
+    return {
+        "text": text,
+        "author": author,
+        "category": category,
+        "content_hash": quote_content_hash(text, author, category),
+        "weight": float(weight),
+    }
+
+
+def _add_quote_batch(
+    db: Any, batch: list[tuple[int, dict[str, Any]]], errors: list[tuple[int, str]]
+) -> int:
+    """Merges validated rows in one transaction, skipping quotes already stored.
+
+    The batch goes through the import staging table rather than IN lists,
+    which DuckDB binds slowly.
+    """
+    first_line: dict[str, int] = {}
+    rows = []
+    created_at = datetime.now()
+    for line, row in batch:
+        if row["content_hash"] in first_line:
+            errors.append((line, f"duplicate of line {first_line[row['content_hash']]}"))
+            continue
+        first_line[row["content_hash"]] = line
+        rows.append({**row, "created_at": created_at, "position": line})
+
+    staged = quote_staging.c
+    quote_staging.create(db.connection())
+    bulk_insert(db, quote_staging, rows)
+    stored = db.execute(
+        select(staged.position).where(exists().where(Quote.content_hash == staged.content_hash))
+    )
+    errors.extend((line, "quote is already stored") for (line,) in stored)
+    added, _ = _merge_staged_quotes(db, "append")
+    if added:
+        index_staged_quotes(db, quote_staging)
+    quote_staging.drop(db.connection())
+    db.commit()
+    for category in {row["category"] for row in rows}:
+        _invalidate_cache(category)
+    return added
+
+
+def add_quotes(db: Any, entries: Iterable[Any], batch_size: int = 1000) -> AddQuotesResult:
+    """Adds a stream of quotes, committing once per batch of `batch_size`.
+
+    Entries are dicts or JSON strings (such as the lines of a JSON Lines
+    file; blank strings are skipped) and are numbered from 1 in the errors.
+    Invalid entries, quotes that are already stored and repeats within the
+    stream are reported as errors without stopping the rest. A batch that
+    fails to insert is rolled back and all of its lines are reported.
+    """
+    info_logger.info("Adding quotes in batches...")
+    errors: list[tuple[int, str]] = []
+    added = 0
+    start = time.perf_counter()
+    try:
+        batch: list[tuple[int, dict[str, Any]]] = []
+        numbered = enumerate(entries, start=1)
+        while True:
+            for line, entry in numbered:
+                if isinstance(entry, str) and not entry.strip():
+                    continue
+                try:
+                    batch.append((line, quote_entry_row(entry)))
+                except ValueError as e:
+                    errors.append((line, str(e)))
+                if len(batch) >= batch_size:
+                    break
+            if not batch:
+                break
+            try:
+                with metrics.timer("add.batch"):
+                    added += _add_quote_batch(db, batch, errors)
+            except Exception as e:
+                db.rollback()
+                error_logger.error(f"Error adding quote batch: {e}", exc_info=True)
+                errors.extend((line, f"batch failed: {type(e).__name__}") for line, _ in batch)
+            batch = []
+    finally:
+        db.close()
+    errors.sort()
+    elapsed = time.perf_counter() - start
+    result = AddQuotesResult(added, errors, elapsed)
+    info_logger.info(
+        f"{added} quotes added and {len(errors)} rejected in {elapsed:.2f}s "
+        f"({result.rate:.0f} quotes/sec)."
+    )
+    return result
+
+
+def _quotes_query(db: Any, category: Optional[str] = None, after_id: Optional[int] = None) -> Any:
+    """Builds the id-ordered quote row query shared by the listing helpers."""
+    query: Any = select(*QUOTE_ROW_COLUMNS)
+    if category:
+        query = query.where(category_filter(db, category))
+    if after_id is not None:
+        query = query.where(Quote.id > after_id)
+    return query.order_by(Quote.id)
+
+
+def _fetch_rows(db: Any, query: Any) -> list[QuoteRow]:
+    """Runs a quote row query, timing the fetch."""
+    with metrics.timer("db.fetch"):
+        rows = [*map(QuoteRow._make, db.execute(query))]
+    metrics.incr("db.rows_fetched", len(rows))
+    return rows
+
+
+def list_quotes(
+    db: Any,
+    category: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    after_id: Optional[int] = None,
+) -> list[QuoteRow]:
+    """Lists quotes from the database.
+
+    `limit` and `offset` are applied in SQL. Pass the id of the last quote
+    seen as `after_id` to page with a keyset cursor instead of an offset.
+    Raises if the database cannot be read.
+    """
     info_logger.info("Listing quotes...")
 
     try:
-        if category:
-            quotes = db.query(Quote).filter_by(category=category.lower()).all()
-        else:
-            quotes = db.query(Quote).all()
-        return quotes
+        if _quote_cache is not None and limit is not None:
+            ids = _quote_cache.ids(db, category)
+            start = offset + (bisect_right(ids, after_id) if after_id is not None else 0)
+            page_ids = ids[start : start + limit].tolist()
+            if not page_ids:
+                return []
+            query: Any = select(*QUOTE_ROW_COLUMNS).where(Quote.id.in_(page_ids)).order_by(Quote.id)
+            return _fetch_rows(db, query)
+
+        query = _quotes_query(db, category, after_id)
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return _fetch_rows(db, query)
     except Exception as e:
         error_logger.error(f"Error listing quotes: {e}", exc_info=True)
+        raise
     finally:
         db.close()
-    return []
 
 
-def generate_random_quote(db: Any, category: Optional[str] = None) -> Quote | None:
-    """Generates a random quote from the database."""
-    info_logger.info("Generating random quote...")
+def iter_quotes(
+    db: Any,
+    category: Optional[str] = None,
+    after_id: Optional[int] = None,
+    batch_size: int = 1000,
+) -> Iterator[QuoteRow]:
+    """Streams quotes from the database one keyset page at a time."""
+    info_logger.info("Streaming quotes...")
 
     try:
-        if category:
-            quotes = db.query(Quote).filter_by(category=category.lower()).all()
-        else:
-            quotes = db.query(Quote).all()
-        if quotes:
-            quote = random.choice(quotes)
+        while True:
+            page = _fetch_rows(db, _quotes_query(db, category, after_id).limit(batch_size))
+            if not page:
+                break
+            yield from page
+            after_id = page[-1].id
+    except Exception as e:
+        error_logger.error(f"Error streaming quotes: {e}", exc_info=True)
+        raise
+    finally:
+        db.close()
+
+
+def quote_columns(
+    db: Any,
+    category: Optional[str] = None,
+    batch_size: int = 10_000,
+) -> dict[str, Any]:
+    """Returns the quotes of `category` column by column, in id order.
+
+    For bulk consumers: ids come back as an `array('q')` and the text, author,
+    category and created_at columns as lists, so no per-quote object is ever
+    built.
+    """
+    info_logger.info("Reading quote columns...")
+    columns: dict[str, Any] = {
+        "id": array("q"),
+        "text": [],
+        "author": [],
+        "category": [],
+        "created_at": [],
+    }
+    try:
+        with metrics.timer("db.fetch"):
+            result = db.execute(_quotes_query(db, category))
+            for rows in result.partitions(batch_size):
+                for name, values in zip(columns, zip(*rows)):
+                    columns[name].extend(values)
+        metrics.incr("db.rows_fetched", len(columns["id"]))
+        return columns
+    except Exception as e:
+        error_logger.error(f"Error reading quote columns: {e}", exc_info=True)
+        raise
+    finally:
+        db.close()
+
+
+def count_quotes(db: Any, category: Optional[str] = None) -> int:
+    """Counts quotes in the database, optionally within a category."""
+    query = db.query(func.count(Quote.id))
+    if category:
+        query = query.filter(category_filter(db, category))
+    return query.scalar() or 0
+
+
+def _pick_random_ids(
+    db: Any, category: Optional[str], count: int, seed: Optional[int] = None
+) -> list[int]:
+    """Returns up to `count` distinct random quote ids, reproducibly with a `seed`.
+
+    With the id cache enabled the ids are drawn straight from the cached array.
+    Otherwise uniform row positions are drawn from the category's row count
+    and fetched in a single pass that numbers the rows along the id order
+    and keeps those at the drawn positions, so the table is scanned once
+    however many quotes are picked and never loaded whole. Either way the
+    positions are the ones a seeded draw from a `MemoryStore` or a snapshot
+    picks.
+    """
+    sample = random.Random(seed).sample if seed is not None else random.sample
+    if _quote_cache is not None:
+        ids = _quote_cache.ids(db, category)
+        return [ids[pick] for pick in sample(range(len(ids)), min(count, len(ids)))]
+
+    total = count_quotes(db, category)
+    if total == 0:
+        return []
+    positions = sample(range(total), min(count, total))
+    numbered = select(Quote.id, (func.row_number().over(order_by=Quote.id) - 1).label("position"))
+    if category:
+        numbered = numbered.where(category_filter(db, category))
+    rows = numbered.subquery()
+    # Inlined rather than bound, so large draws stay under SQLite's variable limit.
+    wanted: Any = bindparam("positions", positions, expanding=True, literal_execute=True)
+    query = select(rows.c.position, rows.c.id).where(rows.c.position.in_(wanted))
+    found = dict(db.execute(query).all())
+    return [found[position] for position in positions]
+
+
+def _pick_weighted_ids(db: Any, category: Optional[str], count: int) -> list[int]:
+    """Returns up to `count` distinct quote ids picked in proportion to their weight.
+
+    Each quote of positive weight is keyed -ln(u) / weight for a uniform u in
+    (0, 1] and the smallest keys are kept: a weighted sample without
+    replacement, taken in one pass inside the database so only the picks
+    are fetched.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite's random() is a signed 64-bit integer.
+        uniform = 0.5 - func.random() / 18446744073709551616.0
+    else:
+        uniform = 1.0 - func.random()
+    weight: Any = func.coalesce(Quote.weight, 1.0)
+    query: Any = (
+        select(Quote.id).where(weight > 0).order_by(-func.ln(uniform) / weight).limit(count)
+    )
+    if category:
+        query = query.where(category_filter(db, category))
+    return list(db.execute(query).scalars())
+
+
+def generate_random_quotes(
+    db: Any,
+    category: Optional[str] = None,
+    count: int = 1,
+    mode: str = "uniform",
+    session: str = "default",
+    seed: Optional[int] = None,
+) -> list[QuoteRow]:
+    """Generates up to `count` distinct random quotes from the database.
+
+    `mode` is one of SELECTION_MODES: `weighted` picks in proportion to each
+    quote's weight, and `shuffle` returns every quote once per `session`
+    before any repeats. Passing a `seed` makes the draw reproducible.
+
+    Uniform draws fetch only the rows they pick, and unseeded weighted draws
+    are one pass inside the database; with the id cache enabled both come
+    from its arrays instead. Seeded weighted and shuffled draws load the
+    category's ids and weights once, into the id cache when it is enabled,
+    and are O(1) per pick after that. Raises if the database cannot be read,
+    so a failure is not mistaken for an empty category.
+    """
+    info_logger.info(f"Generating {count} random quote(s)...")
+
+    try:
+        if count <= 0:
+            picked_ids: list[int] = []
+        elif mode == "uniform":
+            picked_ids = _pick_random_ids(db, category, count, seed)
+        elif mode == "weighted" and seed is None and _quote_cache is None:
+            picked_ids = _pick_weighted_ids(db, category, count)
         else:
+            picked_ids = quote_selector().draw(db, category, count, mode, session, seed)
+        if not picked_ids:
             info_logger.info("No quotes found.")
-        return quote
+            return []
+        quotes = _fetch_rows(db, select(*QUOTE_ROW_COLUMNS).where(Quote.id.in_(picked_ids)))
+        # Keep the draw order, so seeded draws come back identically.
+        order = {quote_id: index for index, quote_id in enumerate(picked_ids)}
+        quotes.sort(key=lambda quote: order[quote.id])
+        return quotes
     except Exception as e:
-        error_logger.error(f"Error generating random quote: {e}", exc_info=True)
+        error_logger.error(f"Error generating random quotes: {e}", exc_info=True)
+        raise
     finally:
         db.close()
-    return None
+
+
+def generate_random_quote(db: Any, category: Optional[str] = None) -> QuoteRow | None:
+    """Generates a random quote from the database."""
+    quotes = generate_random_quotes(db, category, count=1)
+    return quotes[0] if quotes else None
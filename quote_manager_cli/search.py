@@ -0,0 +1,229 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import case, exists, func, insert, select, true
+
+from .database import (
+    QUOTE_ROW_COLUMNS,
+    Quote,
+    QuoteRow,
+    SearchDoc,
+    SearchTerm,
+    bulk_insert,
+    category_filter,
+)
+from .logger_config import error_logger, info_logger
+from .metrics import metrics
+
+# BM25 tuning constants, using the usual defaults.
+K1 = 1.2
+B = 0.75
+
+MAX_TERM_LENGTH = 100
+_TOKEN_RE = re.compile(r"\w+")
+# The same word characters as Python's \w, for DuckDB's RE2 regular expressions.
+_DUCKDB_TOKEN_PATTERN = r"[\p{L}\p{N}_]+"
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """Splits text into lowercase word terms."""
+    if not text:
+        return []
+    return [term for term in _TOKEN_RE.findall(text.lower()) if len(term) <= MAX_TERM_LENGTH]
+
+
+def _index_rows(quotes: Iterable[tuple[int, Optional[str]]]) -> tuple[list[dict], list[dict]]:
+    docs: list[dict] = []
+    terms: list[dict] = []
+    for quote_id, text in quotes:
+        counts = Counter(tokenize(text))
+        docs.append({"quote_id": quote_id, "length": sum(counts.values())})
+        terms.extend({"term": term, "quote_id": quote_id, "tf": tf} for term, tf in counts.items())
+    return docs, terms
+
+
+def index_quotes(db: Any, quotes: Iterable[tuple[int, Optional[str]]]) -> int:
+    """Adds (id, text) pairs to the search index within the current transaction."""
+    docs, terms = _index_rows(quotes)
+    bulk_insert(db, SearchDoc.__table__, docs)
+    bulk_insert(db, SearchTerm.__table__, terms)
+    return len(docs)
+
+
+def reindex_quote(db: Any, quote_id: int, text: Optional[str]) -> None:
+    """Replaces the postings of one quote within the current transaction."""
+    db.query(SearchTerm).filter(SearchTerm.quote_id == quote_id).delete(synchronize_session=False)
+    db.query(SearchDoc).filter(SearchDoc.quote_id == quote_id).delete(synchronize_session=False)
+    index_quotes(db, [(quote_id, text)])
+
+
+def unindex_quotes(db: Any, quote_ids: Any) -> None:
+    """Removes the postings of the quotes `quote_ids` selects, within the current transaction."""
+    db.query(SearchTerm).filter(SearchTerm.quote_id.in_(quote_ids)).delete(
+        synchronize_session=False
+    )
+    db.query(SearchDoc).filter(SearchDoc.quote_id.in_(quote_ids)).delete(synchronize_session=False)
+
+
+def _index_missing_in_duckdb(db: Any, condition: Any) -> int:
+    """Indexes the quotes matching `condition` that are not indexed yet, set-based.
+
+    DuckDB tokenizes like `tokenize` with `regexp_extract_all`, so the postings
+    are computed and inserted in one statement instead of round-tripping
+    every quote's text through Python.
+    """
+    new = (
+        select(Quote.id, Quote.text)
+        .where(condition, ~exists().where(SearchDoc.quote_id == Quote.id))
+        .subquery()
+    )
+    count = db.execute(select(func.count()).select_from(new)).scalar() or 0
+    if not count:
+        return 0
+    words = func.regexp_extract_all(func.lower(new.c.text), _DUCKDB_TOKEN_PATTERN)
+    tokens = select(new.c.id.label("quote_id"), func.unnest(words).label("term")).subquery()
+    postings = (
+        select(tokens.c.term, tokens.c.quote_id, func.count())
+        .where(func.length(tokens.c.term) <= MAX_TERM_LENGTH)
+        .group_by(tokens.c.term, tokens.c.quote_id)
+    )
+    db.execute(insert(SearchTerm).from_select(["term", "quote_id", "tf"], postings))
+    lengths = (
+        select(new.c.id, func.coalesce(func.sum(SearchTerm.tf), 0))
+        .select_from(new.outerjoin(SearchTerm, SearchTerm.quote_id == new.c.id))
+        .group_by(new.c.id)
+    )
+    db.execute(insert(SearchDoc).from_select(["quote_id", "length"], lengths))
+    return count
+
+
+def _index_missing(db: Any, condition: Any, batch_size: int) -> int:
+    """Indexes the quotes matching `condition` that are not indexed yet, in batches."""
+    if db.get_bind().dialect.name == "duckdb":
+        return _index_missing_in_duckdb(db, condition)
+    indexed = 0
+    last_id = None
+    while True:
+        query: Any = (
+            select(Quote.id, Quote.text)
+            .where(condition, ~exists().where(SearchDoc.quote_id == Quote.id))
+            .order_by(Quote.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            query = query.where(Quote.id > last_id)
+        batch = db.execute(query).all()
+        if not batch:
+            break
+        indexed += index_quotes(db, batch)
+        last_id = batch[-1][0]
+    return indexed
+
+
+def index_staged_quotes(db: Any, staged: Any, batch_size: int = 10_000) -> int:
+    """Indexes the stored quotes whose content hash is in `staged`, unless indexed already.
+
+    `staged` is a table with a `content_hash` column, like the import staging
+    table. Only those quotes are looked at, so an import's indexing costs what
+    it adds rather than the size of the database. Runs inside the caller's
+    transaction and returns the number of quotes indexed.
+    """
+    indexed = _index_missing(db, Quote.content_hash.in_(select(staged.c.content_hash)), batch_size)
+    if indexed:
+        info_logger.info(f"Indexed {indexed} quotes for search.")
+    return indexed
+
+
+def sync_search_index(db: Any, batch_size: int = 10_000) -> int:
+    """Brings the search index in line with the quotes table.
+
+    Postings of deleted quotes are removed, and quotes that are not indexed
+    yet are tokenized and added in batches. This scans the whole index, so
+    imports use `index_staged_quotes` and `unindex_quotes` instead; it is run
+    when the index is first created. Runs inside the caller's transaction and
+    returns the number of quotes indexed.
+    """
+    is_quote = exists().where(Quote.id == SearchDoc.quote_id)
+    db.query(SearchTerm).filter(~exists().where(Quote.id == SearchTerm.quote_id)).delete(
+        synchronize_session=False
+    )
+    db.query(SearchDoc).filter(~is_quote).delete(synchronize_session=False)
+
+    indexed = _index_missing(db, true(), batch_size)
+    if indexed:
+        info_logger.info(f"Indexed {indexed} quotes for search.")
+    return indexed
+
+
+def search_quotes(
+    db: Any,
+    query: str,
+    author: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = 10,
+    offset: int = 0,
+) -> list[tuple[QuoteRow, float]]:
+    """Returns (quote, score) pairs matching `query`, best BM25 score first."""
+    info_logger.info(f"Searching quotes for: {query}")
+
+    try:
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+
+        document_frequencies = dict(
+            db.query(SearchTerm.term, func.count(SearchTerm.quote_id))
+            .filter(SearchTerm.term.in_(terms))
+            .group_by(SearchTerm.term)
+            .all()
+        )
+        if not document_frequencies:
+            return []
+        total_docs, average_length = db.query(
+            func.count(SearchDoc.quote_id), func.avg(SearchDoc.length)
+        ).one()
+        average_length = float(average_length or 1) or 1.0
+
+        idf = {
+            term: math.log((total_docs - df + 0.5) / (df + 0.5) + 1)
+            for term, df in document_frequencies.items()
+        }
+        term_weight = case(idf, value=SearchTerm.term, else_=0.0)
+        tf = SearchTerm.tf * 1.0
+        length_norm = K1 * (1 - B + B * SearchDoc.length / average_length)
+        score = func.sum(term_weight * tf * (K1 + 1) / (tf + length_norm)).label("score")
+
+        ranked = (
+            select(SearchTerm.quote_id, score)
+            .join(SearchDoc, SearchDoc.quote_id == SearchTerm.quote_id)
+            .where(SearchTerm.term.in_(list(idf)))
+            .group_by(SearchTerm.quote_id)
+        )
+        if author or category:
+            ranked = ranked.join(Quote, Quote.id == SearchTerm.quote_id)
+            if author:
+                ranked = ranked.where(func.lower(Quote.author) == author.lower())
+            if category:
+                ranked = ranked.where(category_filter(db, category))
+        ranked_subquery = (
+            ranked.order_by(score.desc(), SearchTerm.quote_id)
+            .limit(limit)
+            .offset(offset)
+            .subquery()
+        )
+
+        with metrics.timer("db.fetch"):
+            rows = db.execute(
+                select(*QUOTE_ROW_COLUMNS, ranked_subquery.c.score)
+                .join(ranked_subquery, ranked_subquery.c.quote_id == Quote.id)
+                .order_by(ranked_subquery.c.score.desc(), Quote.id)
+            ).all()
+        metrics.incr("db.rows_fetched", len(rows))
+        return [(QuoteRow._make(row[:-1]), float(row[-1])) for row in rows]
+    except Exception as e:
+        error_logger.error(f"Error searching quotes: {e}", exc_info=True)
+    finally:
+        db.close()
+    return []
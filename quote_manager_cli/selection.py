@@ -0,0 +1,249 @@
+import heapq
+import random
+import threading
+from array import array
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Optional, Sequence
+
+if TYPE_CHECKING:
+    from .cache import QuoteCache
+
+SELECTION_MODES = ("uniform", "weighted", "shuffle")
+
+# (session, category) a shuffle bag belongs to.
+_BagKey = tuple[str, Optional[str]]
+
+
+def _selection_key(category: Optional[str]) -> Optional[str]:
+    return category.lower() if category else None
+
+
+class AliasTable:
+    """Draws indexes in proportion to their weights in O(1) per draw.
+
+    Built with Vose's alias method in O(n). Only positive weights should be
+    passed in; `QuotePopulation` filters the rest out.
+    """
+
+    def __init__(self, weights: Sequence[float]):
+        size = len(weights)
+        self.size = size
+        self.probability = array("d", bytes(8 * size))
+        self.alias = array("q", bytes(8 * size))
+        total = sum(weights)
+        if size == 0 or total <= 0:
+            self.size = 0
+            return
+
+        scaled = [weight * size / total for weight in weights]
+        small = [i for i, weight in enumerate(scaled) if weight < 1.0]
+        large = [i for i, weight in enumerate(scaled) if weight >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] += scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left is 1.0 up to rounding error.
+        for i in small + large:
+            self.probability[i] = 1.0
+            self.alias[i] = i
+
+    def sample(self, rng: random.Random) -> int:
+        i = int(rng.random() * self.size)
+        return i if rng.random() < self.probability[i] else self.alias[i]
+
+
+def draw_weighted(
+    rng: random.Random,
+    count: int,
+    probability: Sequence[float],
+    alias: Sequence[int],
+    start: int = 0,
+    size: Optional[int] = None,
+) -> list[int]:
+    """Returns up to `count` distinct indexes drawn by weight from an alias table.
+
+    The table is the `size` entries of `probability` and `alias` from
+    `start`, laid out as `AliasTable` builds it. Picks are drawn with
+    replacement and repeats rejected, at O(1) each, for as long as that
+    makes progress. When `count` is over half the table, or heavy weights
+    keep being redrawn, the rest are sampled without replacement in one
+    O(size) pass over the weights the table encodes, so exactly
+    `min(count, size)` indexes come back.
+    """
+    if size is None:
+        size = len(probability) - start
+    wanted = min(count, size)
+    picked: dict[int, None] = {}
+    if wanted * 2 <= size:
+        for _ in range(wanted * 20 + 100):
+            if len(picked) == wanted:
+                break
+            i = int(rng.random() * size)
+            picked[i if rng.random() < probability[start + i] else alias[start + i]] = None
+    if len(picked) < wanted:
+        weights = [0.0] * size
+        for i in range(size):
+            weights[i] += probability[start + i]
+            weights[alias[start + i]] += 1.0 - probability[start + i]
+        # Efraimidis-Spirakis: the largest keys u ** (1 / weight) are a weighted
+        # sample without replacement.
+        keys = (
+            (rng.random() ** (1.0 / weights[i]) if weights[i] > 0 else 0.0, i)
+            for i in range(size)
+            if i not in picked
+        )
+        for _, i in heapq.nlargest(wanted - len(picked), keys):
+            picked[i] = None
+    return list(picked)
+
+
+class ShuffleBag:
+    """Yields each index of a population once, in random order, before repeating.
+
+    Each draw is one Fisher-Yates step over a single array of indexes, and a
+    new round reuses the same array, so draws are O(1). The first pick of a
+    round never repeats the last pick of the previous one.
+    """
+
+    def __init__(self, size: int, rng: random.Random):
+        self.order = array("q", range(size))
+        self.remaining = size
+        self.rng = rng
+        self.last: Optional[int] = None
+
+    def draw(self) -> int:
+        size = len(self.order)
+        if self.remaining == 0:
+            self.remaining = size
+        pick = self.rng.randrange(self.remaining)
+        if self.remaining == size and size > 1 and self.order[pick] == self.last:
+            pick = (pick + 1 + self.rng.randrange(size - 1)) % size
+        self.remaining -= 1
+        order = self.order
+        order[pick], order[self.remaining] = order[self.remaining], order[pick]
+        self.last = order[self.remaining]
+        return self.last
+
+
+class QuotePopulation:
+    """The ids and weights of the quotes a draw can pick from, in id order."""
+
+    def __init__(self, ids: array, weights: array):
+        self.ids = ids
+        self.weights = weights
+        self._alias: Optional[AliasTable] = None
+        self._weighted_ids: Optional[array] = None
+
+    def alias_table(self) -> tuple[AliasTable, array]:
+        """Returns the alias table over positive weights and the ids it indexes."""
+        if self._alias is None:
+            positive = [i for i, weight in enumerate(self.weights) if weight and weight > 0]
+            self._weighted_ids = array("q", (self.ids[i] for i in positive))
+            self._alias = AliasTable([self.weights[i] for i in positive])
+        assert self._weighted_ids is not None
+        return self._alias, self._weighted_ids
+
+
+class QuoteSelector:
+    """Draws quote ids per category: uniformly, by weight, or from shuffle bags.
+
+    Populations (the ids and weights of a category, plus an alias table once
+    weighted draws are used) come from `cache`, so a selector sharing the
+    process's `QuoteCache` reuses its arrays, expiry and invalidation. Per
+    session a shuffle bag of indexes is kept, evicted least recently used
+    beyond `max_bags`. Creating the selector with a `seed` makes its whole
+    sequence of draws reproducible.
+    """
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        max_bags: int = 1024,
+        cache: Optional["QuoteCache"] = None,
+    ):
+        if cache is None:
+            from .cache import QuoteCache
+
+            cache = QuoteCache()
+        self.cache = cache
+        self.rng = random.Random(seed)
+        self.max_bags = max_bags
+        self._bags: OrderedDict[_BagKey, tuple[QuotePopulation, ShuffleBag]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self, category: Optional[str] = None) -> None:
+        """Drops loaded populations for `category` (and all quotes), or everything.
+
+        Shuffle bags over a population whose ids changed start a new round on
+        their next draw.
+        """
+        self.cache.invalidate(category)
+
+    def population(self, db: Any, category: Optional[str] = None) -> QuotePopulation:
+        return self.cache.population(db, category)
+
+    def draw(
+        self,
+        db: Any,
+        category: Optional[str] = None,
+        count: int = 1,
+        mode: str = "uniform",
+        session: str = "default",
+        seed: Optional[int] = None,
+    ) -> list[int]:
+        """Returns up to `count` distinct quote ids picked according to `mode`.
+
+        `uniform` and `weighted` draws are independent; with a `seed` they are
+        reproducible on their own. `shuffle` draws continue the shuffle bag of
+        `session`, which a `seed` only affects when the bag is first created.
+        """
+        if mode not in SELECTION_MODES:
+            raise ValueError(f"Unknown selection mode: {mode}")
+        population = self.population(db, category)
+        if mode == "shuffle":
+            return self._draw_shuffled(population, category, count, session, seed)
+
+        rng = random.Random(seed) if seed is not None else self.rng
+        with self._lock:
+            if mode == "weighted":
+                alias, weighted_ids = population.alias_table()
+                picks = draw_weighted(rng, count, alias.probability, alias.alias, 0, alias.size)
+                return [weighted_ids[i] for i in picks]
+
+            ids = population.ids
+            return [ids[i] for i in rng.sample(range(len(ids)), min(count, len(ids)))]
+
+    def _draw_shuffled(
+        self,
+        population: QuotePopulation,
+        category: Optional[str],
+        count: int,
+        session: str,
+        seed: Optional[int],
+    ) -> list[int]:
+        key = (session, _selection_key(category))
+        with self._lock:
+            entry = self._bags.get(key)
+            if entry is not None and entry[0] is not population:
+                # A reloaded population keeps its bag unless its ids changed.
+                if entry[0].ids == population.ids:
+                    entry = (population, entry[1])
+                else:
+                    entry = None
+            if entry is None:
+                rng = random.Random(seed if seed is not None else self.rng.random())
+                entry = (population, ShuffleBag(len(population.ids), rng))
+            self._bags[key] = entry
+            self._bags.move_to_end(key)
+            while len(self._bags) > self.max_bags:
+                self._bags.popitem(last=False)
+
+            bag = entry[1]
+            wanted = min(count, len(population.ids))
+            picked: dict[int, None] = {}
+            # A draw that spans two rounds skips quotes it already returned.
+            while len(picked) < wanted:
+                picked[population.ids[bag.draw()]] = None
+            return list(picked)
@@ -0,0 +1,375 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http import HTTPStatus
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from sqlalchemy import select
+
+from .cache import DEFAULT_TTL
+from .database import DATABASE_URL, Quote, create_session, engine_stats, get_engine
+from .logger_config import error_logger, info_logger
+from .metrics import metrics
+from .quote_manager import (
+    enable_quote_cache,
+    generate_random_quotes,
+    list_quotes,
+    load_quote_rows_to_db,
+    quote_cache_stats,
+    quote_entry_row,
+    quote_rows,
+)
+from .selection import SELECTION_MODES
+from .stats import quote_stats
+
+MAX_BODY_SIZE = 10 * 1024 * 1024
+
+
+class HTTPError(Exception):
+    """An error that is reported to the client with the given status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _quote_dict(quote: Any) -> dict[str, Any]:
+    return {
+        "id": quote.id,
+        "text": quote.text,
+        "author": quote.author,
+        "category": quote.category,
+    }
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _int_param(params: dict[str, list[str]], name: str, default: Optional[int]) -> Optional[int]:
+    values = params.get(name)
+    if not values:
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"'{name}' must be an integer")
+
+
+class QuoteServer:
+    """Serves quote operations over a small JSON/HTTP API on a warm engine.
+
+    Reads run on a thread pool and use the per-category id cache, whose
+    entries are reloaded after `cache_ttl` seconds to pick up quotes other
+    processes wrote. Quotes
+    posted to /add are queued and written by a single writer task in batches,
+    so concurrent clients share commits. With `collect_metrics` on, phase
+    timings and per-route latencies are served at /metrics.
+    """
+
+    def __init__(
+        self,
+        db_url: str = DATABASE_URL,
+        workers: int = 4,
+        batch_size: int = 500,
+        batch_delay: float = 0.005,
+        cache_categories: int = 64,
+        collect_metrics: bool = True,
+        cache_ttl: Optional[float] = DEFAULT_TTL,
+    ):
+        self.db_url = db_url
+        if collect_metrics:
+            metrics.enable()
+        if cache_categories > 0:
+            enable_quote_cache(cache_categories, cache_ttl)
+        self.engine = get_engine(db_url)
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.read_executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="quote-read"
+        )
+        self.write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quote-write")
+        self.write_queue: Optional[asyncio.Queue] = None
+        self.writer_task: Optional[asyncio.Task] = None
+        self.routes: dict[tuple[str, str], Callable] = {
+            ("GET", "/health"): self.handle_health,
+            ("GET", "/generate"): self.handle_generate,
+            ("GET", "/list"): self.handle_list,
+            ("POST", "/add"): self.handle_add,
+            ("GET", "/metrics"): self.handle_metrics,
+            ("GET", "/stats"): self.handle_stats,
+        }
+
+    async def start(self) -> None:
+        """Starts the batch writer. Called before accepting connections."""
+        self.write_queue = asyncio.Queue()
+        self.writer_task = asyncio.create_task(self._write_batches())
+
+    async def close(self) -> None:
+        """Stops the batch writer and the worker threads."""
+        if self.writer_task is not None:
+            self.writer_task.cancel()
+            try:
+                await self.writer_task
+            except asyncio.CancelledError:
+                pass
+        self.read_executor.shutdown(wait=True)
+        self.write_executor.shutdown(wait=True)
+
+    async def _run(self, executor: ThreadPoolExecutor, func: Callable, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+    async def handle_health(self, params: dict[str, list[str]], body: Any) -> dict[str, Any]:
+        return {"status": "ok"}
+
+    async def handle_metrics(self, params: dict[str, list[str]], body: Any) -> Any:
+        if params.get("format", ["json"])[0] == "prometheus":
+            return metrics.render("prometheus")
+        return {**metrics.snapshot(), "engine": engine_stats(), "cache": quote_cache_stats()}
+
+    async def handle_generate(self, params: dict[str, list[str]], body: Any) -> dict[str, Any]:
+        category = params.get("category", [None])[0]
+        count = _int_param(params, "count", 1) or 1
+        seed = _int_param(params, "seed", None)
+        mode = params.get("mode", ["uniform"])[0]
+        if mode not in SELECTION_MODES:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"'mode' must be one of {SELECTION_MODES}")
+        session = params.get("session", ["default"])[0]
+
+        def pick() -> list[dict[str, Any]]:
+            quotes = generate_random_quotes(
+                create_session(self.engine), category, count, mode, session, seed
+            )
+            return [_quote_dict(quote) for quote in quotes]
+
+        return {"quotes": await self._run(self.read_executor, pick)}
+
+    async def handle_list(self, params: dict[str, list[str]], body: Any) -> dict[str, Any]:
+        category = params.get("category", [None])[0]
+        limit = _int_param(params, "limit", 5)
+        offset = _int_param(params, "offset", 0) or 0
+        after_id = _int_param(params, "after_id", None)
+
+        def fetch() -> list[dict[str, Any]]:
+            quotes = list_quotes(create_session(self.engine), category, limit, offset, after_id)
+            return [_quote_dict(quote) for quote in quotes]
+
+        return {"quotes": await self._run(self.read_executor, fetch)}
+
+    async def handle_stats(self, params: dict[str, list[str]], body: Any) -> dict[str, Any]:
+        category = params.get("category", [None])[0]
+        authors = _int_param(params, "top_authors", 0) or 0
+
+        def fetch() -> dict[str, Any]:
+            stats = quote_stats(create_session(self.engine), category, authors)
+            return {
+                "total": stats.total,
+                "categories": [
+                    {**stat._asdict(), "last_created_at": _isoformat(stat.last_created_at)}
+                    for stat in stats.categories
+                ],
+                "top_authors": [stat._asdict() for stat in stats.top_authors],
+            }
+
+        return await self._run(self.read_executor, fetch)
+
+    async def handle_add(self, params: dict[str, list[str]], body: Any) -> dict[str, Any]:
+        entries = body if isinstance(body, list) else [body]
+        records = []
+        for entry in entries:
+            # Bad input is refused here, so it never fails a batch shared with other requests.
+            try:
+                if not isinstance(entry, dict):
+                    raise ValueError("expected a JSON object")
+                row = quote_entry_row(entry)
+            except ValueError as e:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid quote: {e}")
+            quote_entry = {"quote": row["text"], "author": row["author"], "weight": row["weight"]}
+            records.append((row["category"], quote_entry))
+
+        assert self.write_queue is not None
+        done = asyncio.get_running_loop().create_future()
+        await self.write_queue.put((records, done))
+        try:
+            added = await done
+        except Exception:
+            raise HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, "Quotes could not be stored")
+        return {"status": "ok", "received": len(records), "added": added}
+
+    def _write_records(self, requests: list[list[Any]]) -> list[int]:
+        """Commits the records of several /add requests together.
+
+        Returns how many quotes each request added: a quote counts for the
+        first request that sent it, unless it was stored before the batch.
+        Raises if the batch could not be written; none of it is then stored.
+        """
+        rows = list(quote_rows(record for records in requests for record in records))
+        db = create_session(self.engine)
+        hashes = {row["content_hash"] for row in rows}
+        try:
+            stored: set[str] = set(
+                db.scalars(select(Quote.content_hash).where(Quote.content_hash.in_(hashes)))
+            )
+        except Exception:
+            db.close()
+            raise
+        added = []
+        start = 0
+        for records in requests:
+            new = {row["content_hash"] for row in rows[start : start + len(records)]} - stored
+            stored |= new
+            added.append(len(new))
+            start += len(records)
+        load_quote_rows_to_db(db, rows, self.batch_size, "append", raise_errors=True)
+        return added
+
+    async def _write_batches(self) -> None:
+        """Drains queued /add requests and commits them together.
+
+        A batch that fails is written again one request at a time, so only the
+        requests that cannot be stored get an error.
+        """
+        assert self.write_queue is not None
+        while True:
+            pending = [await self.write_queue.get()]
+            queued = len(pending[0][0])
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.batch_delay
+            while queued < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.write_queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                queued += len(item[0])
+
+            try:
+                added = await self._run(
+                    self.write_executor, self._write_records, [records for records, _ in pending]
+                )
+                info_logger.info(f"Committed {sum(added)} quotes from {len(pending)} add requests.")
+                for (_, done), request_added in zip(pending, added):
+                    if not done.done():
+                        done.set_result(request_added)
+            except Exception as e:
+                error_logger.error(f"Error writing quote batch: {e}", exc_info=True)
+                if len(pending) == 1:
+                    if not pending[0][1].done():
+                        pending[0][1].set_exception(e)
+                    continue
+                # Retried one request at a time, so a failure reaches only the request causing it.
+                for records, done in pending:
+                    try:
+                        (request_added,) = await self._run(
+                            self.write_executor, self._write_records, [records]
+                        )
+                    except Exception as request_error:
+                        error_logger.error(
+                            f"Error writing quote request: {request_error}", exc_info=True
+                        )
+                        if not done.done():
+                            done.set_exception(request_error)
+                    else:
+                        if not done.done():
+                            done.set_result(request_added)
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> tuple[HTTPStatus, Any]:
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed")
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown path {url.path}")
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body is not valid JSON")
+        start = time.perf_counter()
+        try:
+            return HTTPStatus.OK, await handler(parse_qs(url.query), payload)
+        finally:
+            # Requests interleave on the event loop, so they are timed outside the phase nesting.
+            metrics.observe(f"http.{method} {url.path}", time.perf_counter() - start)
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serves HTTP/1.1 requests on one connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY_SIZE:
+                        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self._dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                except ValueError:
+                    status, payload = HTTPStatus.BAD_REQUEST, {"error": "Malformed request"}
+                    headers["connection"] = "close"
+                except Exception as e:
+                    error_logger.error(f"Error handling request: {e}", exc_info=True)
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Server error"}
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                if isinstance(payload, str):
+                    content_type = "text/plain; version=0.0.4"
+                    response = payload.encode("utf-8")
+                else:
+                    content_type = "application/json"
+                    response = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(response)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode(
+                        "latin-1"
+                    )
+                    + response
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    socket_path: Optional[str] = None,
+    db_url: str = DATABASE_URL,
+) -> None:
+    """Runs the quote server until cancelled."""
+    quote_server = QuoteServer(db_url)
+    await quote_server.start()
+    if socket_path:
+        server = await asyncio.start_unix_server(quote_server.handle_connection, path=socket_path)
+        info_logger.info(f"Quote server listening on {socket_path}")
+    else:
+        server = await asyncio.start_server(quote_server.handle_connection, host, port)
+        info_logger.info(f"Quote server listening on {host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await quote_server.close()
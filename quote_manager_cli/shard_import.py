@@ -0,0 +1,143 @@
+import glob
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Iterator, NamedTuple, Optional, Sequence
+
+from .json_stream import JSON_LINES_EXTENSIONS, PARQUET_EXTENSIONS, iter_quote_file
+from .logger_config import error_logger, info_logger
+from .quote_manager import IMPORT_MODES, load_quote_rows_to_db, quote_rows
+
+if TYPE_CHECKING:
+    from .dedupe import Deduper
+
+SHARD_EXTENSIONS = (".json",) + JSON_LINES_EXTENSIONS + PARQUET_EXTENSIONS
+_GLOB_CHARS = "*?["
+
+
+class ShardResult(NamedTuple):
+    """The outcome of parsing one shard: its rows, or why it was skipped."""
+
+    path: str
+    rows: list[dict[str, Any]]
+    error: Optional[str]
+
+
+class ShardImportResult(NamedTuple):
+    """Totals of a sharded import."""
+
+    added: int
+    shards: int
+    failed: list[tuple[str, str]]
+
+
+ProgressCallback = Callable[[int, int, ShardResult], None]
+
+
+def is_shard_pattern(path: str) -> bool:
+    """Returns True when `path` names a directory or a glob rather than one file."""
+    return os.path.isdir(path) or any(char in path for char in _GLOB_CHARS)
+
+
+def expand_shards(path: str) -> list[str]:
+    """Returns the quote files in a directory or matching a glob, sorted by path."""
+    if os.path.isdir(path):
+        paths = [
+            os.path.join(path, name)
+            for name in os.listdir(path)
+            if name.lower().endswith(SHARD_EXTENSIONS)
+        ]
+    elif any(char in path for char in _GLOB_CHARS):
+        paths = glob.glob(path, recursive=True)
+    else:
+        paths = [path]
+    return sorted(p for p in paths if os.path.isfile(p))
+
+
+def parse_shard(path: str, file_format: str = "auto") -> ShardResult:
+    """Parses and normalizes one shard, reporting errors instead of raising."""
+    try:
+        return ShardResult(path, list(quote_rows(iter_quote_file(path, file_format))), None)
+    except Exception as e:
+        return ShardResult(path, [], f"{type(e).__name__}: {e}")
+
+
+def iter_parsed_shards(
+    paths: Sequence[str], file_format: str = "auto", workers: Optional[int] = None
+) -> Iterator[ShardResult]:
+    """Parses shards on a process pool and yields them in path order.
+
+    Only a few shards per worker are in flight at a time, so memory stays
+    bounded when the writer is slower than the parsers. With one worker (or
+    one shard) everything runs in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= 1:
+        for path in paths:
+            yield parse_shard(path, file_format)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+        pending: deque[Future] = deque()
+        remaining = iter(paths)
+        for path in remaining:
+            pending.append(executor.submit(parse_shard, path, file_format))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            result = pending.popleft().result()
+            next_path = next(remaining, None)
+            if next_path is not None:
+                pending.append(executor.submit(parse_shard, next_path, file_format))
+            yield result
+
+
+def import_shards(
+    db: Any,
+    paths: Sequence[str],
+    mode: str = "append",
+    workers: Optional[int] = None,
+    file_format: str = "auto",
+    batch_size: int = 10_000,
+    progress: Optional[ProgressCallback] = None,
+    dedupe: Optional["Deduper"] = None,
+) -> ShardImportResult:
+    """Imports many quote files, parsing them in parallel into a single writer.
+
+    A shard that fails to parse is reported through `progress` and skipped;
+    the good shards are still merged in one transaction. If any shard was
+    skipped, `upsert` and `replace` fall back to `append`, so quotes that only
+    the skipped shards hold are not deleted.
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode: {mode}")
+    info_logger.info(f"Importing {len(paths)} shards with {workers or os.cpu_count()} workers...")
+    failed: list[tuple[str, str]] = []
+    start = time.perf_counter()
+
+    def rows() -> Iterator[dict[str, Any]]:
+        position = 0
+        for done, shard in enumerate(iter_parsed_shards(paths, file_format, workers), start=1):
+            if shard.error is not None:
+                failed.append((shard.path, shard.error))
+                error_logger.error(f"Skipping shard {shard.path}: {shard.error}")
+            for row in shard.rows:
+                row["position"] = position
+                position += 1
+                yield row
+            if progress is not None:
+                progress(done, len(paths), shard)
+
+    def merge_mode() -> str:
+        if failed and mode != "append":
+            info_logger.info(f"{len(failed)} shards failed, merging as append instead of {mode}.")
+            return "append"
+        return mode
+
+    count = load_quote_rows_to_db(db, rows(), batch_size, merge_mode, dedupe)
+    info_logger.info(
+        f"Imported {len(paths) - len(failed)} of {len(paths)} shards "
+        f"in {time.perf_counter() - start:.2f}s."
+    )
+    return ShardImportResult(count, len(paths), failed)
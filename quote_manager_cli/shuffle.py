@@ -0,0 +1,115 @@
+"""Shuffle bags that carry over between runs of `quote generate --shuffle`.
+
+Every CLI run is a new process, so the in-memory bags of `QuoteSelector`
+cannot continue a session from one run to the next. `ShuffleState` keeps
+them in a small JSON file instead: per session and category only a key,
+the category's size and how far into the current round the session got.
+The order of a round is the pseudo-random permutation of row positions
+that the key picks, computed with a Feistel network rather than stored,
+so a bag over millions of quotes is a few bytes and each pick is O(1).
+Reading only imports the standard library.
+"""
+
+import json
+import os
+import random
+from typing import Any, Optional
+
+SHUFFLE_STATE_ENV = "QUOTE_SHUFFLE_STATE"
+SHUFFLE_STATE_FILE = "quote_shuffle.json"
+_MASK64 = 2**64 - 1
+
+
+def _mix(value: int) -> int:
+    """Scrambles a 64-bit integer (the splitmix64 finalizer)."""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def permuted_position(index: int, size: int, key: int) -> int:
+    """Returns where `index` lands in the permutation of range(size) that `key` picks.
+
+    Four Feistel rounds permute the smallest range of 4**k numbers covering
+    `size`; values outside range(size) are permuted again until they fall
+    inside it, which takes fewer than four steps on average.
+    """
+    half = max(1, ((size - 1).bit_length() + 1) // 2)
+    mask = (1 << half) - 1
+    round_keys = [_mix(key + round_number) for round_number in range(4)]
+    value = index
+    while True:
+        left, right = value >> half, value & mask
+        for round_key in round_keys:
+            left, right = right, left ^ (_mix(round_key ^ right) & mask)
+        value = (left << half) | right
+        if value < size:
+            return value
+
+
+class ShuffleState:
+    """The shuffle bags kept in the state file at `path`, by session and category.
+
+    Bags are evicted least recently used beyond `max_bags`. Call `save`
+    after drawing to keep the sessions' progress.
+    """
+
+    def __init__(self, path: str = SHUFFLE_STATE_FILE, max_bags: int = 1024):
+        self.path = path
+        self.max_bags = max_bags
+        try:
+            with open(path) as f:
+                self.bags: dict[str, dict[str, Any]] = json.load(f)
+        except FileNotFoundError:
+            self.bags = {}
+
+    def draw(
+        self,
+        session: str,
+        category: Optional[str],
+        size: int,
+        count: int = 1,
+        seed: Optional[int] = None,
+    ) -> list[int]:
+        """Returns up to `count` distinct row positions below `size` from the session's bag.
+
+        Positions index the category's quotes in id order. A bag whose
+        category has changed size starts over, since its positions no longer
+        name the same quotes. A `seed` only affects a bag when it is created.
+        The first pick of a round never repeats the last pick of the previous
+        one.
+        """
+        if size <= 0 or count <= 0:
+            return []
+        name = f"{session}\x1f{category.lower() if category else ''}"
+        bag = self.bags.pop(name, None)
+        if bag is None or bag["size"] != size:
+            key = random.Random(seed).getrandbits(64)
+            bag = {"key": key, "size": size, "start": 0, "drawn": 0, "last": None}
+        self.bags[name] = bag
+        while len(self.bags) > self.max_bags:
+            del self.bags[next(iter(self.bags))]
+
+        wanted = min(count, size)
+        picked: dict[int, None] = {}
+        # A draw that spans two rounds skips positions it already returned.
+        while len(picked) < wanted:
+            if bag["drawn"] == size:
+                bag["key"] = _mix(bag["key"])
+                bag["drawn"] = 0
+                first = permuted_position(0, size, bag["key"])
+                # Starting one step in moves the repeat to the end of the round.
+                bag["start"] = 1 if size > 1 and first == bag["last"] else 0
+            index = (bag["start"] + bag["drawn"]) % size
+            bag["last"] = permuted_position(index, size, bag["key"])
+            bag["drawn"] += 1
+            picked[bag["last"]] = None
+        return list(picked)
+
+    def save(self) -> None:
+        """Writes the bags back, replacing the state file atomically."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.bags, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,372 @@
+"""Read-only quote snapshots: the corpus in one memory-mapped binary file.
+
+`build_snapshot` writes the quotes of a database to a file that
+`QuoteSnapshot` maps and reads in place, so `list` and `generate` served
+from a snapshot skip SQLAlchemy, the database driver and query planning.
+Reading only imports the standard library.
+
+Layout (little-endian). Rows are sorted by category, then id, so each
+category is one contiguous range of rows:
+
+    header      magic, then uint64 counts: quotes N, weighted quotes P,
+                authors A, categories C, blob bytes; padded to 64 bytes
+    int64       ids[N]
+    int64       created_at[N]        microseconds since 1970-01-01, INT64_MIN for none
+    float64     probabilities[P], int64 aliases[P]
+                    alias tables over the rows with positive weight, per category
+    float64     probabilities_all[P], int64 aliases_all[P]
+                    the same over all quotes, in id order
+    uint32      by_id[N]             rows in id order
+    uint32      weighted[P]          rows with positive weight, per category
+    uint32      weighted_all[P]      rows with positive weight, in id order
+    uint32      text_offsets[N+1]    quote text i is blob[text_offsets[i]:text_offsets[i+1]]
+    int32       author_refs[N]       author number of each row, -1 for none
+    uint32      author_offsets[A+1]
+    uint32      category_rows[C+1]   category c holds rows category_rows[c:c+2]
+    uint32      category_weighted[C+1]
+    uint32      category_offsets[C+1]
+    bytes       blob                 UTF-8 texts, then authors, then categories
+
+Seeded draws pick the same quotes as `generate_random_quotes` on the
+database the snapshot was built from. A snapshot is not updated by later
+imports; rebuild it with `quote snapshot build`.
+"""
+
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Iterator, Literal, NamedTuple, Optional, Sequence
+
+from .selection import AliasTable, draw_weighted
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+SNAPSHOT_ENV = "QUOTE_SNAPSHOT"
+SNAPSHOT_FILE = "quotes.snapshot"
+MAGIC = b"QSNAP\x00\x00\x02"
+_HEADER = struct.Struct("<8s5Q")
+_HEADER_SIZE = 64
+_MAX_OFFSET = 2**32 - 1
+# Creation times are naive, like the database's, so they are counted from a naive epoch.
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_NO_TIME = -(2**63)
+
+
+class SnapshotQuote(NamedTuple):
+    """A quote read from a snapshot, with the fields of `database.QuoteRow`."""
+
+    id: int
+    text: str
+    author: Optional[str]
+    category: str
+    created_at: Optional[datetime] = None
+
+
+class SnapshotInfo(NamedTuple):
+    quotes: int
+    categories: int
+    bytes: int
+
+
+class _Gather(Sequence):
+    """`values` in the order given by `order`, without copying them."""
+
+    def __init__(self, values: Sequence, order: Sequence[int]):
+        self.values = values
+        self.order = order
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __getitem__(self, i: Any) -> Any:
+        return self.values[self.order[i]]
+
+
+def _alias_arrays(weights: list[float]) -> tuple[array, array]:
+    table = AliasTable(weights)
+    return table.probability, table.alias
+
+
+def build_snapshot(db: "Session", path: str = SNAPSHOT_FILE) -> SnapshotInfo:
+    """Writes every quote in the database to a snapshot file at `path`.
+
+    The file is written next to `path` and moved into place, so processes
+    that have the previous snapshot mapped keep reading it.
+    """
+    # Imported here so that reading snapshots never loads SQLAlchemy.
+    from sqlalchemy import select
+
+    from .database import Quote
+
+    try:
+        ids, created, by_id = array("q"), array("q"), array("I")
+        text_offsets, author_refs, author_offsets = array("I", [0]), array("i"), array("I")
+        category_rows, category_offsets = array("I"), array("I")
+        weights: list[float] = []
+        texts, authors, categories = bytearray(), bytearray(), bytearray()
+        author_numbers: dict[str, int] = {}
+        author_offset_list = [0]
+        category_offset_list = [0]
+        current_category: Any = object()
+
+        query: Any = select(
+            Quote.id, Quote.text, Quote.author, Quote.category, Quote.weight, Quote.created_at
+        )
+        query = query.order_by(Quote.category, Quote.id).execution_options(yield_per=10_000)
+        rows = db.execute(query)
+        for row_number, (quote_id, text, author, category, weight, created_at) in enumerate(rows):
+            if category != current_category:
+                current_category = category
+                category_rows.append(row_number)
+                categories += (category or "").encode("utf-8")
+                category_offset_list.append(len(categories))
+            ids.append(quote_id)
+            if created_at is None:
+                created.append(_NO_TIME)
+            else:
+                created.append((created_at - _EPOCH) // _MICROSECOND)
+            weights.append(1.0 if weight is None else weight)
+            texts += (text or "").encode("utf-8")
+            text_offsets.append(len(texts))
+            if author is None:
+                author_refs.append(-1)
+            else:
+                number = author_numbers.get(author)
+                if number is None:
+                    number = author_numbers[author] = len(author_numbers)
+                    authors += author.encode("utf-8")
+                    author_offset_list.append(len(authors))
+                author_refs.append(number)
+        total = len(ids)
+        category_rows.append(total)
+        if len(texts) + len(authors) + len(categories) > _MAX_OFFSET or total > _MAX_OFFSET:
+            raise ValueError("The corpus is too large for a snapshot")
+
+        # Texts come first in the blob, then authors, then category names.
+        author_offsets.extend(len(texts) + offset for offset in author_offset_list)
+        category_offsets.extend(
+            len(texts) + len(authors) + offset for offset in category_offset_list
+        )
+        by_id.extend(sorted(range(total), key=ids.__getitem__))
+
+        weighted, category_weighted = array("I"), array("I", [0])
+        probabilities, aliases = array("d"), array("q")
+        for start, end in zip(category_rows, category_rows[1:]):
+            positive = [row for row in range(start, end) if weights[row] > 0]
+            probability, alias = _alias_arrays([weights[row] for row in positive])
+            weighted.extend(positive)
+            probabilities.extend(probability)
+            aliases.extend(alias)
+            category_weighted.append(len(weighted))
+        weighted_all = array("I", (row for row in by_id if weights[row] > 0))
+        probabilities_all, aliases_all = _alias_arrays([weights[row] for row in weighted_all])
+
+        sections: list[array] = [
+            ids,
+            created,
+            probabilities,
+            aliases,
+            probabilities_all,
+            aliases_all,
+            by_id,
+            weighted,
+            weighted_all,
+            text_offsets,
+            author_refs,
+            author_offsets,
+            category_rows,
+            category_weighted,
+            category_offsets,
+        ]
+        blob_size = len(texts) + len(authors) + len(categories)
+        header = _HEADER.pack(
+            MAGIC, total, len(weighted), len(author_numbers), len(category_rows) - 1, blob_size
+        )
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header.ljust(_HEADER_SIZE, b"\0"))
+            for section in sections:
+                if sys.byteorder != "little":
+                    section.byteswap()
+                section.tofile(f)
+            f.write(texts)
+            f.write(authors)
+            f.write(categories)
+        os.replace(tmp_path, path)
+        return SnapshotInfo(total, len(category_rows) - 1, os.path.getsize(path))
+    finally:
+        db.close()
+
+
+class QuoteSnapshot:
+    """A snapshot file mapped into memory, read without parsing it.
+
+    The sections are memoryviews over the mapping, and only the quotes that
+    are returned have their text decoded. Offers the read methods of
+    `storage.QuoteStore`: `list_quotes`, `iter_quotes`, `count_quotes` and
+    `generate_quotes`.
+    """
+
+    def __init__(self, path: str = SNAPSHOT_FILE):
+        self.path = path
+        self._category_numbers: Optional[dict[str, int]] = None
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"{path} is not a quote snapshot") from None
+        try:
+            self._read_sections()
+        except (ValueError, TypeError, struct.error):
+            self.close()
+            raise ValueError(f"{path} is not a quote snapshot") from None
+
+    def _read_sections(self) -> None:
+        if sys.byteorder != "little":
+            raise ValueError("Snapshots can only be read on little-endian machines")
+        magic, total, weighted, authors, categories, blob_size = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError("bad magic")
+        view = memoryview(self._map)
+        position = _HEADER_SIZE
+
+        def section(code: Literal["q", "d", "I", "i", "B"], length: int) -> "memoryview[Any]":
+            nonlocal position
+            size = struct.calcsize(code) * length
+            part = view[position : position + size].cast(code)
+            if len(part) != length:
+                raise ValueError("truncated")
+            position += size
+            return part
+
+        self.ids = section("q", total)
+        self._created = section("q", total)
+        self._probabilities = section("d", weighted)
+        self._aliases = section("q", weighted)
+        self._probabilities_all = section("d", weighted)
+        self._aliases_all = section("q", weighted)
+        self._by_id = section("I", total)
+        self._weighted = section("I", weighted)
+        self._weighted_all = section("I", weighted)
+        self._text_offsets = section("I", total + 1)
+        self._author_refs = section("i", total)
+        self._author_offsets = section("I", authors + 1)
+        self._category_rows = section("I", categories + 1)
+        self._category_weighted = section("I", categories + 1)
+        self._category_offsets = section("I", categories + 1)
+        self._blob = section("B", blob_size)
+
+    def close(self) -> None:
+        for name in list(vars(self)):
+            if isinstance(getattr(self, name), memoryview):
+                getattr(self, name).release()
+        self._map.close()
+
+    def __enter__(self) -> "QuoteSnapshot":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _string(self, start: int, end: int) -> str:
+        return str(self._blob[start:end], "utf-8")
+
+    def categories(self) -> list[str]:
+        offsets = self._category_offsets
+        return [self._string(offsets[c], offsets[c + 1]) for c in range(len(offsets) - 1)]
+
+    def _category_number(self, category: str) -> Optional[int]:
+        if self._category_numbers is None:
+            self._category_numbers = {name: c for c, name in enumerate(self.categories())}
+        return self._category_numbers.get(category.lower())
+
+    def quote(self, row: int) -> SnapshotQuote:
+        """Decodes the quote stored at `row`."""
+        texts, rows = self._text_offsets, self._category_rows
+        author = None
+        author_ref = self._author_refs[row]
+        if author_ref >= 0:
+            author = self._string(
+                self._author_offsets[author_ref], self._author_offsets[author_ref + 1]
+            )
+        c = bisect_right(rows, row) - 1
+        category = self._string(self._category_offsets[c], self._category_offsets[c + 1])
+        created = self._created[row]
+        return SnapshotQuote(
+            self.ids[row],
+            self._string(texts[row], texts[row + 1]),
+            author,
+            category,
+            None if created == _NO_TIME else _EPOCH + created * _MICROSECOND,
+        )
+
+    def _rows(self, category: Optional[str]) -> Sequence[int]:
+        """Returns the rows of `category`, or of every quote, in id order."""
+        if category is None:
+            return self._by_id
+        c = self._category_number(category)
+        if c is None:
+            return range(0)
+        return range(self._category_rows[c], self._category_rows[c + 1])
+
+    def list_quotes(
+        self,
+        category: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after_id: Optional[int] = None,
+    ) -> list[SnapshotQuote]:
+        rows = self._rows(category)
+        start = offset
+        if after_id is not None:
+            start += bisect_right(_Gather(self.ids, rows), after_id)
+        end = len(rows) if limit is None else min(start + limit, len(rows))
+        return [self.quote(rows[i]) for i in range(start, end)]
+
+    def iter_quotes(
+        self, category: Optional[str] = None, after_id: Optional[int] = None
+    ) -> Iterator[SnapshotQuote]:
+        rows = self._rows(category)
+        start = 0 if after_id is None else bisect_right(_Gather(self.ids, rows), after_id)
+        return (self.quote(rows[i]) for i in range(start, len(rows)))
+
+    def count_quotes(self, category: Optional[str] = None) -> int:
+        return len(self._rows(category))
+
+    def generate_quotes(
+        self,
+        category: Optional[str] = None,
+        count: int = 1,
+        mode: str = "uniform",
+        seed: Optional[int] = None,
+    ) -> list[SnapshotQuote]:
+        """Picks up to `count` distinct random quotes, uniformly or by weight."""
+        if mode not in ("uniform", "weighted"):
+            raise ValueError(f"Snapshots support uniform and weighted draws, not {mode}")
+        if count <= 0:
+            return []
+        rng = random.Random(seed)
+        if mode == "uniform":
+            rows = self._rows(category)
+            picks = rng.sample(range(len(rows)), min(count, len(rows)))
+            return [self.quote(rows[i]) for i in picks]
+
+        if category is None:
+            start, end = 0, len(self._weighted_all)
+            probabilities, aliases = self._probabilities_all, self._aliases_all
+            weighted = self._weighted_all
+        else:
+            c = self._category_number(category)
+            if c is None:
+                return []
+            start, end = self._category_weighted[c], self._category_weighted[c + 1]
+            probabilities, aliases, weighted = self._probabilities, self._aliases, self._weighted
+        picks = draw_weighted(rng, count, probabilities, aliases, start, end - start)
+        return [self.quote(weighted[start + i]) for i in picks]
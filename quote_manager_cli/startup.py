@@ -0,0 +1,73 @@
+import builtins
+import sys
+import time
+from typing import Any, Callable, Optional, TextIO
+
+STARTUP_PROFILE_ENV = "QUOTE_STARTUP_PROFILE"
+
+
+class ImportProfiler:
+    """Times every module imported while it is installed.
+
+    Wraps `builtins.__import__`, so each entry covers a module and everything
+    it imported in turn. Nested entries are reported indented under their parent.
+    """
+
+    def __init__(self) -> None:
+        self.entries: list[tuple[int, str, float]] = []
+        self.started = time.perf_counter()
+        self.modules_before = len(sys.modules)
+        self._depth = 0
+        self._original_import: Optional[Callable[..., Any]] = None
+
+    def install(self) -> "ImportProfiler":
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+        return self
+
+    def uninstall(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(
+        self,
+        name: str,
+        globals: Any = None,
+        locals: Any = None,
+        fromlist: Any = (),
+        level: int = 0,
+    ) -> Any:
+        assert self._original_import is not None
+        if level == 0 and name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        modules_before = set(sys.modules)
+        index = len(self.entries)
+        self.entries.append((self._depth, name, 0.0))
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._depth -= 1
+            new_modules = set(sys.modules) - modules_before
+            if new_modules:
+                if level:
+                    package = (globals or {}).get("__package__") or ""
+                    name = min(new_modules, key=len) if not name else f"{package}.{name}"
+                self.entries[index] = (self._depth, name, elapsed)
+            else:
+                del self.entries[index:]
+
+    def report(self, out: TextIO, threshold_ms: float = 1.0) -> None:
+        """Writes the import tree, skipping imports faster than `threshold_ms`."""
+        self.uninstall()
+        total = time.perf_counter() - self.started
+        imported = len(sys.modules) - self.modules_before
+        out.write(f"Startup profile: {total * 1000:.1f} ms, {imported} modules imported\n")
+        for depth, name, elapsed in self.entries:
+            if elapsed * 1000 >= threshold_ms:
+                out.write(f"{'  ' * (depth + 1)}{elapsed * 1000:8.1f} ms  {name}\n")
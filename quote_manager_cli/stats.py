@@ -0,0 +1,220 @@
+from datetime import datetime
+from typing import Any, Iterable, NamedTuple, Optional
+
+from sqlalchemy import DateTime, Integer, String, case, delete, exists, func, insert, inspect
+from sqlalchemy import literal, select, union_all, update
+
+from .database import Quote, QuoteStat, has_pending_stats, pending_quote_stats
+from .logger_config import error_logger, info_logger
+from .metrics import metrics
+
+UNKNOWN_AUTHOR = "Unknown"
+
+_STAT_COLUMNS = ["category", "author", "quotes", "last_created_at"]
+
+
+class CategoryStat(NamedTuple):
+    """Quote count, distinct authors and newest quote of one category."""
+
+    category: str
+    quotes: int
+    authors: int
+    last_created_at: Optional[datetime]
+
+
+class AuthorStat(NamedTuple):
+    author: str
+    quotes: int
+
+
+class QuoteStats(NamedTuple):
+    """What `quote_stats` reports: categories, and the top authors if asked for."""
+
+    categories: list[CategoryStat]
+    top_authors: list[AuthorStat]
+
+    @property
+    def total(self) -> int:
+        return sum(stat.quotes for stat in self.categories)
+
+
+def quote_stat_deltas(quotes: Any) -> Any:
+    """Aggregates a subquery of category, author and created_at columns into stat rows."""
+    author = func.coalesce(quotes.c.author, UNKNOWN_AUTHOR)
+    return (
+        select(
+            quotes.c.category.label("category"),
+            author.label("author"),
+            func.count().label("quotes"),
+            func.max(quotes.c.created_at).label("last_created_at"),
+        )
+        .group_by(quotes.c.category, author)
+        .subquery()
+    )
+
+
+def _stat_totals(rows: Any) -> Any:
+    """Sums a subquery of stat rows into one row per category and author."""
+    return (
+        select(
+            rows.c.category,
+            rows.c.author,
+            func.sum(rows.c.quotes).label("quotes"),
+            func.max(rows.c.last_created_at).label("last_created_at"),
+        )
+        .group_by(rows.c.category, rows.c.author)
+        .subquery()
+    )
+
+
+def apply_quote_stat_deltas(db: Any, deltas: Any) -> None:
+    """Adds aggregated stat rows (see `quote_stat_deltas`) to the stats table.
+
+    Runs in the caller's transaction. `deltas` is evaluated twice, so it must
+    not depend on rows the caller is about to write.
+    """
+    stats = QuoteStat.__table__.c
+    same_key = (stats.category == deltas.c.category) & (stats.author == deltas.c.author)
+    newer = stats.last_created_at.is_(None) | (deltas.c.last_created_at > stats.last_created_at)
+    db.execute(
+        update(QuoteStat.__table__)
+        .values(
+            quotes=stats.quotes + deltas.c.quotes,
+            last_created_at=case((newer, deltas.c.last_created_at), else_=stats.last_created_at),
+        )
+        .where(same_key)
+    )
+    db.execute(
+        insert(QuoteStat.__table__).from_select(
+            _STAT_COLUMNS, select(deltas).where(~exists().where(same_key))
+        )
+    )
+
+
+def record_quote_added(
+    db: Any, category: str, author: Optional[str], created_at: Optional[datetime]
+) -> None:
+    """Counts one new quote in the stats.
+
+    The count is appended to the pending stats rather than added to the
+    category's row, so concurrent adds never conflict over that row.
+    """
+    if has_pending_stats(db):
+        db.execute(
+            insert(pending_quote_stats).values(
+                category=category,
+                author=author or UNKNOWN_AUTHOR,
+                quotes=1,
+                last_created_at=created_at,
+            )
+        )
+        return
+    added = select(
+        literal(category, String).label("category"),
+        literal(author or UNKNOWN_AUTHOR, String).label("author"),
+        literal(1, Integer).label("quotes"),
+        literal(created_at, DateTime).label("last_created_at"),
+    ).subquery()
+    apply_quote_stat_deltas(db, added)
+
+
+def compact_quote_stats(db: Any) -> None:
+    """Folds the pending stats of single adds into the stats table.
+
+    Runs in the caller's transaction, which only sees, and so only folds
+    and deletes, the pending rows committed before it started.
+    """
+    if not has_pending_stats(db):
+        return
+    apply_quote_stat_deltas(db, _stat_totals(pending_quote_stats))
+    db.execute(delete(pending_quote_stats))
+
+
+def refresh_quote_stats(db: Any, categories: Optional[Iterable[str]] = None) -> None:
+    """Recomputes the stats of `categories` (or of every category) from the quotes.
+
+    Only needed after quotes are deleted, since the newest quote of a
+    category can only be found again by looking at what is left.
+    """
+    quotes: Any = select(Quote.category, Quote.author, Quote.created_at)
+    stale = [delete(QuoteStat)]
+    if has_pending_stats(db):
+        stale.append(delete(pending_quote_stats))
+    if categories is not None:
+        categories = list(categories)
+        quotes = quotes.where(Quote.category.in_(categories))
+        stale = [query.where(query.table.c.category.in_(categories)) for query in stale]
+    with metrics.timer("stats.refresh"):
+        for query in stale:
+            db.execute(query)
+        db.execute(
+            insert(QuoteStat.__table__).from_select(
+                _STAT_COLUMNS, select(quote_stat_deltas(quotes.subquery()))
+            )
+        )
+
+
+def _stats_source(db: Any) -> Any:
+    """Returns the stats with the pending ones added in, one row per category and author.
+
+    Without a stats table the same rows are computed from quotes: databases
+    created before it, and opened read-only, have no way to add it until
+    the next `quote init`.
+    """
+    if not inspect(db.connection()).has_table(QuoteStat.__tablename__):
+        quotes = select(Quote.category, Quote.author, Quote.created_at).subquery()
+        return quote_stat_deltas(quotes)
+    if not has_pending_stats(db):
+        return QuoteStat.__table__
+    rows = union_all(
+        select(*[QuoteStat.__table__.c[name] for name in _STAT_COLUMNS]),
+        select(*[pending_quote_stats.c[name] for name in _STAT_COLUMNS]),
+    ).subquery()
+    return _stat_totals(rows)
+
+
+def category_stats(db: Any, category: Optional[str] = None) -> list[CategoryStat]:
+    """Returns per-category totals, largest categories first."""
+    stats = _stats_source(db).c
+    query = (
+        select(
+            stats.category,
+            func.sum(stats.quotes),
+            func.count(),
+            func.max(stats.last_created_at),
+        )
+        .group_by(stats.category)
+        .order_by(func.sum(stats.quotes).desc(), stats.category)
+    )
+    if category:
+        query = query.where(stats.category == category.lower())
+    with metrics.timer("db.fetch"):
+        return [
+            CategoryStat(name, int(quotes), authors, last)
+            for name, quotes, authors, last in db.execute(query)
+        ]
+
+
+def top_authors(db: Any, category: Optional[str] = None, limit: int = 10) -> list[AuthorStat]:
+    """Returns the authors with the most quotes, overall or within `category`."""
+    stats = _stats_source(db).c
+    total = func.sum(stats.quotes)
+    query = select(stats.author, total).group_by(stats.author).order_by(total.desc(), stats.author)
+    if category:
+        query = query.where(stats.category == category.lower())
+    with metrics.timer("db.fetch"):
+        rows = db.execute(query.limit(limit))
+        return [AuthorStat(author, int(quotes)) for author, quotes in rows]
+
+
+def quote_stats(db: Any, category: Optional[str] = None, authors: int = 0) -> QuoteStats:
+    """Reads category totals and the top `authors` authors from the stats table."""
+    info_logger.info("Reading quote stats...")
+    try:
+        top = top_authors(db, category, authors) if authors else []
+        return QuoteStats(category_stats(db, category), top)
+    except Exception as e:
+        error_logger.error(f"Error reading quote stats: {e}", exc_info=True)
+        raise
+    finally:
+        db.close()
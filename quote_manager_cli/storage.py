@@ -0,0 +1,433 @@
+"""Quote storage backends behind one interface.
+
+`open_store` picks the backend from a URL, by default DATABASE_URL:
+
+* `duckdb:///quotes.db` and `sqlite:///quotes.db` keep quotes in a database
+  file, through the `quote_manager` functions (`SQLStore`). SQLite files
+  run in WAL mode, so readers never block the writer.
+* `memory://` keeps quotes in process memory (`MemoryStore`), starting from
+  `category.json`, or from the quote file given as `memory:///path.json`.
+"""
+
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from .database import (
+    DATABASE_READ_URL,
+    DATABASE_URL,
+    QuoteRow,
+    create_session,
+    get_engine,
+    init_db,
+)
+from .json_stream import QuoteRecord, iter_quote_file
+from .logger_config import error_logger, info_logger
+from .metrics import metrics
+from .quote_manager import (
+    IMPORT_MODES,
+    QUOTE_ADDED,
+    QUOTE_DUPLICATE,
+    AddQuotesResult,
+    add_quote,
+    add_quotes,
+    count_quotes,
+    generate_random_quotes,
+    iter_quotes,
+    list_quotes,
+    load_quote_records_to_db,
+    quote_entry_row,
+    quote_rows,
+)
+from .selection import QuotePopulation, QuoteSelector
+
+if TYPE_CHECKING:
+    from .dedupe import Deduper
+
+MEMORY_SCHEME = "memory"
+DEFAULT_QUOTE_FILE = "category.json"
+
+
+class QuoteStore(ABC):
+    """Where quotes are kept: the operations behind `init`, `add`, `list` and `generate`.
+
+    Methods behave like the `quote_manager` functions of the same name, so
+    backends can be swapped without changing results.
+    """
+
+    @abstractmethod
+    def load_quotes(
+        self,
+        records: Iterable[QuoteRecord],
+        mode: str = "replace",
+        dedupe: Optional["Deduper"] = None,
+    ) -> int:
+        """Imports (category, quote_entry) pairs, see `load_quote_records_to_db`."""
+
+    @abstractmethod
+    def add_quote(self, category: str, text: str, author: Optional[str] = None) -> str:
+        """Adds one quote and returns its status, see `add_quote`."""
+
+    @abstractmethod
+    def add_quotes(self, entries: Iterable[Any], batch_size: int = 1000) -> AddQuotesResult:
+        """Adds a stream of quote entries, see `add_quotes`."""
+
+    @abstractmethod
+    def list_quotes(
+        self,
+        category: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after_id: Optional[int] = None,
+    ) -> list[QuoteRow]:
+        """Lists quotes in id order."""
+
+    @abstractmethod
+    def iter_quotes(
+        self, category: Optional[str] = None, after_id: Optional[int] = None
+    ) -> Iterator[QuoteRow]:
+        """Streams quotes in id order."""
+
+    @abstractmethod
+    def count_quotes(self, category: Optional[str] = None) -> int:
+        """Counts quotes, optionally within a category."""
+
+    @abstractmethod
+    def generate_quotes(
+        self,
+        category: Optional[str] = None,
+        count: int = 1,
+        mode: str = "uniform",
+        session: str = "default",
+        seed: Optional[int] = None,
+    ) -> list[QuoteRow]:
+        """Picks up to `count` distinct random quotes, see `generate_random_quotes`."""
+
+
+class SQLStore(QuoteStore):
+    """Quotes in a DuckDB or SQLite database file.
+
+    Writes go to `url`; reads use `read_url` (a published copy, say) when it
+    is given, on a read-only engine. Unlike `get_db_conn`, a missing
+    database file raises FileNotFoundError instead of exiting.
+    """
+
+    def __init__(self, url: str = DATABASE_URL, read_url: Optional[str] = None):
+        if make_url(url).database in (None, "", ":memory:"):
+            raise ValueError(f"{url} is not a database file; use {MEMORY_SCHEME}:// instead")
+        self.url = url
+        self.read_url = read_url or url
+
+    def _connect(self, read_only: bool = False) -> Session:
+        url = self.read_url if read_only else self.url
+        path = make_url(url).database
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"Database file {path} does not exist. Run `quote init`.")
+        return create_session(get_engine(url, read_only))
+
+    def load_quotes(
+        self,
+        records: Iterable[QuoteRecord],
+        mode: str = "replace",
+        dedupe: Optional["Deduper"] = None,
+    ) -> int:
+        return load_quote_records_to_db(init_db(self.url), records, mode=mode, dedupe=dedupe)
+
+    def add_quote(self, category: str, text: str, author: Optional[str] = None) -> str:
+        return add_quote(self._connect(), category, text, author)
+
+    def add_quotes(self, entries: Iterable[Any], batch_size: int = 1000) -> AddQuotesResult:
+        return add_quotes(self._connect(), entries, batch_size)
+
+    def list_quotes(
+        self,
+        category: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after_id: Optional[int] = None,
+    ) -> list[QuoteRow]:
+        return list_quotes(self._connect(read_only=True), category, limit, offset, after_id)
+
+    def iter_quotes(
+        self, category: Optional[str] = None, after_id: Optional[int] = None
+    ) -> Iterator[QuoteRow]:
+        return iter_quotes(self._connect(read_only=True), category, after_id)
+
+    def count_quotes(self, category: Optional[str] = None) -> int:
+        db = self._connect(read_only=True)
+        try:
+            return count_quotes(db, category)
+        finally:
+            db.close()
+
+    def generate_quotes(
+        self,
+        category: Optional[str] = None,
+        count: int = 1,
+        mode: str = "uniform",
+        session: str = "default",
+        seed: Optional[int] = None,
+    ) -> list[QuoteRow]:
+        db = self._connect(read_only=True)
+        return generate_random_quotes(db, category, count, mode, session, seed)
+
+
+class _MemorySelector(QuoteSelector):
+    """Draws from a memory store's quotes rather than loading them from a database."""
+
+    def __init__(self, store: "MemoryStore"):
+        super().__init__()
+        self.store = store
+        self._populations: dict[Optional[str], QuotePopulation] = {}
+
+    def invalidate(self, category: Optional[str] = None) -> None:
+        with self._lock:
+            if category is None:
+                self._populations.clear()
+            else:
+                self._populations.pop(category.lower(), None)
+                self._populations.pop(None, None)
+
+    def population(self, db: Any, category: Optional[str] = None) -> QuotePopulation:
+        key = category.lower() if category else None
+        with self._lock:
+            population = self._populations.get(key)
+            if population is None:
+                ids = array("q", self.store._ids(key))
+                weights = array("d", (self.store._weights[quote_id] for quote_id in ids))
+                population = self._populations[key] = QuotePopulation(ids, weights)
+        return population
+
+
+class MemoryStore(QuoteStore):
+    """Keeps every quote in process memory, for tests and latency-critical readers.
+
+    Quotes are plain `QuoteRow`s in a dict by id, with a sorted id array per
+    category, so reads never touch SQL or the disk. The store starts out
+    with the quotes of `source` (any file `quote init` reads) when it
+    exists, loaded on first use. Nothing is written back: quotes added or
+    imported last as long as the process.
+    """
+
+    def __init__(self, source: Optional[str] = DEFAULT_QUOTE_FILE):
+        self.source = source
+        self._rows: dict[int, QuoteRow] = {}
+        self._weights: dict[int, float] = {}
+        self._hashes: dict[str, int] = {}
+        self._all = array("q")
+        self._categories: dict[Optional[str], array] = {}
+        self._next_id = 1
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._selector = _MemorySelector(self)
+
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if self.source and os.path.exists(self.source):
+                with metrics.timer("memory.load"):
+                    self._merge(iter_quote_file(self.source), "append")
+                info_logger.info(f"Loaded {len(self._rows)} quotes from {self.source}.")
+
+    def _ids(self, category: Optional[str]) -> array:
+        if category is None:
+            return self._all
+        return self._categories.get(category.lower(), array("q"))
+
+    def _insert(self, row: dict[str, Any]) -> Optional[int]:
+        """Stores a row unless its content hash is already stored; returns its id."""
+        if row["content_hash"] in self._hashes:
+            return None
+        quote_id = self._next_id
+        self._next_id += 1
+        self._rows[quote_id] = QuoteRow(
+            quote_id,
+            row["text"],
+            row["author"],
+            row["category"],
+            row.get("created_at") or datetime.now(),
+        )
+        self._weights[quote_id] = row["weight"]
+        self._hashes[row["content_hash"]] = quote_id
+        self._all.append(quote_id)
+        self._categories.setdefault(row["category"], array("q")).append(quote_id)
+        return quote_id
+
+    def _delete(self, hashes: Iterable[str]) -> int:
+        removed = 0
+        for content_hash in hashes:
+            quote_id = self._hashes.pop(content_hash)
+            del self._rows[quote_id], self._weights[quote_id]
+            removed += 1
+        if removed:
+            self._all = array("q", self._rows)
+            self._categories = {}
+            for quote_id, row in self._rows.items():
+                self._categories.setdefault(row.category, array("q")).append(quote_id)
+        return removed
+
+    def _merge(self, records: Iterable[QuoteRecord], mode: str) -> tuple[int, int]:
+        """Merges records like `_merge_staged_quotes`; returns (added, removed)."""
+        rows: dict[str, dict[str, Any]] = {}
+        created_at = datetime.now()
+        for row in quote_rows(records):
+            row["created_at"] = created_at
+            rows.setdefault(row["content_hash"], row)
+        removed = 0
+        if mode in ("upsert", "replace"):
+            categories = {row["category"] for row in rows.values()}
+            removed = self._delete(
+                [
+                    content_hash
+                    for content_hash, quote_id in self._hashes.items()
+                    if content_hash not in rows
+                    and (mode == "replace" or self._rows[quote_id].category in categories)
+                ]
+            )
+        added = sum(self._insert(row) is not None for row in rows.values())
+        self._selector.invalidate()
+        return added, removed
+
+    def load_quotes(
+        self,
+        records: Iterable[QuoteRecord],
+        mode: str = "replace",
+        dedupe: Optional["Deduper"] = None,
+    ) -> int:
+        if mode not in IMPORT_MODES:
+            raise ValueError(f"Unknown import mode: {mode}")
+        if dedupe is not None:
+            raise ValueError("The memory store does not support dedupe")
+        info_logger.info(f"Loading quotes into memory ({mode})...")
+        self._ensure_loaded()
+        with self._lock:
+            added, removed = self._merge(records, mode)
+            count = len(self._rows) if mode == "replace" else added
+        info_logger.info(f"{count} Quotes saved and {removed} removed.")
+        return count
+
+    def add_quote(self, category: str, text: str, author: Optional[str] = None) -> str:
+        info_logger.info(f"Adding quote: {text} - {category}...")
+        self._ensure_loaded()
+        row = quote_entry_row({"category": category, "quote": text, "author": author})
+        with self._lock:
+            if self._insert(row) is None:
+                error_logger.error(f"Error adding quote: {text!r} is already stored")
+                return QUOTE_DUPLICATE
+            self._selector.invalidate(row["category"])
+        info_logger.info("Quote added.")
+        return QUOTE_ADDED
+
+    def add_quotes(self, entries: Iterable[Any], batch_size: int = 1000) -> AddQuotesResult:
+        info_logger.info("Adding quotes...")
+        self._ensure_loaded()
+        errors: list[tuple[int, str]] = []
+        first_line: dict[int, int] = {}
+        added = 0
+        start = time.perf_counter()
+        with self._lock:
+            for line, entry in enumerate(entries, start=1):
+                if isinstance(entry, str) and not entry.strip():
+                    continue
+                try:
+                    row = quote_entry_row(entry)
+                except ValueError as e:
+                    errors.append((line, str(e)))
+                    continue
+                quote_id = self._insert(row)
+                if quote_id is not None:
+                    first_line[quote_id] = line
+                    added += 1
+                    continue
+                stored_id = self._hashes[row["content_hash"]]
+                if stored_id in first_line:
+                    errors.append((line, f"duplicate of line {first_line[stored_id]}"))
+                else:
+                    errors.append((line, "quote is already stored"))
+            self._selector.invalidate()
+        return AddQuotesResult(added, errors, time.perf_counter() - start)
+
+    def list_quotes(
+        self,
+        category: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after_id: Optional[int] = None,
+    ) -> list[QuoteRow]:
+        self._ensure_loaded()
+        with self._lock:
+            ids = self._ids(category)
+            start = offset + (bisect_right(ids, after_id) if after_id is not None else 0)
+            end = None if limit is None else start + limit
+            return [self._rows[quote_id] for quote_id in ids[start:end]]
+
+    def iter_quotes(
+        self, category: Optional[str] = None, after_id: Optional[int] = None
+    ) -> Iterator[QuoteRow]:
+        return iter(self.list_quotes(category, after_id=after_id))
+
+    def count_quotes(self, category: Optional[str] = None) -> int:
+        self._ensure_loaded()
+        with self._lock:
+            return len(self._rows) if category is None else len(self._ids(category))
+
+    def generate_quotes(
+        self,
+        category: Optional[str] = None,
+        count: int = 1,
+        mode: str = "uniform",
+        session: str = "default",
+        seed: Optional[int] = None,
+    ) -> list[QuoteRow]:
+        self._ensure_loaded()
+        if count <= 0:
+            return []
+        with self._lock:
+            if mode == "uniform" and seed is None:
+                ids = self._ids(category)
+                picked = [ids[i] for i in random.sample(range(len(ids)), min(count, len(ids)))]
+            else:
+                picked = self._selector.draw(None, category, count, mode, session, seed)
+            return [self._rows[quote_id] for quote_id in picked]
+
+
+# Memory stores are shared per URL for the whole process, like engines.
+_memory_stores: dict[str, MemoryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(url: Optional[str] = None) -> QuoteStore:
+    """Returns the store for `url`, by default the one DATABASE_URL selects.
+
+    Every `memory://` URL naming the same source shares one store per process.
+    """
+    try:
+        if url is None:
+            url, read_url = DATABASE_URL, DATABASE_READ_URL
+        else:
+            read_url = url
+        parsed = make_url(url)
+        if parsed.drivername == MEMORY_SCHEME:
+            source = parsed.database or DEFAULT_QUOTE_FILE
+            with _stores_lock:
+                store = _memory_stores.get(source)
+                if store is None:
+                    store = _memory_stores[source] = MemoryStore(source)
+            return store
+        if parsed.get_backend_name() not in ("duckdb", "sqlite"):
+            raise ValueError(f"Unsupported database URL: {url}")
+        return SQLStore(url, read_url)
+    except Exception as e:
+        error_logger.error(f"Error opening quote store {url}: {e}", exc_info=True)
+        raise e
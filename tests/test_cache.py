@@ -0,0 +1,109 @@
+import time
+
+import pytest
+
+from quote_manager_cli.cache import QuoteCache
+from quote_manager_cli.database import Quote, init_db
+from quote_manager_cli.quote_manager import (
+    add_quote,
+    disable_quote_cache,
+    enable_quote_cache,
+    generate_random_quotes,
+    list_quotes,
+    load_quotes_to_db,
+    quote_cache_stats,
+)
+
+
+@pytest.fixture
+def test_db():
+    session = init_db("sqlite:///:memory:")
+    for category in ("category1", "category2", "category3"):
+        for i in range(3):
+            session.add(Quote(text=f"{category} quote {i}", author="Author", category=category))
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def cache():
+    yield enable_quote_cache(max_categories=2)
+    disable_quote_cache()
+
+
+def test_quote_cache_hits_and_evictions(test_db):
+    """Test that ids are cached per category and evicted least recently used first."""
+    cache = QuoteCache(max_categories=2)
+
+    assert len(cache.ids(test_db, "Category1")) == 3
+    cache.ids(test_db, "category1")
+    cache.ids(test_db, "category2")
+    cache.ids(test_db, "category3")
+
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 3,
+        "evictions": 1,
+        "categories": 2,
+        "ids": 6,
+        "populations": 0,
+    }
+    cache.ids(test_db, "category1")
+    assert cache.stats()["misses"] == 4
+
+
+def test_read_helpers_use_cache(test_db, cache):
+    """Test that generate and list read from the cache and stay within the category."""
+    quotes = generate_random_quotes(test_db, "category2", count=2)
+    assert len(quotes) == 2
+    assert all(quote.category == "category2" for quote in quotes)
+
+    page = list_quotes(test_db, "category2", limit=2, offset=1)
+    assert [quote.text for quote in page] == ["category2 quote 1", "category2 quote 2"]
+    after = list_quotes(test_db, "category2", limit=5, after_id=page[0].id)
+    assert [quote.text for quote in after] == ["category2 quote 2"]
+
+    assert quote_cache_stats()["hits"] == 2
+    assert quote_cache_stats()["misses"] == 1
+
+
+def test_writes_invalidate_cache(test_db, cache):
+    """Test that add_quote and load_quotes_to_db invalidate cached ids."""
+    assert len(list_quotes(test_db, "category1", limit=10)) == 3
+
+    add_quote(test_db, "Category1", "New quote", "Author")
+    assert len(list_quotes(test_db, "category1", limit=10)) == 4
+
+    load_quotes_to_db(test_db, {"category1": [{"quote": "Loaded", "author": "Author"}]})
+    assert len(list_quotes(test_db, "category1", limit=10)) == 5
+    assert quote_cache_stats()["misses"] == 3
+
+
+def test_quote_cache_is_per_database(test_db, tmp_path):
+    """Test that databases with the same categories never share cached ids."""
+    other = init_db(f"sqlite:///{tmp_path / 'other.db'}")
+    other.add(Quote(text="Other quote", author="Author", category="category1"))
+    other.commit()
+    cache = QuoteCache()
+
+    assert len(cache.ids(test_db, "category1")) == 3
+    assert len(cache.ids(other, "category1")) == 1
+    assert cache.stats()["misses"] == 2
+    cache.invalidate("category1")
+    assert cache.stats()["categories"] == 0
+    other.close()
+
+
+def test_quote_cache_reloads_after_ttl(test_db, monkeypatch):
+    """Test that quotes written behind the cache's back show up once entries expire."""
+    cache = QuoteCache(ttl=10)
+    assert len(cache.ids(test_db, "category1")) == 3
+    test_db.add(Quote(text="Written elsewhere", author="Author", category="category1"))
+    test_db.commit()
+    assert len(cache.ids(test_db, "category1")) == 3
+
+    now = time.monotonic()
+    monkeypatch.setattr("quote_manager_cli.cache.time.monotonic", lambda: now + 11)
+    assert len(cache.ids(test_db, "category1")) == 4
+    assert cache.stats()["misses"] == 2
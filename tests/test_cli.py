@@ -81,10 +81,10 @@ def test_init_with_invalid_file(runner):
 
 
 def test_init_with_exception(runner, monkeypatch, test_quotes):
-    def mock_init_db():
+    def mock_init_db(*args):
         raise Exception("Database initialization failed")
 
-    monkeypatch.setattr("quote_manager_cli.cli.init_db", mock_init_db)
+    monkeypatch.setattr("quote_manager_cli.storage.init_db", mock_init_db)
 
     test_file = test_quotes
     result = runner.invoke(cli, ["init", "--file", test_file])
@@ -100,6 +100,40 @@ def test_add_quote(runner, init_db):
     assert "Adding new quote: text - category" in result.output
     assert "Quote added successfully." in result.output
 
+    result = runner.invoke(
+        cli, ["add", "--category", "category", "--text", "text", "--author", "author"]
+    )
+    assert result.exit_code == 2
+    assert "Quote is already stored; nothing added." in result.output
+
+
+def test_add_quotes_from_stdin(runner, init_db):
+    lines = '{"category": "category1", "quote": "Piped 1"}\n{"quote": "No category"}\n'
+    result = runner.invoke(cli, ["add", "--from", "-", "--batch-size", "1"], input=lines)
+    assert result.exit_code == 0
+    assert "Line 2: missing category" in result.output
+    assert "1 quotes added, 1 rejected" in result.output
+
+    result = runner.invoke(cli, ["search", "piped"])
+    assert "Piped 1" in result.output
+
+
+def test_stats(runner, init_db):
+    result = runner.invoke(cli, ["stats", "--top-authors", "2"])
+    assert result.exit_code == 0
+    assert "Total: 4 quotes in 2 categories" in result.output
+    assert "Top 2 authors:" in result.output
+
+    result = runner.invoke(cli, ["stats", "--category", "category1"])
+    assert "category1" in result.output and "category2" not in result.output
+
+
+def test_migrate(runner, init_db):
+    result = runner.invoke(cli, ["migrate"])
+    assert result.exit_code == 0
+    # Imported quotes are keyed as they are stored, so there is nothing left to do.
+    assert "Keyed 0 quotes to" in result.output
+
 
 def test_generate_quote(runner, init_db):
     result = runner.invoke(cli, ["generate", "--category", "category1"])
@@ -121,3 +155,123 @@ def test_list_quotes(runner, init_db):
     result = runner.invoke(cli, ["list", "--category", "nonexistent_category"])
     assert result.exit_code == 0
     assert "No quotes found in nonexistent_category" in result.output
+
+
+def test_generate_quote_count(runner, init_db):
+    result = runner.invoke(cli, ["generate", "--category", "category1", "--count", "2"])
+    assert result.exit_code == 0
+    assert result.output.count("Quote:") == 2
+    assert "Quote 1" in result.output and "Quote 2" in result.output
+
+
+def test_list_quotes_pages(runner, init_db):
+    result = runner.invoke(cli, ["list", "--category", "category1", "--limit", "1", "--page", "2"])
+    assert result.exit_code == 0
+    assert "2. Quote 2 - Author 2" in result.output
+    assert "Quote 1" not in result.output
+
+    result = runner.invoke(cli, ["list", "--all"])
+    assert result.exit_code == 0
+    assert all(f"Quote {i}" in result.output for i in range(1, 5))
+
+
+def test_init_with_json_lines_file(runner, tmp_path):
+    file_path = tmp_path / "quotes.jsonl"
+    file_path.write_text(
+        '{"category": "Category1", "quote": "Quote 1", "author": "Author 1"}\n'
+        '{"category": "category2", "quote": "Quote 2", "author": "Author 2"}\n'
+    )
+    result = runner.invoke(cli, ["init", "--file", str(file_path)])
+    assert result.exit_code == 0
+    assert "2 quotes added" in result.output
+
+    result = runner.invoke(cli, ["list", "--category", "category1"])
+    assert "Quote 1 - Author 1" in result.output
+
+
+def test_init_append_mode(runner, init_db, test_quotes):
+    result = runner.invoke(cli, ["init", "--file", test_quotes, "--mode", "append"])
+    assert result.exit_code == 0
+    assert "0 quotes added" in result.output
+
+
+def test_search_quotes(runner, init_db):
+    result = runner.invoke(cli, ["search", "quote", "3"])
+    assert result.exit_code == 0
+    assert "1. Quote 3 - Author 3" in result.output
+
+    result = runner.invoke(cli, ["search", "quote", "--category", "category2", "--limit", "5"])
+    assert "Quote 1" not in result.output
+    assert "Quote 4" in result.output
+
+    result = runner.invoke(cli, ["search", "missing"])
+    assert "No matching quotes found." in result.output
+
+
+def test_profile_prints_phase_breakdown(runner, init_db):
+    from quote_manager_cli.metrics import metrics
+
+    try:
+        result = runner.invoke(cli, ["--profile", "--profile-format", "json", "list"])
+    finally:
+        metrics.disable()
+        metrics.reset()
+    assert result.exit_code == 0
+    profile = json.loads(result.stderr)
+    assert {"command", "db.execute", "db.fetch"} <= set(profile["timers"])
+
+
+def test_init_with_shard_directory(runner, tmp_path):
+    for i in range(2):
+        data = {"category1": [{"quote": f"Shard quote {i}", "author": "Author"}]}
+        (tmp_path / f"part-{i}.json").write_text(json.dumps(data))
+    (tmp_path / "part-2.json").write_text("not json")
+
+    result = runner.invoke(cli, ["init", "--file", str(tmp_path), "--workers", "2"])
+    assert result.exit_code == 0
+    assert "[3/3]" in result.output and "skipped" in result.output
+    assert "2 quotes added from 2 of 3 files" in result.output
+
+    result = runner.invoke(cli, ["init", "--file", str(tmp_path / "missing-*.json")])
+    assert "no quote files found" in result.output
+
+
+def test_export_and_reimport_parquet(runner, init_db, tmp_path):
+    out = str(tmp_path / "quotes.parquet")
+    result = runner.invoke(cli, ["export", "--format", "parquet", "--out", out])
+    assert result.exit_code == 0
+    assert f"Exported 4 quotes to {out}" in result.output
+
+    result = runner.invoke(cli, ["init", "--file", out])
+    assert result.exit_code == 0
+    assert "4 quotes added" in result.output
+
+
+def test_init_with_dedupe(runner, tmp_path):
+    data = {
+        "category1": [{"quote": "Stay hungry, stay foolish.", "author": "Author"}],
+        "category2": [
+            {"quote": "stay hungry stay foolish!", "author": "Author"},
+            {"quote": "Quote 2", "author": "Author"},
+        ],
+    }
+    source = tmp_path / "quotes.json"
+    source.write_text(json.dumps(data))
+    report = tmp_path / "merged.jsonl"
+
+    result = runner.invoke(
+        cli, ["init", "--file", str(source), "--dedupe", "exact", "--dedupe-report", str(report)]
+    )
+    assert result.exit_code == 0
+    assert "2 quotes added" in result.output
+    assert "Merged 1 exact and 0 near duplicates" in result.output
+    assert "'stay hungry stay foolish!' -> 'Stay hungry, stay foolish.'" in result.output
+    assert len(report.read_text().splitlines()) == 1
+
+
+def test_init_publishes_database(runner, test_quotes, tmp_path):
+    published = tmp_path / "readers.db"
+    result = runner.invoke(cli, ["init", "--file", test_quotes, "--publish", str(published)])
+    assert result.exit_code == 0
+    assert f"Published database to {published}" in result.output
+    assert published.exists()
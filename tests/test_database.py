@@ -1,15 +1,30 @@
 import os
+from datetime import datetime
 import pytest
-from sqlalchemy import inspect
+from sqlalchemy import Column, DateTime, Integer, MetaData, Sequence, String, Table, inspect, text
 from sqlalchemy.orm import Session
 
 from quote_manager_cli.database import (
+    Author,
+    Category,
+    KeyMigration,
     Quote,
+    QuoteStat,
+    bulk_insert,
+    category_filter,
     create_session,
+    dispose_engines,
     drop_existing_table,
+    engine_stats,
     get_db_conn,
     get_engine,
+    get_read_conn,
+    has_quote_keys,
     init_db,
+    migrate_database,
+    publish_database,
+    quote_content_hash,
+    quote_session,
 )
 
 
@@ -90,3 +105,215 @@ def test_quote_model(test_session):
 
     test_session.delete(quote)
     test_session.commit()
+
+
+@pytest.mark.parametrize("url", ["duckdb:///:memory:", "sqlite:///:memory:"])
+def test_bulk_insert(url):
+    """Test that bulk_insert loads a batch of rows in the session's transaction."""
+    db = init_db(url)
+    rows = [
+        {
+            "text": f"It's quote {i} 💖",
+            "author": "O'Brien",
+            "category": "general",
+            "content_hash": str(i),
+            "created_at": datetime.now(),
+        }
+        for i in range(50)
+    ]
+    bulk_insert(db, Quote.__table__, rows)
+    db.rollback()
+    assert db.query(Quote).count() == 0
+
+    bulk_insert(db, Quote.__table__, rows)
+    db.commit()
+    quotes = db.query(Quote).order_by(Quote.id).all()
+    assert [quote.text for quote in quotes] == [row["text"] for row in rows]
+    assert len({quote.id for quote in quotes}) == 50
+    db.close()
+
+
+def test_get_engine_is_cached(test_engine):
+    """Test that engines are shared per URL, except for in-memory databases."""
+    assert get_engine(test_engine.url) is test_engine
+    assert get_engine("sqlite:///:memory:") is not get_engine("sqlite:///:memory:")
+
+
+@pytest.fixture
+def session_url(tmp_path):
+    """A DuckDB file URL under tmp_path whose engines are disposed afterwards."""
+    yield f"duckdb:///{tmp_path / 'session.db'}"
+    dispose_engines()
+
+
+def test_quote_session_reuses_connections(session_url):
+    """Test that quote_session hands back pooled connections."""
+    init_db(session_url).close()
+    with quote_session(session_url) as db:
+        db.query(Quote).count()
+    before = engine_stats()
+
+    for _ in range(3):
+        with quote_session(session_url) as db:
+            db.query(Quote).count()
+
+    after = engine_stats()
+    assert after["engines_created"] == before["engines_created"]
+    assert after["connections_opened"] == before["connections_opened"]
+    assert after["connection_checkouts"] == before["connection_checkouts"] + 3
+    assert after["sessions_created"] == before["sessions_created"] + 3
+
+
+def test_quote_session_rolls_back_on_error(session_url):
+    """Test that quote_session rolls back when the block raises."""
+    init_db(session_url).close()
+    with pytest.raises(RuntimeError):
+        with quote_session(session_url) as db:
+            db.add(Quote(text="Rolled back", author="Author", category="category"))
+            db.flush()
+            raise RuntimeError("boom")
+
+    with quote_session(session_url) as db:
+        assert db.query(Quote).filter_by(text="Rolled back").count() == 0
+
+
+@pytest.mark.parametrize("driver", ["duckdb", "sqlite"])
+def test_init_db_adds_new_columns_in_place(tmp_path, driver):
+    """Test that init_db adds defaulted columns to an older quotes table without losing rows."""
+    url = f"{driver}:///{tmp_path / 'legacy.db'}"
+    with get_engine(url).begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE quotes (id INTEGER PRIMARY KEY, text VARCHAR, author VARCHAR(100), "
+                "category VARCHAR(100), content_hash VARCHAR(64), created_at TIMESTAMP)"
+            )
+        )
+        connection.execute(text("INSERT INTO quotes (id, text, category) VALUES (1, 'Old', 'c')"))
+
+    db = init_db(url)
+    assert [(quote.text, quote.weight) for quote in db.query(Quote)] == [("Old", 1.0)]
+    # Stats are built from the quotes that were already stored.
+    assert db.query(QuoteStat.category, QuoteStat.author, QuoteStat.quotes).all() == [
+        ("c", "Unknown", 1)
+    ]
+    db.close()
+
+
+@pytest.mark.parametrize("driver", ["duckdb", "sqlite"])
+def test_migrate_database_keys_legacy_quotes(tmp_path, driver):
+    """Test that migrate_database adds dictionary keys to quotes stored as strings only."""
+    url = f"{driver}:///{tmp_path / 'legacy.db'}"
+    with get_engine(url).begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE quotes (id INTEGER PRIMARY KEY, text VARCHAR, author VARCHAR(100), "
+                "category VARCHAR(100), content_hash VARCHAR(64), created_at TIMESTAMP, "
+                "weight FLOAT DEFAULT 1.0)"
+            )
+        )
+        connection.execute(text("CREATE INDEX ix_quotes_text ON quotes (text)"))
+        connection.execute(
+            text(
+                "INSERT INTO quotes (id, text, author, category) VALUES "
+                "(1, 'One', 'Ann', 'Life'), (2, 'Two', 'ann', 'life'), (3, 'Three', NULL, 'fun')"
+            )
+        )
+    db = get_db_conn(url, str(tmp_path / "legacy.db"))
+    # Until it is migrated the table is filtered on the category string.
+    assert not has_quote_keys(db)
+    assert db.query(Quote.id).filter(category_filter(db, "fun")).all() == [(3,)]
+    db.close()
+
+    assert migrate_database(url) == KeyMigration(keyed=3, categories=2, authors=1)
+    db = get_db_conn(url, str(tmp_path / "legacy.db"))
+    assert has_quote_keys(db)
+    assert db.query(Category.name).order_by(Category.name).all() == [("fun",), ("life",)]
+    assert db.query(Author.name, Author.name_key).all() == [("Ann", "ann")]
+    rows = db.query(Quote.id, Quote.category_id, Quote.author_id).order_by(Quote.id).all()
+    assert rows[0][1:] == rows[1][1:] and rows[2][2] is None
+    life = db.query(Quote.id).filter(category_filter(db, "LIFE")).order_by(Quote.id).all()
+    assert life == [(1,), (2,)]
+    db.close()
+    # Running it again finds nothing left to key.
+    assert migrate_database(url).keyed == 0
+
+
+@pytest.mark.parametrize("driver", ["duckdb", "sqlite"])
+def test_migrate_database_keeps_baseline_quotes(tmp_path, driver):
+    """Test that migrating the original schema hashes the stored quotes instead of dropping them."""
+    url = f"{driver}:///{tmp_path / 'baseline.db'}"
+    baseline = Table(
+        "quotes",
+        MetaData(),
+        Column("id", Integer, Sequence("id"), primary_key=True),
+        Column("text", String, index=True),
+        Column("author", String(100)),
+        Column("category", String(100)),
+        Column("created_at", DateTime),
+    )
+    rows = [{"text": f"Quote {i}", "author": "Ann", "category": "life"} for i in range(200)]
+    rows.append(rows[0])
+    with get_engine(url).begin() as connection:
+        baseline.create(connection)
+        connection.execute(baseline.insert(), rows)
+
+    assert migrate_database(url) == KeyMigration(keyed=201, categories=1, authors=1)
+    db = get_db_conn(url, str(tmp_path / "baseline.db"))
+    assert db.query(Quote).count() == 201
+    hashes = [quote.content_hash for quote in db.query(Quote).order_by(Quote.id)]
+    assert hashes[:2] == [quote_content_hash(f"Quote {i}", "Ann", "life") for i in range(2)]
+    assert None not in hashes and len(set(hashes)) == 201
+    db.close()
+
+    # New quotes are merged against the backfilled hashes.
+    db = init_db(url)
+    db.add(Quote(text="Quote 1", author="Ann", category="life"))
+    with pytest.raises(Exception):
+        db.commit()
+    db.rollback()
+    assert db.query(Quote).count() == 201
+    db.close()
+    assert migrate_database(url).keyed == 0
+
+
+@pytest.mark.parametrize("driver", ["duckdb", "sqlite"])
+def test_read_only_engines(tmp_path, driver):
+    """Test read-only engines reject writes and share the file with an open writer."""
+    path = tmp_path / "quotes.db"
+    url = f"{driver}:///{path}"
+    db = init_db(url)
+    db.add(Quote(text="Stored", author="Author", category="category"))
+    db.commit()
+    db.close()
+    writer = get_engine(url)
+    # A read-write engine already open in this process serves read-only requests.
+    assert get_engine(url, read_only=True) is writer
+    dispose_engines()
+
+    reader = get_read_conn(url, str(path))
+    assert [quote.text for quote in reader.query(Quote)] == ["Stored"]
+    with pytest.raises(Exception):
+        reader.execute(text("DELETE FROM quotes"))
+    reader.close()
+    # Asking for a writer replaces the idle read-only engine.
+    writer = get_engine(url)
+    assert get_engine(url, read_only=True) is writer
+    dispose_engines()
+
+
+def test_publish_database(tmp_path):
+    """Test a published copy holds the data and can be opened read-only."""
+    path, published = tmp_path / "quotes.db", tmp_path / "published.db"
+    url = f"duckdb:///{path}"
+    db = init_db(url)
+    db.add(Quote(text="Published", author="Author", category="category"))
+    db.commit()
+    db.close()
+
+    publish_database(str(published), url, str(path))
+    reader = get_read_conn(f"duckdb:///{published}", str(published))
+    assert [quote.text for quote in reader.query(Quote)] == ["Published"]
+    reader.close()
+    with pytest.raises(ValueError):
+        publish_database(str(path), url, str(path))
+    dispose_engines()
@@ -0,0 +1,133 @@
+import json
+
+import pytest
+
+from quote_manager_cli.database import Quote, init_db
+from quote_manager_cli.dedupe import (
+    Deduper,
+    band_hashes,
+    jaccard,
+    minhash_signature,
+    normalize_text,
+    normalized_hash,
+    shingles,
+)
+from quote_manager_cli.quote_manager import load_quotes_to_db
+
+QUOTES = {
+    "life": [
+        {"quote": "Life is what happens when you're busy making other plans.", "author": "A"},
+        {"quote": "Be yourself; everyone else is already taken.", "author": "Oscar Wilde"},
+        {"quote": "life is what happens, when you are busy making other plans!", "author": "B"},
+    ],
+    "love": [
+        {"quote": "BE YOURSELF — everyone else is already taken 💖", "author": "Oscar Wilde"},
+        {"quote": "Love all, trust a few.", "author": "Shakespeare"},
+        {"quote": "💖💖", "author": "Emoji"},
+        {"quote": "🔥", "author": "Emoji"},
+    ],
+}
+
+
+@pytest.fixture(params=["sqlite:///:memory:", "duckdb:///:memory:"])
+def test_db(request):
+    session = init_db(request.param)
+    yield session
+    session.close()
+
+
+def test_normalize_text():
+    """Test case, punctuation, emoji and spacing are folded away."""
+    assert normalize_text("  Be yourself;  everyone else — is taken 💖 ") == (
+        "be yourself everyone else is taken"
+    )
+    assert normalize_text("Ｆｕｌｌ　ｗｉｄｔｈ") == "full width"
+    assert normalize_text("💖💖") == "💖💖"
+    assert normalized_hash("Hello, World!") == normalized_hash("hello world")
+
+
+def test_minhash_bands_match_similar_text():
+    """Test similar texts share a band and unrelated texts do not."""
+    a = normalize_text("Life is what happens when you're busy making other plans.")
+    b = normalize_text("life is what happens, when you are busy making other plans!")
+    c = normalize_text("Love all, trust a few, do wrong to none.")
+
+    assert jaccard(shingles(a), shingles(b)) > 0.8
+    bands_a = band_hashes(minhash_signature(a))
+    assert set(bands_a) & set(band_hashes(minhash_signature(b)))
+    assert not set(bands_a) & set(band_hashes(minhash_signature(c)))
+    assert minhash_signature("") == minhash_signature("")
+
+
+def test_exact_dedupe(test_db):
+    """Test normalized duplicates are merged across categories, keeping the first."""
+    deduper = Deduper()
+    assert load_quotes_to_db(test_db, QUOTES, dedupe=deduper) == 6
+
+    assert deduper.exact_merged == 1 and deduper.near_merged == 0
+    merge = deduper.examples[0]
+    assert merge.kept == ("Be yourself; everyone else is already taken.", "Oscar Wilde", "life")
+    assert merge.merged[2] == "love"
+    categories = {text: category for text, category in test_db.query(Quote.text, Quote.category)}
+    assert categories["Be yourself; everyone else is already taken."] == "life"
+    assert "💖💖" in categories and "🔥" in categories
+
+
+def test_near_dedupe_with_report(test_db, tmp_path):
+    """Test near-duplicates above the threshold are merged and reported."""
+    report = tmp_path / "merged.jsonl"
+    deduper = Deduper(near=True, report_path=str(report))
+    assert load_quotes_to_db(test_db, QUOTES, mode="replace", dedupe=deduper) == 5
+
+    assert (deduper.exact_merged, deduper.near_merged) == (1, 1)
+    lines = [json.loads(line) for line in report.read_text(encoding="utf-8").splitlines()]
+    assert [line["kind"] for line in lines] == ["exact", "near"]
+    assert lines[1]["kept"]["author"] == "A" and lines[1]["merged"]["author"] == "B"
+    assert 0.8 <= lines[1]["similarity"] < 1
+
+    strict = Deduper(near=True, threshold=0.95)
+    load_quotes_to_db(init_db("sqlite:///:memory:"), QUOTES, dedupe=strict)
+    assert strict.near_merged == 0
+
+
+def test_dedupe_threshold_is_validated():
+    with pytest.raises(ValueError):
+        Deduper(near=True, threshold=0)
+
+
+def test_dedupe_matches_stored_quotes(test_db):
+    """Test imports are deduplicated against the stored quotes the merge keeps."""
+    load_quotes_to_db(test_db, QUOTES)
+    near = {"quote": "Life is what happens when you're busy making other plans, dear"}
+    exact = {"quote": "BE YOURSELF, everyone else is already taken", "author": "C"}
+
+    deduper = Deduper(near=True)
+    assert load_quotes_to_db(test_db, {"hope": [near, exact]}, mode="append", dedupe=deduper) == 0
+    assert (deduper.exact_merged, deduper.near_merged) == (1, 1)
+    assert [merge.kept[1] for merge in deduper.examples] == ["Oscar Wilde", "A"]
+
+    # Quotes that are stored as they are go to the merge untouched.
+    again = Deduper(near=True)
+    assert load_quotes_to_db(test_db, {"life": QUOTES["life"][:1]}, dedupe=again) == 0
+    assert again.merged == 0
+
+    # Upsert removes the stored quotes of the categories it imports, so
+    # those cannot be kept in place of an imported one.
+    upsert = Deduper(near=True)
+    assert load_quotes_to_db(test_db, {"life": [near]}, mode="upsert", dedupe=upsert) == 1
+    assert upsert.merged == 0
+    assert test_db.query(Quote).filter(Quote.category == "life").count() == 1
+
+
+def test_near_dedupe_does_not_chain(test_db):
+    """Test a quote only similar to a merged one is kept, not merged into its group."""
+    words = "the quick brown fox jumps over the lazy dog while seven wise owls watch silently"
+    words = (words + " from an old oak tree").split()
+    chain = [" ".join(words[start : start + 14]) for start in (0, 3, 6)]
+    deduper = Deduper(near=True, threshold=0.55)
+    data = {"life": [{"quote": text} for text in chain]}
+    assert load_quotes_to_db(test_db, data, dedupe=deduper) == 2
+
+    assert deduper.near_merged == 1
+    assert deduper.examples[0].merged[0] == chain[1]
+    assert {text for (text,) in test_db.query(Quote.text)} == {chain[0], chain[2]}
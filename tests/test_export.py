@@ -0,0 +1,79 @@
+import csv
+import json
+
+import pytest
+
+from quote_manager_cli.database import init_db
+from quote_manager_cli.export import export_quotes
+from quote_manager_cli.json_stream import iter_quote_file
+from quote_manager_cli.quote_manager import load_quotes_to_db
+
+
+@pytest.fixture(params=["sqlite:///:memory:", "duckdb:///:memory:"])
+def test_db(request):
+    session = init_db(request.param)
+    data = {
+        "category1": [
+            {"quote": "Quote 1, with a comma", "author": "Author 1"},
+            {"quote": 'Quote 2 "quoted" 💖', "author": "Author 2"},
+        ],
+        "category2": [{"quote": "Quote 3", "author": "Author 3"}],
+    }
+    load_quotes_to_db(session, data)
+    yield session
+    session.close()
+
+
+def test_export_csv(test_db, tmp_path):
+    """Test CSV exports carry a header and every quote in id order."""
+    out = tmp_path / "quotes.csv"
+    assert export_quotes(test_db, str(out), "csv") == 3
+
+    with open(out, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["quote"] for row in rows] == [
+        "Quote 1, with a comma",
+        'Quote 2 "quoted" 💖',
+        "Quote 3",
+    ]
+    assert list(rows[0]) == ["id", "quote", "author", "category", "created_at", "weight"]
+
+
+def test_export_jsonl_round_trips(test_db, tmp_path):
+    """Test JSON Lines exports filter by category and read back as quote records."""
+    out = tmp_path / "quotes.jsonl"
+    assert export_quotes(test_db, str(out), "jsonl", category="Category1") == 2
+
+    records = list(iter_quote_file(str(out)))
+    assert [(category, entry["quote"]) for category, entry in records] == [
+        ("category1", "Quote 1, with a comma"),
+        ("category1", 'Quote 2 "quoted" 💖'),
+    ]
+    assert all(json.loads(line)["created_at"] for line in out.read_text().splitlines())
+
+
+def test_export_parquet_round_trips(tmp_path):
+    """Test Parquet exports written by DuckDB can be imported again."""
+    session = init_db("duckdb:///:memory:")
+    quotes = [{"quote": "Quote 1", "author": "Author 1", "weight": 2.5}]
+    load_quotes_to_db(session, {"category1": quotes})
+    out = tmp_path / "quotes.parquet"
+
+    assert export_quotes(session, str(out), "parquet") == 1
+    assert list(iter_quote_file(str(out))) == [("category1", quotes[0])]
+    assert not (tmp_path / "quotes.parquet.tmp").exists()
+
+
+def test_export_arrow(test_db, tmp_path):
+    """Test Arrow IPC exports hold every quote."""
+    pyarrow_ipc = pytest.importorskip("pyarrow.ipc")
+    out = tmp_path / "quotes.arrow"
+
+    assert export_quotes(test_db, str(out), "arrow") == 3
+    table = pyarrow_ipc.open_file(str(out)).read_all()
+    assert table.column("quote").to_pylist()[2] == "Quote 3"
+
+
+def test_export_unknown_format(test_db, tmp_path):
+    with pytest.raises(ValueError):
+        export_quotes(test_db, str(tmp_path / "quotes.xml"), "xml")
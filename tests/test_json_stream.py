@@ -0,0 +1,88 @@
+import io
+import json
+
+import pytest
+
+from quote_manager_cli.json_stream import (
+    _JSONStream,
+    iter_category_json,
+    iter_json_lines,
+    iter_quote_file,
+)
+
+
+@pytest.fixture
+def test_data():
+    return {
+        "category1": [
+            {"quote": "Quote 1 💖", "author": "Author 1"},
+            {"quote": 'Quote [2], {with} "brackets"', "author": "Author 2"},
+        ],
+        "empty": [],
+        "category2": [{"quote": "Quote 3", "author": "Author 3", "weight": 12.5e-1}],
+    }
+
+
+def test_iter_category_json_matches_json_load(tmp_path, test_data):
+    """Test that streamed records match json.load for any chunk size."""
+    file_path = tmp_path / "quotes.json"
+    file_path.write_text(json.dumps(test_data, indent=2), encoding="utf-8")
+    expected = [(category, entry) for category, quotes in test_data.items() for entry in quotes]
+
+    for chunk_size in (1, 5, 64 * 1024):
+        assert list(iter_category_json(str(file_path), chunk_size)) == expected
+
+
+@pytest.mark.parametrize("content", ["", "not json", '{"category1": [{"quote": "x"}', "[1, 2]"])
+def test_iter_category_json_invalid(tmp_path, content):
+    """Test that malformed documents raise a JSONDecodeError."""
+    file_path = tmp_path / "quotes.json"
+    file_path.write_text(content)
+
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_category_json(str(file_path)))
+
+
+def test_malformed_record_stops_reading():
+    """Test a malformed record fails at its byte offset without reading the rest."""
+    f = io.StringIO('[{"quote": "ü"}, {"quote" "x"}, ' + '{"quote": "y"}, ' * 100_000 + "]")
+    stream = _JSONStream(f, chunk_size=64)
+    stream.expect("[")
+    assert stream.value() == {"quote": "ü"}
+    stream.expect(",")
+    with pytest.raises(json.JSONDecodeError, match="Expecting ':' delimiter at byte 27"):
+        stream.value()
+    assert f.tell() < 1024
+
+
+def test_oversized_record_is_rejected():
+    f = io.StringIO('[{"quote": "' + "x" * 10_000)
+    stream = _JSONStream(f, chunk_size=64, max_record_size=1000)
+    stream.expect("[")
+    with pytest.raises(json.JSONDecodeError, match="Unterminated string"):
+        stream.value()
+    assert f.tell() < 2000
+
+
+def test_iter_json_lines(tmp_path):
+    """Test that JSON Lines files yield one record per non-empty line."""
+    file_path = tmp_path / "quotes.jsonl"
+    file_path.write_text(
+        '{"category": "category1", "quote": "Quote 1", "author": "Author 1"}\n'
+        "\n"
+        '{"category": "category2", "quote": "Quote 2", "author": "Author 2"}\n'
+    )
+
+    records = list(iter_quote_file(str(file_path)))
+
+    assert [category for category, _ in records] == ["category1", "category2"]
+    assert records[1][1]["quote"] == "Quote 2"
+
+
+def test_iter_json_lines_missing_category(tmp_path):
+    """Test that a JSON Lines record without a category is rejected."""
+    file_path = tmp_path / "quotes.jsonl"
+    file_path.write_text('{"quote": "Quote 1"}\n')
+
+    with pytest.raises(ValueError, match="Line 1"):
+        list(iter_json_lines(str(file_path)))
@@ -0,0 +1,96 @@
+import json
+import logging
+
+import pytest
+
+from quote_manager_cli import logger_config
+from quote_manager_cli.logger_config import setup_loggers
+
+
+@pytest.fixture(autouse=True)
+def restore_loggers():
+    yield
+    setup_loggers()
+
+
+def test_configurable_directory_and_level(tmp_path):
+    """Test that logs go to the given directory and the level filters info lines."""
+    info_logger, error_logger = setup_loggers(str(tmp_path), level="WARNING")
+
+    info_logger.info("Adding quote: hidden")
+    info_logger.warning("Shown warning")
+    error_logger.error("Shown error")
+
+    assert (tmp_path / "quote_manager.log").read_text().endswith("Shown warning\n")
+    assert "hidden" not in (tmp_path / "quote_manager.log").read_text()
+    assert "Shown error" in (tmp_path / "quote_manager-error.log").read_text()
+
+
+def test_no_files_until_first_record(tmp_path):
+    """Test that setting up the loggers does not create log files."""
+    setup_loggers(str(tmp_path / "logs"))
+    assert not (tmp_path / "logs").exists()
+
+
+def test_json_format(tmp_path):
+    """Test that the structured format writes one JSON object per line."""
+    info_logger, _ = setup_loggers(str(tmp_path), json_format=True)
+
+    info_logger.info("Quote added.")
+
+    entry = json.loads((tmp_path / "quote_manager.log").read_text())
+    assert entry["message"] == "Quote added."
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "info_logger"
+
+
+def test_async_mode_writes_all_records(tmp_path):
+    """Test that async mode hands records to a listener and flushes them on stop."""
+    info_logger, _ = setup_loggers(str(tmp_path), async_mode=True)
+    assert any(isinstance(h, logging.handlers.QueueHandler) for h in info_logger.handlers)
+
+    for i in range(500):
+        info_logger.info(f"record {i}")
+    logger_config._stop_listeners()
+
+    lines = (tmp_path / "quote_manager.log").read_text().splitlines()
+    assert len(lines) == 500
+    assert lines[-1].endswith("record 499")
+
+
+def test_size_based_rotation(tmp_path):
+    """Test that log files rotate once they pass max_bytes."""
+    info_logger, _ = setup_loggers(str(tmp_path), max_bytes=1000, backup_count=2)
+
+    for i in range(100):
+        info_logger.info(f"record {i:04d}")
+
+    assert (tmp_path / "quote_manager.log.1").exists()
+    assert (tmp_path / "quote_manager.log").stat().st_size <= 1000
+    assert not (tmp_path / "quote_manager.log.3").exists()
+
+
+def test_invalid_environment_falls_back_to_defaults(tmp_path, monkeypatch):
+    """Test that bad QUOTE_LOG_* values warn and use the defaults instead of failing."""
+    monkeypatch.setenv("QUOTE_LOG_MAX_BYTES", "10MB")
+    monkeypatch.setenv("QUOTE_LOG_BACKUP_COUNT", "-1")
+    monkeypatch.setenv("QUOTE_LOG_LEVEL", "verbose")
+    with pytest.warns(RuntimeWarning) as caught:
+        info_logger, _ = setup_loggers(str(tmp_path))
+    assert [str(warning.message).split("=")[0] for warning in caught] == [
+        "Ignoring QUOTE_LOG_LEVEL",
+        "Ignoring QUOTE_LOG_MAX_BYTES",
+        "Ignoring QUOTE_LOG_BACKUP_COUNT",
+    ]
+    handler = info_logger.handlers[0]
+    assert (handler.maxBytes, handler.backupCount) == (
+        logger_config.DEFAULT_MAX_BYTES,
+        logger_config.DEFAULT_BACKUP_COUNT,
+    )
+    assert info_logger.level == logging.INFO
+
+    monkeypatch.setenv("QUOTE_LOG_MAX_BYTES", "0")
+    monkeypatch.setenv("QUOTE_LOG_LEVEL", "debug")
+    monkeypatch.setenv("QUOTE_LOG_BACKUP_COUNT", "2")
+    info_logger, _ = setup_loggers(str(tmp_path))
+    assert (info_logger.handlers[0].maxBytes, info_logger.level) == (0, logging.DEBUG)
@@ -0,0 +1,76 @@
+import json
+import time
+
+import pytest
+
+from quote_manager_cli.database import Quote, init_db
+from quote_manager_cli.metrics import Metrics, metrics
+from quote_manager_cli.quote_manager import list_quotes
+
+
+@pytest.fixture
+def recorder():
+    recorder = Metrics()
+    recorder.enable()
+    return recorder
+
+
+@pytest.fixture
+def global_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+
+def test_disabled_metrics_record_nothing():
+    recorder = Metrics()
+    with recorder.timer("phase"):
+        recorder.incr("count")
+    assert recorder.snapshot() == {"timers": {}, "counters": {}}
+
+
+def test_nested_timers_split_self_time(recorder):
+    with recorder.timer("outer"):
+        with recorder.timer("inner"):
+            time.sleep(0.01)
+    recorder.incr("rows", 3)
+
+    timers = recorder.snapshot()["timers"]
+    assert timers["outer"]["calls"] == timers["inner"]["calls"] == 1
+    assert timers["outer"]["total_s"] >= timers["inner"]["total_s"] >= 0.01
+    assert timers["outer"]["self_s"] < 0.01
+    assert recorder.snapshot()["counters"] == {"rows": 3}
+
+
+def test_discarded_timer_is_not_recorded(recorder):
+    recorder.start("statement")
+    recorder.discard("statement")
+    recorder.stop("statement")
+    assert recorder.snapshot()["timers"] == {}
+
+
+def test_render_formats(recorder):
+    with recorder.timer("db.execute"):
+        pass
+    recorder.incr("db.rows_fetched", 2)
+
+    assert "db.execute" in recorder.render("text")
+    assert json.loads(recorder.render("json"))["counters"] == {"db.rows_fetched": 2}
+    prometheus = recorder.render("prometheus")
+    assert 'quote_phase_calls_total{phase="db.execute"} 1' in prometheus
+    assert "quote_db_rows_fetched_total 2" in prometheus
+
+
+def test_hot_paths_are_instrumented(global_metrics):
+    session = init_db("sqlite:///:memory:")
+    session.add_all(Quote(text=f"Quote {i}", author="Author", category="c") for i in range(3))
+    session.commit()
+
+    assert len(list_quotes(session, "c")) == 3
+
+    snapshot = global_metrics.snapshot()
+    assert {"db.execute", "session.commit", "db.fetch", "session.open"} <= set(snapshot["timers"])
+    assert snapshot["counters"]["db.rows_fetched"] == 3
+    assert "orm.quotes_loaded" not in snapshot["counters"]
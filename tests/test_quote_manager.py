@@ -1,14 +1,33 @@
 import json
 import os
-import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
-from quote_manager_cli.database import Quote, init_db
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from quote_manager_cli.database import (
+    Author,
+    Category,
+    Quote,
+    QuoteRow,
+    create_session,
+    dispose_engines,
+    get_engine,
+    init_db,
+)
 from quote_manager_cli.quote_manager import (
+    QUOTE_ADDED,
+    QUOTE_DUPLICATE,
     add_quote,
+    add_quotes,
     generate_random_quote,
+    generate_random_quotes,
+    iter_quotes,
     list_quotes,
     load_quotes_from_json,
     load_quotes_to_db,
+    quote_columns,
 )
 
 
@@ -68,15 +87,43 @@ def test_add_quote(test_db):
     text = "Test quote"
     author = "Test author"
 
-    add_quote(test_db, category, text, author)
+    assert add_quote(test_db, category, text, author) == QUOTE_ADDED
 
     quote = test_db.query(Quote).filter_by(category=category, text=text, author=author).first()
     assert quote is not None
+    assert add_quote(test_db, category, text, author) == QUOTE_DUPLICATE
+    assert test_db.query(Quote).filter_by(text=text).count() == 1
 
     test_db.query(Quote).delete()
     test_db.commit()
 
 
+@pytest.mark.parametrize("url", ["sqlite:///:memory:", "duckdb:///:memory:"])
+def test_add_quotes(url):
+    """Test add_quotes commits valid entries in batches and reports bad lines."""
+    db = init_db(url)
+    entries = [
+        '{"category": "Life", "quote": "Batch 1", "author": "A"}',
+        "",
+        "not json",
+        {"category": "life", "quote": "Batch 1", "author": "A"},
+        {"quote": "No category"},
+        {"category": "love", "text": "Batch 2", "weight": 2},
+        {"category": "love", "quote": "Batch 3", "weight": -1},
+    ]
+    result = add_quotes(db, entries, batch_size=2)
+
+    assert result.added == 2
+    assert [line for line, _ in result.errors] == [3, 4, 5, 7]
+    assert "duplicate of line 1" in result.errors[1][1]
+    rows = db.query(Quote.text, Quote.author, Quote.category, Quote.weight).order_by(Quote.id)
+    assert rows.all() == [("Batch 1", "A", "life", 1.0), ("Batch 2", "Unknown", "love", 2.0)]
+
+    again = add_quotes(db, entries[:1])
+    assert again.added == 0 and again.errors == [(1, "quote is already stored")]
+    db.close()
+
+
 def test_list_quotes(test_db):
     """Test list_quotes function."""
     category = "category1"
@@ -117,3 +164,139 @@ def test_generate_random_quote(test_db):
 
     test_db.query(Quote).delete()
     test_db.commit()
+
+
+def test_generate_random_quotes_distinct(test_db):
+    """Test generate_random_quotes returns distinct quotes within the category."""
+    for i in range(5):
+        test_db.add(Quote(text=f"Quote {i}", author=f"Author {i}", category="category1"))
+    test_db.add(Quote(text="Other", author="Other", category="category2"))
+    test_db.commit()
+
+    quotes = generate_random_quotes(test_db, "Category1", count=3)
+
+    assert len(quotes) == 3
+    assert len({quote.id for quote in quotes}) == 3
+    assert all(quote.category == "category1" for quote in quotes)
+
+    quotes = generate_random_quotes(test_db, "category1", count=10)
+    assert len(quotes) == 5
+
+    assert generate_random_quotes(test_db, "nonexistent_category", count=2) == []
+
+    test_db.query(Quote).delete()
+    test_db.commit()
+
+
+def test_read_errors_are_not_empty_results():
+    """Test a database that cannot be read raises instead of looking empty."""
+    for read in (generate_random_quotes, list_quotes):
+        with pytest.raises(OperationalError):
+            read(create_session(get_engine("sqlite:///:memory:")))
+
+
+def test_list_quotes_pagination(test_db):
+    """Test list_quotes limit/offset and keyset pagination, and iter_quotes streaming."""
+    for i in range(7):
+        test_db.add(Quote(text=f"Quote {i}", author=f"Author {i}", category="category1"))
+    test_db.commit()
+
+    first_page = list_quotes(test_db, "category1", limit=3)
+    assert [quote.text for quote in first_page] == ["Quote 0", "Quote 1", "Quote 2"]
+
+    second_page = list_quotes(test_db, "category1", limit=3, offset=3)
+    assert [quote.text for quote in second_page] == ["Quote 3", "Quote 4", "Quote 5"]
+
+    after_page = list_quotes(test_db, "category1", limit=3, after_id=first_page[-1].id)
+    assert [quote.id for quote in after_page] == [quote.id for quote in second_page]
+
+    streamed = iter_quotes(test_db, "category1", batch_size=2)
+    assert [quote.text for quote in streamed] == [f"Quote {i}" for i in range(7)]
+
+    test_db.query(Quote).delete()
+    test_db.commit()
+
+
+def test_read_paths_return_rows(test_db):
+    """Test the read paths return plain QuoteRow tuples and quote_columns splits columns."""
+    for i in range(3):
+        test_db.add(Quote(text=f"Quote {i}", author=f"Author {i}", category="category1"))
+    test_db.commit()
+
+    quotes = list_quotes(test_db, "category1")
+    assert all(isinstance(quote, QuoteRow) for quote in quotes)
+    assert quotes[0]._replace(id=0, created_at=None) == QuoteRow(
+        0, "Quote 0", "Author 0", "category1"
+    )
+    assert isinstance(quotes[0].created_at, datetime)
+    assert isinstance(generate_random_quote(test_db, "category1"), QuoteRow)
+
+    columns = quote_columns(test_db, "category1", batch_size=2)
+    assert columns["id"].tolist() == [quote.id for quote in quotes]
+    assert columns["text"] == ["Quote 0", "Quote 1", "Quote 2"]
+    assert columns["author"] == ["Author 0", "Author 1", "Author 2"]
+    assert columns["created_at"] == [quote.created_at for quote in quotes]
+    assert quote_columns(test_db, "missing")["id"].tolist() == []
+
+    test_db.query(Quote).delete()
+    test_db.commit()
+
+
+def test_load_quotes_to_db_modes(test_db, test_data):
+    """Test append, upsert and replace imports merge on content hash."""
+    assert load_quotes_to_db(test_db, test_data) == 4
+    original_ids = {quote.text: quote.id for quote in test_db.query(Quote)}
+
+    # Re-importing the same data with a duplicate entry adds nothing.
+    duplicated = {**test_data, "category1": test_data["category1"] * 2}
+    assert load_quotes_to_db(test_db, duplicated, mode="append") == 0
+    assert test_db.query(Quote).count() == 4
+
+    # Upsert only touches the imported categories.
+    changed = {"category1": [{"quote": "Quote 1", "author": "Author 1"}, {"quote": "New"}]}
+    assert load_quotes_to_db(test_db, changed, mode="upsert") == 1
+    texts = {quote.text for quote in test_db.query(Quote)}
+    assert texts == {"Quote 1", "New", "Quote 3", "Quote 4"}
+    assert test_db.query(Quote).filter_by(text="Quote 1").one().id == original_ids["Quote 1"]
+
+    # Replace makes the table match the import.
+    assert load_quotes_to_db(test_db, changed, mode="replace") == 2
+    assert {quote.text for quote in test_db.query(Quote)} == {"Quote 1", "New"}
+
+    test_db.query(Quote).delete()
+    test_db.commit()
+
+
+@pytest.mark.parametrize("url", ["sqlite:///:memory:", "duckdb:///:memory:"])
+def test_quotes_share_category_and_author_keys(url):
+    """Test imports and single adds key quotes to one entry per category and author."""
+    db = init_db(url)
+    load_quotes_to_db(db, {"Life": [{"quote": "One", "author": "Ann"}, {"quote": "Two"}]})
+    add_quote(db, "LIFE", "Three", "ANN")
+    add_quotes(db, [{"category": "fun", "quote": "Four", "author": "ann"}])
+
+    assert db.query(Category.name).order_by(Category.id).all() == [("life",), ("fun",)]
+    assert db.query(Author.name).all() == [("Ann",)]
+    keys = db.query(Quote.text, Quote.category_id, Quote.author_id).order_by(Quote.id).all()
+    assert keys == [("One", 1, 1), ("Two", 1, None), ("Three", 1, 1), ("Four", 2, 1)]
+    assert [quote.text for quote in list_quotes(db, "Life")] == ["One", "Two", "Three"]
+    db.close()
+
+
+def test_concurrent_adds_share_new_keys(tmp_path):
+    """Test adds racing to create the same category key all land."""
+    url = f"duckdb:///{tmp_path / 'quotes.db'}"
+    init_db(url).close()
+    engine = get_engine(url)
+
+    def add(index):
+        return add_quote(create_session(engine), "New", f"Quote {index}", f"Author {index}")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(add, range(20))) == [QUOTE_ADDED] * 20
+    db = create_session(engine)
+    assert db.query(Category.name).all() == [("new",)]
+    assert db.query(Author).count() == 20
+    assert db.query(Quote).filter(Quote.category_id.is_(None)).count() == 0
+    db.close()
+    dispose_engines()
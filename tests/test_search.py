@@ -0,0 +1,109 @@
+from collections import Counter
+
+import pytest
+
+from quote_manager_cli.database import Quote, SearchDoc, SearchTerm, init_db
+from quote_manager_cli.quote_manager import add_quote, load_quotes_to_db
+from quote_manager_cli.search import search_quotes, sync_search_index, tokenize
+
+
+@pytest.fixture(params=["sqlite:///:memory:", "duckdb:///:memory:"])
+def test_db(request):
+    session = init_db(request.param)
+    data = {
+        "life": [
+            {
+                "quote": "Life is what happens when you are busy making other plans.",
+                "author": "John Lennon",
+            },
+            {
+                "quote": "In the end, it's not the years in your life that count.",
+                "author": "Abraham Lincoln",
+            },
+        ],
+        "success": [
+            {"quote": "Success is not final, failure is not fatal.", "author": "Winston Churchill"},
+            {"quote": "Life life life: success in life.", "author": "Anonymous"},
+        ],
+    }
+    load_quotes_to_db(session, data)
+    yield session
+    session.close()
+
+
+def test_tokenize():
+    """Test that tokenize lowercases and splits on non-word characters."""
+    assert tokenize("It's Life, LIFE!") == ["it", "s", "life", "life"]
+    assert tokenize(None) == []
+
+
+def test_search_ranks_by_bm25(test_db):
+    """Test that results are ranked with more frequent terms first and filters apply."""
+    results = search_quotes(test_db, "life")
+    assert [quote.author for quote, _ in results][0] == "Anonymous"
+    assert len(results) == 3
+    assert results[0][1] > results[-1][1]
+
+    results = search_quotes(test_db, "life", category="Life", author="john lennon")
+    assert [quote.author for quote, _ in results] == ["John Lennon"]
+
+    page = search_quotes(test_db, "life", limit=1, offset=1)
+    assert [quote.id for quote, _ in page] == [search_quotes(test_db, "life")[1][0].id]
+
+    assert search_quotes(test_db, "nonexistentterm") == []
+
+
+def test_search_index_updates_incrementally(test_db):
+    """Test that added and removed quotes are reflected in the index."""
+    add_quote(test_db, "fun", "Laughter is timeless", "Author")
+    assert [quote.text for quote, _ in search_quotes(test_db, "laughter")] == [
+        "Laughter is timeless"
+    ]
+
+    load_quotes_to_db(test_db, {"fun": [{"quote": "Only quote", "author": "A"}]}, mode="replace")
+    assert search_quotes(test_db, "life") == []
+    assert len(search_quotes(test_db, "only")) == 1
+    assert test_db.query(SearchDoc).count() == 1
+
+    test_db.query(Quote).delete()
+    assert sync_search_index(test_db) == 0
+    assert test_db.query(SearchTerm).count() == 0
+
+
+def test_import_indexes_only_what_it_adds(test_db, monkeypatch):
+    """Test that imports leave quotes they did not add or remove out of indexing."""
+    test_db.query(SearchDoc).filter(SearchDoc.quote_id == 1).delete()
+    test_db.commit()
+    load_quotes_to_db(test_db, {"fun": [{"quote": "Laughter is timeless", "author": "A"}]})
+    assert len(search_quotes(test_db, "laughter")) == 1
+    assert test_db.query(SearchDoc).count() == 4
+
+    load_quotes_to_db(test_db, {"fun": [{"quote": "Other", "author": "A"}]}, mode="upsert")
+    assert search_quotes(test_db, "laughter") == []
+    assert len(search_quotes(test_db, "success")) == 2
+
+
+def test_init_db_indexes_quotes_stored_before_search(tmp_path):
+    """Test that a database without search tables gets its stored quotes indexed."""
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    db = init_db(url)
+    load_quotes_to_db(db, {"life": [{"quote": "Stored before search", "author": "A"}]})
+    db = init_db(url)
+    SearchTerm.__table__.drop(db.connection())
+    SearchDoc.__table__.drop(db.connection())
+    db.commit()
+    db.close()
+
+    db = init_db(url)
+    assert [quote.text for quote, _ in search_quotes(db, "before")] == ["Stored before search"]
+
+
+def test_index_matches_tokenize(test_db):
+    """Test that every database indexes the terms and lengths `tokenize` gives."""
+    text = "Ünïcode CAFÉ, naïve_2 ½ — " + "x" * 101 + " déjà-vu déjà"
+    load_quotes_to_db(test_db, {"fun": [{"quote": text, "author": "A"}, {"quote": "?!"}]})
+    quote_id = test_db.query(Quote.id).filter(Quote.text == text).scalar()
+    terms = test_db.query(SearchTerm.term, SearchTerm.tf).filter(SearchTerm.quote_id == quote_id)
+    assert dict(terms.all()) == Counter(tokenize(text))
+    lengths = test_db.query(SearchDoc.length).join(Quote, Quote.id == SearchDoc.quote_id)
+    assert lengths.filter(Quote.category == "fun").order_by(Quote.id).all() == [(7,), (0,)]
@@ -0,0 +1,127 @@
+import random
+from collections import Counter
+
+import pytest
+
+from quote_manager_cli.cache import QuoteCache
+from quote_manager_cli.database import Quote, init_db
+from quote_manager_cli.quote_manager import add_quote, generate_random_quotes, load_quotes_to_db
+from quote_manager_cli.selection import AliasTable, QuoteSelector, ShuffleBag, draw_weighted
+
+
+@pytest.fixture
+def test_db():
+    session = init_db("sqlite:///:memory:")
+    data = {
+        "category1": [
+            {"quote": "Heavy", "author": "Author", "weight": 9},
+            {"quote": "Light", "author": "Author", "weight": 1},
+            {"quote": "Never", "author": "Author", "weight": 0},
+        ],
+        "category2": [{"quote": f"Quote {i}", "author": "Author"} for i in range(5)],
+    }
+    load_quotes_to_db(session, data)
+    yield session
+    session.close()
+
+
+def test_alias_table_follows_weights():
+    """Test alias draws land in proportion to the weights."""
+    table = AliasTable([1.0, 3.0, 0.5, 0.5])
+    rng = random.Random(1)
+    counts = Counter(table.sample(rng) for _ in range(50_000))
+    for index, share in enumerate((0.2, 0.6, 0.1, 0.1)):
+        assert counts[index] / 50_000 == pytest.approx(share, abs=0.01)
+
+
+def test_draw_weighted_returns_count():
+    """Test heavy weights that stall rejection still leave `count` distinct picks."""
+    table = AliasTable([1e12] * 4 + [1.0] * 6)
+    for seed in range(20):
+        picks = draw_weighted(random.Random(seed), 5, table.probability, table.alias)
+        assert len(set(picks)) == 5
+        assert {0, 1, 2, 3} < set(picks)
+    rng = random.Random(1)
+    assert sorted(draw_weighted(rng, 20, table.probability, table.alias)) == [*range(10)]
+    assert draw_weighted(rng, 3, table.probability, table.alias, 2, 0) == []
+
+
+def test_shuffle_bag_yields_each_index_once_per_round():
+    """Test every index is drawn once per round and rounds do not repeat at the seam."""
+    bag = ShuffleBag(5, random.Random(2))
+    draws = [bag.draw() for _ in range(50)]
+    for start in range(0, 50, 5):
+        assert sorted(draws[start : start + 5]) == [0, 1, 2, 3, 4]
+    assert all(a != b for a, b in zip(draws, draws[1:]))
+
+
+def test_seeded_draws_are_reproducible(test_db):
+    """Test seeded uniform and weighted draws repeat exactly."""
+    for mode in ("uniform", "weighted"):
+        first = generate_random_quotes(test_db, "category2", 3, mode, seed=7)
+        second = generate_random_quotes(test_db, "category2", 3, mode, seed=7)
+        assert [quote.id for quote in first] == [quote.id for quote in second]
+        assert len({quote.id for quote in first}) == 3
+
+
+def test_weighted_draws_skip_zero_weights(test_db):
+    """Test weighted draws favour heavy quotes and never pick zero-weight ones."""
+    selector = QuoteSelector(seed=3)
+    picks = Counter(
+        test_db.get(Quote, quote_id).text
+        for _ in range(2_000)
+        for quote_id in selector.draw(test_db, "category1", mode="weighted")
+    )
+    assert picks["Never"] == 0
+    assert picks["Heavy"] > 6 * picks["Light"]
+    assert len(selector.draw(test_db, "category1", count=5, mode="weighted")) == 2
+
+
+def test_weighted_draws_in_the_database(test_db):
+    """Test unseeded weighted draws picked in SQL follow the weights."""
+    picks = Counter(
+        quote.text
+        for _ in range(1_000)
+        for quote in generate_random_quotes(test_db, "category1", mode="weighted")
+    )
+    assert picks["Never"] == 0
+    assert picks["Heavy"] > 6 * picks["Light"]
+    assert len(generate_random_quotes(test_db, "category1", 5, "weighted")) == 2
+
+
+def test_selector_shares_the_cache(test_db):
+    """Test populations live in the selector's cache, keyed and invalidated like ids."""
+    cache = QuoteCache()
+    selector = QuoteSelector(seed=5, cache=cache)
+    first = selector.population(test_db, "Category1")
+    assert selector.population(test_db, "category1") is first
+    assert cache.stats()["populations"] == 1
+    selector.draw(test_db, "category1", mode="weighted")
+    assert first._alias is not None
+    cache.invalidate("category1")
+    assert selector.population(test_db, "category1") is not first
+
+
+def test_shuffle_bags_survive_reloads(test_db):
+    """Test reloading an unchanged population keeps the session's round going."""
+    selector = QuoteSelector(seed=6, cache=QuoteCache(ttl=0))
+    picks = [selector.draw(test_db, "category2", mode="shuffle")[0] for _ in range(5)]
+    assert len(set(picks)) == 5
+
+
+def test_shuffle_sessions_do_not_repeat(test_db):
+    """Test each session sees every quote before any repeat, independently."""
+    selector = QuoteSelector(seed=4)
+    first_round = [
+        selector.draw(test_db, "category2", mode="shuffle", session="a")[0] for _ in range(5)
+    ]
+    assert len(set(first_round)) == 5
+    assert len(set(selector.draw(test_db, "category2", 5, "shuffle", session="b"))) == 5
+    assert selector.draw(test_db, "category2", 5, "shuffle", session="a")[0] != first_round[-1]
+
+
+def test_writes_reset_selection(test_db):
+    """Test added quotes become drawable through the shared selector."""
+    assert len(generate_random_quotes(test_db, "category2", 10, "shuffle", session="s")) == 5
+    add_quote(test_db, "category2", "Quote 5", "Author")
+    assert len(generate_random_quotes(test_db, "category2", 10, "shuffle", session="s")) == 6
@@ -0,0 +1,235 @@
+import asyncio
+import json
+
+import pytest
+
+from quote_manager_cli.database import init_db
+from quote_manager_cli.metrics import metrics
+from quote_manager_cli.quote_manager import load_quotes_to_db
+from quote_manager_cli.server import QuoteServer
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    url = f"duckdb:///{tmp_path / 'server.db'}"
+    data = {
+        "category1": [
+            {"quote": "Quote 1", "author": "Author 1"},
+            {"quote": "Quote 2", "author": "Author 2"},
+        ],
+    }
+    load_quotes_to_db(init_db(url), data)
+    return url
+
+
+async def _request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(payload)}\r\n"
+        "Connection: close\r\n\r\n".encode()
+        + payload
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(content)
+
+
+def _run_with_server(db_url, scenario):
+    async def main():
+        quote_server = QuoteServer(db_url, batch_delay=0.02)
+        await quote_server.start()
+        server = await asyncio.start_server(quote_server.handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(port)
+        finally:
+            server.close()
+            await server.wait_closed()
+            await quote_server.close()
+
+    return asyncio.run(main())
+
+
+def test_generate_and_list(db_url):
+    async def scenario(port):
+        status, generated = await _request(port, "GET", "/generate?category=category1&count=2")
+        assert status == 200
+        assert {quote["text"] for quote in generated["quotes"]} == {"Quote 1", "Quote 2"}
+
+        status, listed = await _request(port, "GET", "/list?category=category1&limit=1")
+        assert status == 200
+        assert [quote["text"] for quote in listed["quotes"]] == ["Quote 1"]
+
+    _run_with_server(db_url, scenario)
+
+
+def test_concurrent_adds_are_batched(db_url):
+    async def scenario(port):
+        responses = await asyncio.gather(
+            *(
+                _request(port, "POST", "/add", {"category": "new", "text": f"New {i}"})
+                for i in range(20)
+            )
+        )
+        assert all(status == 200 for status, _ in responses)
+        assert all(body["added"] == 1 for _, body in responses)
+
+        status, listed = await _request(port, "GET", "/list?category=new&limit=50")
+        assert len(listed["quotes"]) == 20
+        assert all(quote["author"] == "Unknown" for quote in listed["quotes"])
+
+    _run_with_server(db_url, scenario)
+
+
+def test_add_reports_added_quotes(db_url):
+    """Test /add counts only the quotes it stored, and a repeat within a batch once."""
+
+    async def scenario(port):
+        stored = {"category": "category1", "text": "Quote 1", "author": "Author 1"}
+        new = {"category": "new", "text": "New"}
+        status, body = await _request(port, "POST", "/add", [stored, new, new])
+        assert status == 200
+        assert body == {"status": "ok", "received": 3, "added": 1}
+
+    _run_with_server(db_url, scenario)
+
+
+def test_failed_add_is_an_error(db_url, monkeypatch):
+    """Test /add answers 500, not ok, when the batch cannot be written."""
+
+    def fail(*args):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr("quote_manager_cli.quote_manager.bulk_insert", fail)
+
+    async def scenario(port):
+        status, body = await _request(port, "POST", "/add", {"category": "new", "text": "Lost"})
+        assert status == 500
+        assert body == {"error": "Quotes could not be stored"}
+
+        status, listed = await _request(port, "GET", "/list?category=new")
+        assert listed["quotes"] == []
+
+    _run_with_server(db_url, scenario)
+
+
+def test_invalid_add_fails_alone(db_url):
+    """Test an invalid quote is refused without failing the requests batched with it."""
+
+    async def scenario(port):
+        responses = await asyncio.gather(
+            _request(port, "POST", "/add", {"category": "new", "text": "Kept 1"}),
+            _request(port, "POST", "/add", {"category": 5, "text": "Bad"}),
+            _request(port, "POST", "/add", {"category": "new", "text": "Kept 2"}),
+        )
+        assert [status for status, _ in responses] == [200, 400, 200]
+        assert responses[1][1] == {"error": "Invalid quote: missing category"}
+
+        status, listed = await _request(port, "GET", "/list?category=new")
+        assert sorted(quote["text"] for quote in listed["quotes"]) == ["Kept 1", "Kept 2"]
+
+    _run_with_server(db_url, scenario)
+
+
+def test_failed_batch_is_retried_per_request(db_url, monkeypatch):
+    """Test a batch that cannot be written fails only the request that broke it."""
+    from quote_manager_cli import server
+
+    load = server.load_quote_rows_to_db
+
+    def load_unless_poisoned(db, rows, *args, **kwargs):
+        if any(row["text"] == "Poison" for row in rows):
+            raise RuntimeError("cannot store")
+        return load(db, rows, *args, **kwargs)
+
+    monkeypatch.setattr(server, "load_quote_rows_to_db", load_unless_poisoned)
+
+    async def scenario(port):
+        responses = await asyncio.gather(
+            *(
+                _request(port, "POST", "/add", {"category": "new", "text": text})
+                for text in ("Kept 1", "Poison", "Kept 2")
+            )
+        )
+        assert [status for status, _ in responses] == [200, 500, 200]
+        assert [body.get("added") for _, body in responses] == [1, None, 1]
+
+        status, listed = await _request(port, "GET", "/list?category=new")
+        assert sorted(quote["text"] for quote in listed["quotes"]) == ["Kept 1", "Kept 2"]
+
+    _run_with_server(db_url, scenario)
+
+
+def test_bad_requests(db_url):
+    async def scenario(port):
+        status, body = await _request(port, "POST", "/add", {"text": "No category"})
+        assert status == 400
+        assert "category" in body["error"]
+
+        status, _ = await _request(port, "GET", "/missing")
+        assert status == 404
+
+        status, _ = await _request(port, "POST", "/generate")
+        assert status == 405
+
+        status, _ = await _request(port, "GET", "/list?limit=abc")
+        assert status == 400
+
+    _run_with_server(db_url, scenario)
+
+
+@pytest.fixture
+def fresh_metrics():
+    metrics.reset()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+
+def test_metrics_endpoint(db_url, fresh_metrics):
+    async def scenario(port):
+        await _request(port, "GET", "/generate?category=category1")
+        status, body = await _request(port, "GET", "/metrics")
+        assert status == 200
+        assert body["timers"]["http.GET /generate"]["calls"] == 1
+        assert "db.execute" in body["timers"]
+        assert body["cache"]["misses"] >= 1
+
+    _run_with_server(db_url, scenario)
+
+
+def test_generate_shuffle_session(db_url):
+    async def scenario(port):
+        picks = []
+        for _ in range(2):
+            status, body = await _request(port, "GET", "/generate?mode=shuffle&session=s1")
+            assert status == 200
+            picks.append(body["quotes"][0]["text"])
+        assert sorted(picks) == ["Quote 1", "Quote 2"]
+
+        status, _ = await _request(port, "GET", "/generate?mode=sometimes")
+        assert status == 400
+
+    _run_with_server(db_url, scenario)
+
+
+def test_stats_endpoint(db_url):
+    async def scenario(port):
+        await _request(port, "POST", "/add", {"category": "new", "text": "New", "author": "X"})
+        status, stats = await _request(port, "GET", "/stats?top_authors=1")
+        assert status == 200
+        assert stats["total"] == 3
+        assert [(c["category"], c["quotes"]) for c in stats["categories"]] == [
+            ("category1", 2),
+            ("new", 1),
+        ]
+        assert len(stats["top_authors"]) == 1
+
+        status, stats = await _request(port, "GET", "/stats?category=new")
+        assert stats["categories"][0]["authors"] == 1
+        assert stats["categories"][0]["last_created_at"]
+
+    _run_with_server(db_url, scenario)
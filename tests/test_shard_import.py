@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from quote_manager_cli.database import Quote, init_db
+from quote_manager_cli.quote_manager import load_quotes_to_db
+from quote_manager_cli.shard_import import expand_shards, import_shards, is_shard_pattern
+
+
+@pytest.fixture
+def shard_dir(tmp_path):
+    for i in range(4):
+        quotes = [{"quote": f"Quote {i}-{j}", "author": "Author"} for j in range(3)]
+        data = {f"category{i % 2}": quotes}
+        (tmp_path / f"part-{i}.json").write_text(json.dumps(data))
+    (tmp_path / "part-4.jsonl").write_text(
+        '{"category": "category2", "quote": "Quote 4-0", "author": "Author"}\n'
+    )
+    (tmp_path / "notes.txt").write_text("not a shard")
+    return tmp_path
+
+
+@pytest.fixture
+def test_db():
+    session = init_db("sqlite:///:memory:")
+    yield session
+    session.close()
+
+
+def test_expand_shards(shard_dir):
+    """Test directories and globs expand to sorted quote files."""
+    assert is_shard_pattern(str(shard_dir))
+    assert is_shard_pattern(str(shard_dir / "*.json"))
+    assert not is_shard_pattern(str(shard_dir / "part-0.json"))
+
+    names = [path.rsplit("/", 1)[-1] for path in expand_shards(str(shard_dir))]
+    assert names == ["part-0.json", "part-1.json", "part-2.json", "part-3.json", "part-4.jsonl"]
+    assert len(expand_shards(str(shard_dir / "part-[01].json"))) == 2
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_import_shards(test_db, shard_dir, workers):
+    """Test shards are imported in path order, with progress per shard."""
+    seen = []
+    result = import_shards(
+        test_db,
+        expand_shards(str(shard_dir)),
+        workers=workers,
+        progress=lambda done, total, shard: seen.append((done, total, len(shard.rows))),
+    )
+
+    assert result.added == 13
+    assert result.failed == []
+    assert seen == [(1, 5, 3), (2, 5, 3), (3, 5, 3), (4, 5, 3), (5, 5, 1)]
+    texts = [text for (text,) in test_db.query(Quote.text).order_by(Quote.id)]
+    assert texts[:4] == ["Quote 0-0", "Quote 0-1", "Quote 0-2", "Quote 1-0"]
+
+
+def test_bad_shard_is_skipped(test_db, shard_dir):
+    """Test a malformed shard is reported and skipped without deleting existing quotes."""
+    load_quotes_to_db(test_db, {"other": [{"quote": "Kept", "author": "Author"}]})
+    (shard_dir / "part-5.json").write_text('{"broken": [')
+
+    result = import_shards(test_db, expand_shards(str(shard_dir)), mode="replace", workers=1)
+
+    assert result.added == 13
+    assert [path.rsplit("/", 1)[-1] for path, _ in result.failed] == ["part-5.json"]
+    assert "JSONDecodeError" in result.failed[0][1]
+    assert test_db.query(Quote).filter(Quote.text == "Kept").count() == 1
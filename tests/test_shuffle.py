@@ -0,0 +1,64 @@
+import json
+
+from click.testing import CliRunner
+
+from quote_manager_cli.cli import cli
+from quote_manager_cli.shuffle import ShuffleState, permuted_position
+
+
+def test_permuted_position_is_a_permutation():
+    for size in (1, 2, 3, 7, 16, 100):
+        for key in (0, 1, 2**64 - 1):
+            assert sorted(permuted_position(i, size, key) for i in range(size)) == [*range(size)]
+    assert [permuted_position(i, 50, 1) for i in range(50)] != [
+        permuted_position(i, 50, 2) for i in range(50)
+    ]
+
+
+def test_shuffle_state_carries_sessions_over(tmp_path):
+    """Test a session draws every position once per round, across saved states."""
+    path = str(tmp_path / "shuffle.json")
+    first_round = []
+    for _ in range(5):
+        state = ShuffleState(path)
+        first_round += state.draw("a", "Love", 5, seed=1)
+        state.save()
+    assert sorted(first_round) == [0, 1, 2, 3, 4]
+
+    state = ShuffleState(path)
+    assert state.draw("a", "love", 5)[0] != first_round[-1]
+    assert sorted(state.draw("b", "love", 5, 5)) == [0, 1, 2, 3, 4]
+    assert len(set(state.draw("a", "love", 5, 9))) == 5
+    # A category that changed size starts a new bag.
+    assert sorted(state.draw("b", "love", 3, 3)) == [0, 1, 2]
+    assert state.draw("c", None, 0) == []
+
+
+def test_shuffle_state_evicts_old_sessions(tmp_path):
+    state = ShuffleState(str(tmp_path / "shuffle.json"), max_bags=2)
+    for session in ("a", "b", "a", "c"):
+        state.draw(session, None, 3)
+    assert [name.split("\x1f")[0] for name in state.bags] == ["a", "c"]
+
+
+def test_cli_generate_shuffle(tmp_path, monkeypatch):
+    """Test `generate --shuffle` continues its session from one run to the next."""
+    source = tmp_path / "quotes.json"
+    source.write_text(json.dumps({"life": [{"quote": f"Quote {i}"} for i in range(1, 4)]}))
+    url = f"memory:///{source}"
+    monkeypatch.setattr("quote_manager_cli.storage.DATABASE_URL", url)
+    monkeypatch.setattr("quote_manager_cli.storage.DATABASE_READ_URL", url)
+    monkeypatch.setenv("QUOTE_SHUFFLE_STATE", str(tmp_path / "shuffle.json"))
+    runner = CliRunner()
+
+    outputs = [
+        runner.invoke(cli, ["generate", "-c", "life", "--shuffle", "--session", "s"]).output
+        for _ in range(3)
+    ]
+    assert sorted(line for output in outputs for line in output.splitlines()[1:]) == [
+        "Quote: Quote 1 - None",
+        "Quote: Quote 2 - None",
+        "Quote: Quote 3 - None",
+    ]
+    result = runner.invoke(cli, ["generate", "--shuffle", "--weighted"])
+    assert "Error: --weighted and --shuffle cannot be combined." in result.output
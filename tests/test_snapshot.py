@@ -0,0 +1,109 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from quote_manager_cli.cli import cli
+from quote_manager_cli.database import dispose_engines, get_read_conn
+from quote_manager_cli.json_stream import iter_quote_file
+from quote_manager_cli.snapshot import QuoteSnapshot, build_snapshot
+from quote_manager_cli.storage import SQLStore
+
+QUOTES = {
+    "life": [
+        {"quote": "Quote 1", "author": "Author 1"},
+        {"quote": "Quote 2", "author": "Author 2", "weight": 0},
+        {"quote": "Quote 3"},
+    ],
+    "Love": [
+        {"quote": "Quote 4", "author": "Author 1", "weight": 3},
+        {"quote": "Quote 5 ✓", "author": "Author 5"},
+    ],
+}
+
+
+@pytest.fixture
+def database(tmp_path):
+    """A SQLite store loaded with QUOTES, its file, and a snapshot of it."""
+    path = tmp_path / "quotes.json"
+    path.write_text(json.dumps(QUOTES))
+    db_file = str(tmp_path / "quotes.db")
+    store = SQLStore(f"sqlite:///{db_file}")
+    store.load_quotes(iter_quote_file(str(path)))
+    snapshot_path = str(tmp_path / "quotes.snapshot")
+    info = build_snapshot(get_read_conn(store.url, db_file), snapshot_path)
+    assert (info.quotes, info.categories) == (5, 2)
+    yield store, db_file, snapshot_path
+    dispose_engines()
+
+
+def test_snapshot_lists_like_the_database(database):
+    store, _, path = database
+    with QuoteSnapshot(path) as snapshot:
+        assert snapshot.categories() == ["life", "love"]
+        assert snapshot.list_quotes() == store.list_quotes()
+        assert snapshot.list_quotes("LOVE") == store.list_quotes("love")
+        assert snapshot.list_quotes("life", 1, 1) == store.list_quotes("life", 1, 1)
+        first = store.list_quotes(limit=2)[-1].id
+        assert snapshot.list_quotes(limit=2, after_id=first) == store.list_quotes(
+            limit=2, after_id=first
+        )
+        assert [*snapshot.iter_quotes("life", after_id=first)] == [
+            *store.iter_quotes("life", after_id=first)
+        ]
+        assert snapshot.list_quotes("missing") == []
+        assert snapshot.count_quotes() == 5
+        assert snapshot.count_quotes("Life") == 3
+
+
+def test_snapshot_draws_like_the_database(database):
+    """Test seeded draws from a snapshot pick what the database picks."""
+    store, _, path = database
+    with QuoteSnapshot(path) as snapshot:
+        for category in (None, "life", "love"):
+            for mode in ("uniform", "weighted"):
+                for seed in range(5):
+                    expected = store.generate_quotes(category, 2, mode, seed=seed)
+                    assert snapshot.generate_quotes(category, 2, mode, seed=seed) == expected
+        weighted = snapshot.generate_quotes("life", 5, "weighted")
+        assert sorted(quote.text for quote in weighted) == ["Quote 1", "Quote 3"]
+        assert len(snapshot.generate_quotes(count=10)) == 5
+        assert snapshot.generate_quotes("missing", 1, "weighted") == []
+        with pytest.raises(ValueError):
+            snapshot.generate_quotes(mode="shuffle")
+
+
+def test_snapshot_rebuild_keeps_mapped_readers(database):
+    store, db_file, path = database
+    with QuoteSnapshot(path) as old:
+        store.add_quote("life", "Quote 6")
+        build_snapshot(get_read_conn(store.url, db_file), path)
+        assert old.count_quotes() == 5
+        with QuoteSnapshot(path) as new:
+            assert new.count_quotes() == 6
+
+
+def test_invalid_snapshot(tmp_path):
+    path = tmp_path / "quotes.snapshot"
+    for content in (b"", b"not a snapshot"):
+        path.write_bytes(content)
+        with pytest.raises(ValueError):
+            QuoteSnapshot(str(path))
+
+
+def test_cli_snapshot(tmp_path, database, monkeypatch):
+    store, db_file, _ = database
+    monkeypatch.setattr(
+        "quote_manager_cli.database.get_read_conn", lambda: get_read_conn(store.url, db_file)
+    )
+    path = str(tmp_path / "cli.snapshot")
+    runner = CliRunner()
+    result = runner.invoke(cli, ["snapshot", "build", "-o", path])
+    assert f"Wrote 5 quotes in 2 categories to {path}" in result.output
+
+    result = runner.invoke(cli, ["list", "-c", "love", "--snapshot", path])
+    assert "1. Quote 4 - Author 1\n2. Quote 5 ✓ - Author 5" in result.output
+    result = runner.invoke(cli, ["generate", "-n", "3", "--snapshot", path])
+    assert result.output.count("Quote: ") == 3
+    result = runner.invoke(cli, ["generate"], env={"QUOTE_SNAPSHOT": str(tmp_path / "missing")})
+    assert "Error: cannot read snapshot" in result.output
@@ -0,0 +1,96 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from quote_manager_cli.startup import ImportProfiler
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets sit well above what a cold start measures locally, so they only
+# trip when a heavy dependency sneaks back onto the path.
+HELP_SECONDS_BUDGET = 1.0
+HELP_MODULES_BUDGET = 200
+GENERATE_SECONDS_BUDGET = 5.0
+
+MEASURE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from quote_manager_cli.cli import cli
+try:
+    cli(sys.argv[1:])
+except SystemExit:
+    pass
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "modules": sorted(sys.modules),
+}), file=sys.stderr)
+"""
+
+
+def _measure(tmp_path, *args):
+    env = {**os.environ, "PYTHONPATH": PACKAGE_ROOT, "DATABASE_PATH": str(tmp_path / "startup.db")}
+    env.pop("QUOTE_STARTUP_PROFILE", None)
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_SCRIPT, *args],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stderr.strip().splitlines()[-1]), result.stdout
+
+
+def test_help_startup_budget(tmp_path):
+    """Test that `quote --help` stays light and has no filesystem side effects."""
+    measured, output = _measure(tmp_path, "--help")
+
+    assert "generate" in output
+    assert not {"sqlalchemy", "duckdb", "dotenv"} & set(measured["modules"])
+    assert len(measured["modules"]) < HELP_MODULES_BUDGET
+    assert measured["seconds"] < HELP_SECONDS_BUDGET
+    assert not (tmp_path / "var").exists()
+
+
+def test_generate_startup_budget(tmp_path):
+    """Test that `quote generate` only loads what it needs within its time budget."""
+    quotes_file = tmp_path / "quotes.json"
+    quotes_file.write_text(json.dumps({"general": [{"quote": "Quote 1", "author": "Author 1"}]}))
+    _measure(tmp_path, "init", "--file", str(quotes_file))
+
+    measured, output = _measure(tmp_path, "generate")
+
+    assert "Quote: Quote 1 - Author 1" in output
+    assert "quote_manager_cli.server" not in measured["modules"]
+    assert measured["seconds"] < GENERATE_SECONDS_BUDGET
+
+
+def test_import_profiler_records_nested_imports():
+    """Test that the profiler reports newly imported modules with their nesting."""
+    for name in [name for name in sys.modules if name.startswith("xml.dom")]:
+        sys.modules.pop(name)
+
+    profiler = ImportProfiler().install()
+    try:
+        import xml.dom.minidom  # noqa: F401
+    finally:
+        profiler.uninstall()
+
+    names = [name for _, name, _ in profiler.entries]
+    assert "xml.dom.minidom" in names
+    assert all(elapsed >= 0 for _, _, elapsed in profiler.entries)
+
+
+@pytest.mark.parametrize("threshold_ms", [0.0, 1e9])
+def test_import_profiler_report(capsys, threshold_ms):
+    """Test that the report includes a summary line and respects the threshold."""
+    profiler = ImportProfiler()
+    profiler.entries = [(0, "slow_module", 0.5)]
+    profiler.report(sys.stdout, threshold_ms=threshold_ms)
+
+    output = capsys.readouterr().out
+    assert output.startswith("Startup profile:")
+    assert ("slow_module" in output) == (threshold_ms == 0.0)
@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import text
+
+from quote_manager_cli.database import (
+    QuoteStat,
+    create_session,
+    dispose_engines,
+    get_engine,
+    init_db,
+)
+from quote_manager_cli.quote_manager import (
+    QUOTE_ADDED,
+    add_quote,
+    add_quotes,
+    load_quotes_to_db,
+)
+from quote_manager_cli.stats import (
+    category_stats,
+    compact_quote_stats,
+    quote_stats,
+    refresh_quote_stats,
+    top_authors,
+)
+
+DATA = {
+    "love": [
+        {"quote": "Love 1", "author": "Rumi"},
+        {"quote": "Love 2", "author": "Rumi"},
+        {"quote": "Love 3"},
+    ],
+    "life": [{"quote": "Life 1", "author": "Seneca"}],
+}
+
+
+@pytest.fixture(params=["sqlite:///:memory:", "duckdb:///:memory:"])
+def test_db(request):
+    session = init_db(request.param)
+    yield session
+    session.close()
+
+
+def _stat_rows(db):
+    stat = QuoteStat
+    rows = db.query(stat.category, stat.author, stat.quotes, stat.last_created_at)
+    return sorted(tuple(row) for row in rows)
+
+
+def _assert_matches_rebuild(db):
+    compact_quote_stats(db)
+    incremental = _stat_rows(db)
+    refresh_quote_stats(db)
+    assert _stat_rows(db) == incremental
+
+
+def test_stats_follow_every_write_path(test_db):
+    """Test the incrementally kept stats always equal a rebuild from the quotes."""
+    load_quotes_to_db(test_db, DATA)
+    _assert_matches_rebuild(test_db)
+
+    add_quote(test_db, "Life", "Life 2", "Seneca")
+    # Single adds are counted before they are folded into the stats table.
+    assert [(s.category, s.quotes) for s in category_stats(test_db, "life")] == [("life", 2)]
+    add_quotes(test_db, [{"category": "work", "quote": "Work 1", "author": "Rumi"}])
+    _assert_matches_rebuild(test_db)
+    assert [(s.category, s.quotes, s.authors) for s in category_stats(test_db)] == [
+        ("love", 3, 2),
+        ("life", 2, 1),
+        ("work", 1, 1),
+    ]
+    assert top_authors(test_db, limit=2) == [("Rumi", 3), ("Seneca", 2)]
+    assert top_authors(test_db, "love") == [("Rumi", 2), ("Unknown", 1)]
+
+    load_quotes_to_db(test_db, {"love": DATA["love"][:1]}, mode="upsert")
+    _assert_matches_rebuild(test_db)
+    assert [(s.category, s.quotes) for s in category_stats(test_db)] == [
+        ("life", 2),
+        ("love", 1),
+        ("work", 1),
+    ]
+
+    load_quotes_to_db(test_db, {"life": DATA["life"]}, mode="replace")
+    _assert_matches_rebuild(test_db)
+    stats = quote_stats(test_db, authors=5)
+    assert stats.total == 1
+    assert [(s.category, s.quotes) for s in stats.categories] == [("life", 1)]
+    assert stats.top_authors == [("Seneca", 1)]
+
+
+def test_stats_without_the_table(test_db):
+    """Test stats are computed from the quotes for databases without the stats table."""
+    load_quotes_to_db(test_db, DATA)
+    test_db.execute(text("DROP TABLE quote_stats"))
+    assert [(s.category, s.quotes) for s in category_stats(test_db, "Love")] == [("love", 3)]
+    assert top_authors(test_db, limit=1) == [("Rumi", 2)]
+
+
+def test_concurrent_adds_keep_stats(tmp_path):
+    """Test concurrent adds to one category and author are all stored and counted."""
+    url = f"duckdb:///{tmp_path / 'quotes.db'}"
+    load_quotes_to_db(init_db(url), DATA)
+    engine = get_engine(url)
+
+    def add(index):
+        return add_quote(create_session(engine), "love", f"Love {index + 10}", "Rumi")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(add, range(40))) == [QUOTE_ADDED] * 40
+    db = create_session(engine)
+    assert top_authors(db, "love", limit=1) == [("Rumi", 42)]
+    _assert_matches_rebuild(db)
+    db.close()
+    dispose_engines()
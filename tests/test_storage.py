@@ -0,0 +1,203 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from click.testing import CliRunner
+
+from quote_manager_cli.cli import cli
+from quote_manager_cli.database import dispose_engines, get_engine
+from quote_manager_cli.json_stream import iter_quote_file
+from quote_manager_cli.quote_manager import QUOTE_ADDED, QUOTE_DUPLICATE
+from quote_manager_cli.storage import MemoryStore, SQLStore, open_store
+
+QUOTES = {
+    "life": [
+        {"quote": "Quote 1", "author": "Author 1"},
+        {"quote": "Quote 2", "author": "Author 2", "weight": 0},
+        {"quote": "Quote 3"},
+    ],
+    "love": [
+        {"quote": "Quote 4", "author": "Author 4"},
+        {"quote": "Quote 5", "author": "Author 5"},
+    ],
+}
+
+
+@pytest.fixture
+def quotes_file(tmp_path):
+    path = tmp_path / "quotes.json"
+    path.write_text(json.dumps(QUOTES))
+    return str(path)
+
+
+@pytest.fixture(params=["duckdb", "sqlite", "memory"])
+def store(request, tmp_path, quotes_file):
+    """A store of each backend, loaded with QUOTES."""
+    if request.param == "memory":
+        store = MemoryStore(source=None)
+    else:
+        store = SQLStore(f"{request.param}:///{tmp_path / 'quotes.db'}")
+    assert store.load_quotes(iter_quote_file(quotes_file)) == 5
+    yield store
+    dispose_engines()
+
+
+def texts(quotes):
+    return [quote.text for quote in quotes]
+
+
+def test_list_quotes(store):
+    """Test every backend lists quotes in id order, by category and page."""
+    assert texts(store.list_quotes()) == [f"Quote {i}" for i in range(1, 6)]
+    assert texts(store.list_quotes("LOVE")) == ["Quote 4", "Quote 5"]
+    assert texts(store.list_quotes("life", limit=2, offset=1)) == ["Quote 2", "Quote 3"]
+    first = store.list_quotes(limit=2)
+    assert texts(store.list_quotes(limit=2, after_id=first[-1].id)) == ["Quote 3", "Quote 4"]
+    assert texts(store.iter_quotes("life", after_id=first[0].id)) == ["Quote 2", "Quote 3"]
+    assert store.list_quotes("missing") == []
+    assert store.list_quotes()[2].author is None
+    assert {quote.category for quote in store.list_quotes()} == {"life", "love"}
+
+
+def test_count_quotes(store):
+    assert store.count_quotes() == 5
+    assert store.count_quotes("Life") == 3
+    assert store.count_quotes("missing") == 0
+
+
+def test_add_quote(store):
+    """Test every backend adds quotes, defaulting the author and skipping repeats."""
+    assert store.add_quote("Hope", "Quote 6") == QUOTE_ADDED
+    assert store.add_quote("hope", "Quote 6") == QUOTE_DUPLICATE
+    added = store.list_quotes("hope")
+    assert [(quote.text, quote.author, quote.category) for quote in added] == [
+        ("Quote 6", "Unknown", "hope")
+    ]
+    assert added[0].id > max(quote.id for quote in store.list_quotes("love"))
+
+    result = store.add_quotes(
+        [
+            {"category": "hope", "quote": "Quote 7"},
+            {"category": "hope"},
+            {"category": "hope", "quote": "Quote 7"},
+            {"category": "hope", "quote": "Quote 6"},
+        ]
+    )
+    assert result.added == 1
+    assert result.errors == [
+        (2, "missing quote text"),
+        (3, "duplicate of line 1"),
+        (4, "quote is already stored"),
+    ]
+    assert store.count_quotes("hope") == 2
+
+
+def test_load_modes(store):
+    """Test append, upsert and replace merge imports the same way on every backend."""
+    update = [("life", {"quote": "Quote 1", "author": "Author 1"}), ("life", {"quote": "New"})]
+    assert store.load_quotes(update, mode="append") == 1
+    assert store.count_quotes() == 6
+    assert store.load_quotes(update, mode="upsert") == 0
+    assert texts(store.list_quotes("life")) == ["Quote 1", "New"]
+    assert store.count_quotes("love") == 2
+    assert store.load_quotes(update[1:], mode="replace") == 1
+    assert texts(store.list_quotes()) == ["New"]
+
+
+def test_generate_quotes(store):
+    """Test every backend draws distinct quotes, reproducibly when seeded."""
+    picked = store.generate_quotes("life", count=10)
+    assert sorted(texts(picked)) == ["Quote 1", "Quote 2", "Quote 3"]
+    assert store.generate_quotes("missing") == []
+    assert store.generate_quotes(count=0) == []
+
+    seeded = [texts(store.generate_quotes(count=3, seed=7)) for _ in range(2)]
+    assert seeded[0] == seeded[1]
+    # Quote 2 weighs nothing, so weighted draws never pick it.
+    weighted = store.generate_quotes("life", count=3, mode="weighted", seed=1)
+    assert sorted(texts(weighted)) == ["Quote 1", "Quote 3"]
+
+
+def test_seeded_draws_match_across_backends(tmp_path, quotes_file):
+    """Test the same seed picks the same quotes from the database and from memory."""
+    memory = MemoryStore(quotes_file)
+    database = SQLStore(f"sqlite:///{tmp_path / 'quotes.db'}")
+    database.load_quotes(iter_quote_file(quotes_file))
+    for mode in ("uniform", "weighted"):
+        assert texts(memory.generate_quotes(count=3, mode=mode, seed=3)) == texts(
+            database.generate_quotes(count=3, mode=mode, seed=3)
+        )
+    dispose_engines()
+
+
+def test_sql_store_mixes_reads_and_writes(tmp_path, quotes_file):
+    """Test reads keep working while the first write swaps the read-only DuckDB engine."""
+    store = SQLStore(f"duckdb:///{tmp_path / 'quotes.db'}")
+    store.load_quotes(iter_quote_file(quotes_file))
+    dispose_engines()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        reads = [executor.submit(store.generate_quotes, count=2) for _ in range(30)]
+        added = [store.add_quote("new", f"New {index}") for index in range(10)]
+    assert [len(read.result()) for read in reads] == [2] * 30
+    assert added == [QUOTE_ADDED] * 10
+    assert store.count_quotes("new") == 10
+    dispose_engines()
+
+
+def test_memory_store_loads_source_lazily(quotes_file):
+    store = MemoryStore(quotes_file)
+    assert store._rows == {}
+    assert store.count_quotes() == 5
+    assert MemoryStore("missing.json").count_quotes() == 0
+
+
+def test_sql_store_missing_database(tmp_path):
+    store = SQLStore(f"duckdb:///{tmp_path / 'missing.db'}")
+    with pytest.raises(FileNotFoundError):
+        store.list_quotes()
+
+
+def test_open_store(tmp_path, quotes_file):
+    """Test the URL scheme picks the backend, sharing memory stores per source."""
+    assert isinstance(open_store(f"sqlite:///{tmp_path / 'q.db'}"), SQLStore)
+    assert isinstance(open_store(f"duckdb:///{tmp_path / 'q.db'}"), SQLStore)
+    memory = open_store(f"memory:///{quotes_file}")
+    assert isinstance(memory, MemoryStore)
+    assert open_store(f"memory:///{quotes_file}") is memory
+    assert open_store("memory://").source == "category.json"
+    for url in ("postgresql://localhost/quotes", "sqlite://"):
+        with pytest.raises(ValueError):
+            open_store(url)
+
+
+def test_sqlite_files_use_wal(tmp_path):
+    store = SQLStore(f"sqlite:///{tmp_path / 'quotes.db'}")
+    store.load_quotes([("life", {"quote": "Quote 1"})])
+    with get_engine(store.url).connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+    dispose_engines()
+
+
+def test_cli_memory_backend(monkeypatch, quotes_file):
+    """Test the commands run against the backend DATABASE_URL selects."""
+    url = f"memory:///{quotes_file}"
+    monkeypatch.setattr("quote_manager_cli.storage.DATABASE_URL", url)
+    monkeypatch.setattr("quote_manager_cli.storage.DATABASE_READ_URL", url)
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["add", "--category", "hope", "--text", "Quote 6"])
+    assert "Quote added successfully." in result.output
+    result = runner.invoke(cli, ["list", "-c", "hope"])
+    assert "1. Quote 6 - Unknown" in result.output
+    result = runner.invoke(cli, ["generate", "-c", "love", "-n", "2"])
+    assert result.output.count("Quote: ") == 2
+    result = runner.invoke(cli, ["init", "--file", quotes_file, "--dedupe", "exact"])
+    assert "Error: dedupe, --publish and shard imports need a database file." in result.output
+    result = runner.invoke(cli, ["init", "--file", quotes_file])
+    assert "5 quotes added" in result.output
+    assert "Quote 6" not in runner.invoke(cli, ["list", "--all"]).output
+    for command in (["search", "quote"], ["stats"], ["export"], ["migrate"], ["serve"]):
+        result = runner.invoke(cli, command)
+        assert f"Error: {command[0]} needs a DuckDB or SQLite database file" in result.output